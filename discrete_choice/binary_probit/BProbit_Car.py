@@ -17,17 +17,21 @@ import pandas as pd
 import estimagic as em
 import matplotlib.pyplot as plt
 
+import scipy.sparse as sp
 from scipy import stats
 from scipy import optimize
 from scipy.optimize import minimize
 
-from bprobit_llike import bprobit_llike
-from mlcrit_vargs import mlcrit_vargs
-from mlhessian import mlhessian
-from mlgradient import mlgradient
-from numerical_scores import numerical_scores
 from bhhh import bhhh
-from probit_loglik_and_scores import probit_loglik_and_scores
+from bprobit_nr import bprobit_nr
+from choice_models import ProbitModel
+from multistart import multistart
+from margins import margins
+from scaling import scale_regressors, scale_beta, unscale_results
+from sml import RandomCoefficientProbitModel
+from incremental import IncrementalProbit
+from results_store import ResultsStore, fingerprint
+from crossval import cross_validate, make_folds
 
 # Set seed
 np.random.seed(13)
@@ -231,13 +235,28 @@ b0 = np.zeros(3)
 
 #-------------------------------------------------------------------------------
 
-# Estimate the model using the L-BFGS-B algorithm in SciPy
+# Estimate the model using the L-BFGS-B algorithm in SciPy, with the analytic
+# gradient. The model object computes the log-likelihood and the scores in
+# one pass and caches them, so that the objective and the gradient at the
+# same parameters cost a single evaluation
+model = ProbitModel(choice, regressors)
 print('Estimate the model using the L-BFGS-B algorithm in SciPy: ')
 history = {'Nfeval': 0, 'nfeval': [], 'fval': [], 'params': []}
 print('{0:4s}   {1:9s}'.format('Iter', 'f(X)'))
-outmin = minimize(bprobit_llike, b0, args=(choice, regressors, history), \
-    method='L-BFGS-B', options={'disp': True})
+
+def record(xk):
+    # The log-likelihood at the accepted iterate comes from the cache
+    history['nfeval'].append(history['Nfeval'])
+    history['fval'].append(model.negloglik(xk))
+    history['params'].append(xk.copy())
+    if history['Nfeval']%10 == 0:
+        print('{0:4d}   {1: 3.6f}'.format(history['Nfeval'], history['fval'][-1]))
+    history['Nfeval'] += 1
+
+outmin = minimize(model.negloglik, b0, jac=model.negloglik_grad, \
+    method='L-BFGS-B', callback=record, options={'disp': True})
 estcoefs = outmin.x
+print(f"Passes over the data: {model.nevals} (requests: {model.ncalls})")
 
 # Plot the values of the criterion function
 plt.plot(history['nfeval'], history['fval'], linestyle='-', color='b')
@@ -246,12 +265,9 @@ plt.ylabel('Log-likelihood')
 plt.title('Values of the log-likelihood function (SciPy L-BFGS-B)')
 plt.show()
 
-# Compute the standard errors by inverting the Hessian matrix and taking
-# square roots of the diagonal elements
-ml_args = (choice, regressors)
-hess = mlhessian(estcoefs, ml_args, mlcrit_vargs)
-invhess = np.linalg.inv(hess)
-std_errors = np.sqrt(np.diag(invhess))
+# Compute the standard errors by inverting the analytic Hessian matrix and
+# taking square roots of the diagonal elements
+std_errors = model.se(estcoefs)
 
 print('')
 print('Parameter estimates and standard errors using SciPy L-BFGS-B algorithm: ')
@@ -263,13 +279,14 @@ print('-----------------------------------------------------------------------')
 print('')
 
 # Norm of the gradient at the estimates (should be close to zero)
-grad = mlgradient(estcoefs, ml_args, mlcrit_vargs)
+grad = model.gradient(estcoefs)
 print("Gradient at the estimates:", grad)
 norm_grad = np.linalg.norm(grad)
 print("Gradient norm at the estimates:", norm_grad)
 
-# Per-observation scores at the estimates (shape (n,k))
-S = numerical_scores(estcoefs, ml_args)
+# Per-observation scores at the estimates (shape (n,k)), from the same
+# evaluation as the gradient
+S = model.scores(estcoefs)
 print("Per-observation scores at the estimates: ", S)
 
 # BHHH information matrix: sum of outer products (shape (k,k))
@@ -277,7 +294,7 @@ bhhh_info = S.T @ S
 print("BHHH information matrix: ", bhhh_info)
 
 # Var-cov matrix and standard errors using BHHH
-vcov_bhhh = np.linalg.inv(bhhh_info)
+vcov_bhhh = model.vcov(estcoefs, kind='bhhh')
 std_errors_bhhh = np.sqrt(np.diag(vcov_bhhh))
 print("Variance-covariance matrix using BHHH: ", vcov_bhhh)
 
@@ -292,8 +309,10 @@ print('')
 
 #-------------------------------------------------------------------------------
 
-# Estimate the model using the BHHH optimization routine
-results = bhhh(loglik_and_scores=probit_loglik_and_scores,
+# Estimate the model using the BHHH optimization routine. The line search and
+# the final evaluation reuse the cached evaluations of the model
+model = ProbitModel(choice, regressors)
+results = bhhh(loglik_and_scores=model.loglik_and_scores,
     beta0=b0,
     yobs=choice,
     xobs=regressors,
@@ -307,6 +326,7 @@ print("Iterations:", results["niter"])
 print("Log-likelihood: ", results["ll"])
 print("Coefficients: ", results["beta"])
 print("Standard errors: ", results["se"])
+print(f"Passes over the data: {model.nevals} (requests: {model.ncalls})")
 
 estcoefs_bhhh = results["beta"]
 estcoefs_se_bhhh = results["se"]
@@ -318,4 +338,256 @@ print(f"weight: {estcoefs_bhhh[1]:.4f} ({estcoefs_se_bhhh[1]:.4f})")
 print(f"cons:   {estcoefs_bhhh[2]:.4f} ({estcoefs_se_bhhh[2]:.4f})")
 print('')
 print('-----------------------------------------------------------------------')
-print('')
\ No newline at end of file
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Estimate a model with weight-class fixed effects instead of a linear effect
+# of weight. The regressors are passed as a sparse matrix and the weight
+# class as a categorical code, so that no dummy columns are built
+
+wclass = np.searchsorted(np.quantile(weight, [1/3, 2/3]), weight)
+model_fe = ProbitModel(choice, sp.csr_matrix(np.column_stack((mpg, constant))),
+                       categories=[wclass])
+results_fe = bhhh(loglik_and_scores=model_fe.loglik_and_scores,
+    beta0=np.zeros(model_fe.nparams),
+    yobs=choice,
+    xobs=None,
+    maxiter=300,
+    tol=1e-4,
+    step0=1.0,
+    verbose=False)
+se_fe = model_fe.se(results_fe["beta"])
+
+print('')
+print('Probit model with weight-class fixed effects (base: lightest third): ')
+print(f"mpg:    {results_fe['beta'][0]:.4f} ({se_fe[0]:.4f})")
+print(f"cons:   {results_fe['beta'][1]:.4f} ({se_fe[1]:.4f})")
+for j in range(1, model_fe.levels[0].size):
+    print(f"class {j + 1}: {results_fe['beta'][1 + j]:.4f} ({se_fe[1 + j]:.4f})")
+print(f"Converged: {results_fe['converged']}, passes over the data: "
+      f"{model_fe.nevals}")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Multi-start estimation: BHHH from the 16 best of 64 Sobol points inside
+# bounds that reflect the scale of the regressors. Searches that approach a
+# known optimum, or lag far behind the best one, are cancelled
+results_ms = multistart(model, bounds=[[-1, 1], [-0.01, 0.01], [-20, 20]],
+                        nstart=16, nsample=64, method='bhhh', seed=13,
+                        tol=1e-4)
+
+print('')
+print('Multi-start estimation (BHHH): ')
+print("Best coefficients: ", results_ms["beta"])
+print(f"Log-likelihood: {results_ms['ll']:.6f}")
+for j, basin in enumerate(results_ms["basins"]):
+    print(f"Optimum {j + 1}: ll = {basin['ll']:.6f}, converged "
+          f"{basin['nconverged']}, cancelled on the way {basin['nduplicate']}, "
+          f"share {basin['share']:.2f}")
+status, counts = np.unique(results_ms["status"], return_counts=True)
+print("Outcome of the searches: ", dict(zip(status.tolist(), counts.tolist())))
+print(f"Passes over the data: {results_ms['nevals']}, "
+      f"time: {results_ms['time']:.2f} s")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Post-estimation: average predicted probability, average marginal effects
+# and marginal effects at the means of mpg and weight, with delta-method
+# standard errors from the Hessian-based variance-covariance matrix. The
+# data are processed in blocks of rows, so that the same call works on
+# samples that do not fit in memory (np.memmap arrays or chunked readers)
+vcov_hess = model.vcov(estcoefs_bhhh)
+me = margins(estcoefs_bhhh, vcov_hess, regressors, link='probit',
+             continuous=[0, 1], chunk=25)
+
+print('')
+print('Predictions and marginal effects (delta-method standard errors): ')
+print(f"Pr(foreign = 1): {me['pred']:.4f} ({me['pred_se']:.4f})")
+for name, j in (('mpg', 0), ('weight', 1)):
+    print(f"{name + ':':7s} AME {me['ame'][j]: .6f} ({me['ame_se'][j]:.6f}), "
+          f"at means {me['mem'][j]: .6f} ({me['mem_se'][j]:.6f})")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Estimation with standardized regressors: weight (around 3000) and mpg
+# (around 20) are centered and divided by their standard deviations, BHHH
+# and L-BFGS-B run in these coordinates, and the estimates, the
+# variance-covariance matrix and the standard errors are transformed back
+regressors_s, T = scale_regressors(regressors)
+model_s = ProbitModel(choice, regressors_s)
+results_s = bhhh(loglik_and_scores=model_s.loglik_and_scores,
+    beta0=scale_beta(b0, T),
+    yobs=choice,
+    xobs=None,
+    maxiter=300,
+    tol=1e-4,
+    step0=1.0,
+    verbose=False)
+results_s = unscale_results(results_s, T)
+outmin_s = minimize(model_s.negloglik, scale_beta(b0, T),
+                    jac=model_s.negloglik_grad, method='L-BFGS-B')
+outmin_s = unscale_results(outmin_s, T)
+
+print('')
+print('Estimation with standardized regressors: ')
+print(f"BHHH iterations: {results_s['niter']} (original regressors: "
+      f"{results['niter']})")
+print(f"L-BFGS-B iterations: {outmin_s.nit} (original regressors: "
+      f"{outmin.nit})")
+print(f"mpg:    {results_s['beta'][0]:.4f} ({results_s['se'][0]:.4f})")
+print(f"weight: {results_s['beta'][1]:.4f} ({results_s['se'][1]:.4f})")
+print(f"cons:   {results_s['beta'][2]:.4f} ({results_s['se'][2]:.4f})")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Estimate the model using the Newton-Raphson algorithm with the analytic
+# Hessian. The standard errors come from the observed information, as those
+# of Stata's probit
+results_nr = bprobit_nr(choice, regressors, b0, maxiter=100, tol=1e-6,
+                        verbose=True)
+
+print('')
+print('Parameter estimates and standard errors given by Newton-Raphson: ')
+print(f"mpg:    {results_nr['beta'][0]:.4f} ({results_nr['se'][0]:.4f})")
+print(f"weight: {results_nr['beta'][1]:.4f} ({results_nr['se'][1]:.4f})")
+print(f"cons:   {results_nr['beta'][2]:.4f} ({results_nr['se'][2]:.4f})")
+print(f"Iterations: {results_nr['niter']}, converged: "
+      f"{results_nr['converged']}")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Random coefficient on mpg, estimated by simulated maximum likelihood with
+# BHHH and the analytic simulated scores. The 74 cars do not identify the
+# dispersion of a coefficient, so the data are simulated: the regressors are
+# resampled from the auto data and the outcome generated with the
+# Newton-Raphson estimates as means and a standard deviation of the mpg
+# coefficient equal to half its mean. 200 scrambled Halton draws per
+# observation are generated once and reused at every iteration
+rng = np.random.default_rng(13)
+nsim = 20000
+xsim = regressors[rng.integers(0, len(choice), nsim)]
+sd_mpg = 0.5*abs(results_nr['beta'][0])
+ysim = (xsim @ results_nr['beta'] + sd_mpg*xsim[:, 0]*rng.standard_normal(nsim)
+        + rng.standard_normal(nsim) > 0).astype(float)
+model_rc = RandomCoefficientProbitModel(ysim, xsim, random=[0], ndraws=200,
+                                        kind='halton', seed=13)
+results_rc = bhhh(loglik_and_scores=model_rc.loglik_and_scores,
+    beta0=np.append(results_nr['beta'], 0.01),
+    yobs=None,
+    xobs=None,
+    maxiter=300,
+    tol=1e-4,
+    step0=1.0,
+    verbose=False)
+
+print('')
+print('Random-coefficient probit by simulated maximum likelihood (simulated '
+      'data): ')
+print(f"mpg (mean): {results_rc['beta'][0]:.4f} ({results_rc['se'][0]:.4f}), "
+      f"true {results_nr['beta'][0]:.4f}")
+print(f"mpg (sd):   {abs(results_rc['beta'][3]):.4f} "
+      f"({results_rc['se'][3]:.4f}), true {sd_mpg:.4f}")
+print(f"weight:     {results_rc['beta'][1]:.4f} ({results_rc['se'][1]:.4f}), "
+      f"true {results_nr['beta'][1]:.4f}")
+print(f"cons:       {results_rc['beta'][2]:.4f} ({results_rc['se'][2]:.4f}), "
+      f"true {results_nr['beta'][2]:.4f}")
+print(f"Iterations: {results_rc['niter']}, converged: "
+      f"{results_rc['converged']}")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Incremental estimation: the cars arrive in 4 batches (in random order),
+# each absorbed with at most 3 warm-started Newton steps on the new batch
+# plus the quadratic summary of the previous ones. The batches are kept, so
+# that an exact refit on all the data can be run at the end
+inc = IncrementalProbit(info='hessian', keep='float64')
+perm = np.random.permutation(len(choice))
+print('')
+print('Incremental estimation over batches of cars: ')
+for batch in np.array_split(perm, 4):
+    results_inc = inc.update(choice[batch], regressors[batch], nsteps=3)
+    print(f"Batch {inc.nbatches}: n = {results_inc['nobs']:2d}, "
+          f"mpg = {results_inc['beta'][0]: .4f}, "
+          f"weight = {results_inc['beta'][1]: .6f}, "
+          f"cons = {results_inc['beta'][2]: .4f}, "
+          f"steps = {results_inc['niter']}")
+print(f"Passes over a batch: {inc.npasses}")
+print(f"Maximum difference with Newton-Raphson on all the data: "
+      f"{np.max(np.abs(results_inc['beta'] - results_nr['beta'])):.2e}")
+results_inc = inc.refit()
+print(f"After an exact refit: "
+      f"{np.max(np.abs(results_inc['beta'] - results_nr['beta'])):.2e} "
+      f"({results_inc['niter']} Newton steps)")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Store the estimates in a results store (directory results_store): the
+# arrays (estimates, variance-covariance matrices, standard errors, the
+# L-BFGS-B trace) are appended to a binary file and the scalar results and
+# metadata to a small index, so that later reports query the index and read
+# the arrays through memory maps, without re-running the estimations
+store = ResultsStore('results_store')
+data_id = fingerprint(choice, regressors)
+store.save(dict(outmin, beta=estcoefs, converged=outmin.success,
+                vcov=model.vcov(estcoefs), se=std_errors),
+           name='lbfgsb', data=data_id, trace=history, model='probit')
+store.save(results, name='bhhh', data=data_id, model='probit')
+store.save(results_nr, name='newton_raphson', data=data_id, model='probit')
+store.save(results_ms, name='multistart', data=data_id, model='probit')
+
+fits = store.query(data=data_id, model='probit', converged=True)
+print('')
+print(f"Results store: {len(store)} fits, {len(fits)} converged probit fits "
+      f"on these data")
+for fit in fits[-3:]:
+    stored = store.load(fit, keys=['beta', 'se'])
+    print(f"{fit['name']:15s} {fit['time']}: beta = "
+          f"{np.array2string(np.asarray(stored['beta']), precision=4)}")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
+
+#-------------------------------------------------------------------------------
+
+# Choice of the specification by 10-fold cross-validation: out-of-sample
+# log-loss, Brier score and AUC of the model with mpg and weight and of the
+# models with only one of them. The folds are stratified by the outcome and
+# shared by the specifications, and each fold is warm-started at the
+# full-sample estimates (workers > 1 runs the folds in a process pool)
+folds = make_folds(choice, nfolds=10, seed=13)
+specifications = {'mpg, weight': [0, 1, 2], 'mpg': [0, 2], 'weight': [1, 2]}
+print('')
+print('10-fold cross-validation (out-of-sample scores): ')
+print(f"{'Regressors':12s} {'log-loss':>9s} {'Brier':>7s} {'AUC':>7s} "
+      f"{'Newton steps per fold':>22s}")
+for label, columns in specifications.items():
+    results_cv = cross_validate(choice, regressors[:, columns], folds=folds,
+                                link='probit', workers=1)
+    print(f"{label:12s} {results_cv['log_loss']:9.4f} "
+          f"{results_cv['brier']:7.4f} {results_cv['auc']:7.4f} "
+          f"{np.mean(results_cv['niter'][1:]):22.1f}")
+print('')
+print('-----------------------------------------------------------------------')
+print('')
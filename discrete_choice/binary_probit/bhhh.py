@@ -1,4 +1,6 @@
 import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
 
 def bhhh(loglik_and_scores, beta0, yobs, xobs, maxiter, tol, step0, verbose):
     '''
@@ -14,7 +16,8 @@ def bhhh(loglik_and_scores, beta0, yobs, xobs, maxiter, tol, step0, verbose):
       per-observation scores.
     - beta0             <- (k,) initial parameter vector.
     - yobs              <- (n,) vector of observations of the dependent variable.
-    - xobs              <- (n, k) matrix of explanatory variables.
+    - xobs              <- (n, k) matrix of explanatory variables (dense or
+                            scipy.sparse, passed to loglik_and_scores).
     - maxiter           <- maximum number of iterations.
     - tol               <- tolerance for convergence based on the infinity norm
                             of the gradient.
@@ -45,8 +48,9 @@ def bhhh(loglik_and_scores, beta0, yobs, xobs, maxiter, tol, step0, verbose):
         ll_i, scores = loglik_and_scores(beta, yobs, xobs)
         ll = ll_i.sum()
 
-        # Gradient (shape (k,)) and BHHH "Hessian" approximation (shape (k,k))
-        g = scores.sum(axis=0)
+        # Gradient (shape (k,)) and BHHH "Hessian" approximation (shape (k,k)).
+        # Scores in a scipy.sparse matrix give a sparse B
+        g = np.asarray(scores.sum(axis=0)).ravel()
         B = scores.T @ scores
 
         # Check convergence using the infinity norm of the gradient. Print iteration
@@ -62,9 +66,15 @@ def bhhh(loglik_and_scores, beta0, yobs, xobs, maxiter, tol, step0, verbose):
         # Compute search direction: d = B^{-1} g. This is a Newon-like step using 
         # the BHHH approximation to the Hessian
         try:
-            direction = np.linalg.solve(B, g)
+            if sp.issparse(B):
+                direction = spsolve(sp.csc_matrix(B), g)
+                if not np.all(np.isfinite(direction)):
+                    raise np.linalg.LinAlgError
+            else:
+                direction = np.linalg.solve(B, g)
         except np.linalg.LinAlgError:
             # If B is singular or ill-conditioned, fall back to pseudo-inverse
+            B = B.toarray() if sp.issparse(B) else B
             direction = np.linalg.pinv(B) @ g
 
         # Line search to ensure increase in log-likelihood
@@ -95,6 +105,8 @@ def bhhh(loglik_and_scores, beta0, yobs, xobs, maxiter, tol, step0, verbose):
     ll_i, scores = loglik_and_scores(beta, yobs, xobs)
     ll = ll_i.sum()
     B = scores.T @ scores
+    if sp.issparse(B):
+        B = B.toarray()
 
     # Variance-covariance matrix: inverse of BHHH information matrix
     try:
@@ -2,19 +2,22 @@
 import numpy as np
 from scipy import stats
 
+from mixed_precision import xdot
+
 # Define the log-likelihood function
 def bprobit_llike(betas, yobs, xobs, info):
     # INPUT:
     #   yobs <-- (nobs-by-1) vector of observations of the dependent variable,
     #            i.e., indicator of discrete choice (0,1).
-    #   xobs <-- (nobs-by-k) matrix of explanatory variables.
+    #   xobs <-- (nobs-by-k) matrix of explanatory variables (if float32,
+    #            the index is computed in float32 and the rest in float64).
     #   betas <- (k-by-1) vector of parameters to be estimated.
     #
     # OUTPUT:
     #   llike <- (scalar) value of the log-likelihood.
 
     # Compute the conditional choice probabilities
-    xb = np.matmul(xobs,betas)
+    xb = xdot(xobs,betas)
     pxb = stats.norm.cdf(xb)
 
     # Substitute zero probabilities by very low probabilities to avoid 
@@ -25,8 +28,8 @@ def bprobit_llike(betas, yobs, xobs, info):
     # avoid convergence problems
     pxb[pxb == 1] = 0.99999
 
-    # Compute the log-likelihood
-    llike = np.dot(yobs,np.log(pxb)) + np.dot((1-yobs),np.log(1-pxb))
+    # Compute the log-likelihood (pairwise summation in float64)
+    llike = np.sum(yobs*np.log(pxb) + (1-yobs)*np.log(1-pxb))
     llike = -llike
 
     # Record the objective function value and parameter values
@@ -0,0 +1,179 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+
+from choice_models import ProbitModel
+
+
+def bprobit_nr(yobs, xobs, beta0, maxiter=100, tol=1e-6, step0=1.0,
+               verbose=False, categories=None, dtype=np.float64):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Estimate a binary probit model using the Newton-Raphson
+    algorithm with the analytic Hessian, as bprobit_nr.m.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    With z = x'beta, q = 2y - 1 and lambda = q phi(z)/Phi(q z), the gradient
+    is X'lambda and the Hessian -X'(w X), with w = lambda (lambda + z) > 0,
+    so that minus the Hessian is positive definite at any beta and the
+    Newton direction is an ascent direction. Both are computed by ProbitModel
+    in one pass over the data. The Newton step is halved until the
+    log-likelihood does not decrease; each trial point is evaluated together
+    with its Hessian, so that an accepted step costs a single pass. The
+    variance-covariance matrix is the inverse of the observed information
+    at the estimates.
+
+    INPUT:
+    - yobs       <- (n,) vector of observations of the dependent variable.
+    - xobs       <- (n, k) matrix of explanatory variables (dense or
+                    scipy.sparse).
+    - beta0      <- (p,) initial parameter vector.
+    - maxiter    <- maximum number of iterations.
+    - tol        <- tolerance for convergence based on the infinity norm of
+                    the gradient.
+    - step0      <- initial step size for the step halving.
+    - verbose    <- if True, print iteration details.
+    - categories <- categorical variables (fixed effects), as in
+                    choice_models.py.
+    - dtype      <- np.float32 for the single-precision mode of
+                    choice_models.py.
+
+    OUTPUT:
+    - results <- dictionary with the following entries (as bhhh):
+        -- beta      : (p,) estimated parameter vector.
+        -- ll        : (scalar) log-likelihood at the solution.
+        -- vcov      : (p, p) variance-covariance matrix of estimates.
+        -- se        : (p,) standard errors of estimates.
+        -- niter     : number of Newton steps taken.
+        -- converged : boolean indicating if convergence was achieved.
+    ----------------------------------------------------------------------------
+    '''
+
+    model = ProbitModel(yobs, xobs, categories=categories, dtype=dtype)
+    fit = newton_raphson(model, beta0, maxiter=maxiter, tol=tol, step0=step0,
+                         verbose=verbose)
+    beta, ll, A = fit["beta"], fit["ll"], fit["info"]
+    niter, converged = fit["niter"], fit["converged"]
+
+    # Variance-covariance matrix: inverse of the observed information
+    A = A.toarray() if sp.issparse(A) else A
+    vcov = np.linalg.inv(A)
+
+    return {
+        "beta": beta,
+        "ll": ll,
+        "vcov": vcov,
+        "se": np.sqrt(np.diag(vcov)),
+        "niter": niter,
+        "converged": converged,
+    }
+
+
+def newton_raphson(model, beta0, maxiter=100, tol=1e-6, step0=1.0,
+                   info='hessian', prior=None, verbose=False):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Maximize the log-likelihood of a model of choice_models.py by
+    Newton-Raphson with step halving, from a (warm) starting point. This is
+    the iteration of bprobit_nr, shared with the cross-validation folds
+    (crossval.py) and the incremental updates (incremental.py).
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    The log-likelihood, gradient and information (minus the Hessian, or the
+    outer product of the scores with info='bhhh') are computed together, so
+    that an accepted step costs one pass over the data. With prior = (b, f,
+    g, A), the quadratic f + g'(beta - b) - (1/2) (beta - b)' A (beta - b)
+    is added to the log-likelihood (the summary of the batches already
+    absorbed by IncrementalProbit).
+
+    INPUT:
+    - model   <- likelihood model of choice_models.py.
+    - beta0   <- (p,) starting point.
+    - maxiter <- maximum number of Newton steps.
+    - tol     <- tolerance for the infinity norm of the gradient.
+    - step0   <- initial step size for the step halving.
+    - info    <- 'hessian' or 'bhhh'.
+    - prior   <- optional quadratic (b, f, g, A) added to the objective.
+    - verbose <- if True, print iteration details.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- beta      : (p,) estimates.
+        -- ll        : objective at the estimates.
+        -- grad      : (p,) gradient at the estimates.
+        -- info      : (p, p) information at the estimates (scipy.sparse if
+                       the model has sparse regressors).
+        -- niter     : number of Newton steps taken.
+        -- converged : boolean indicating if convergence was achieved.
+    ----------------------------------------------------------------------------
+    '''
+
+    # Objective, gradient and information in one pass
+    def evaluate(beta):
+        if info == 'bhhh':
+            S = model.scores(beta)
+            A = S.T @ S
+        else:
+            A = -model.hessian(beta)
+        ll, g = model.loglik(beta), model.gradient(beta)
+        if prior is not None:
+            b, f, gp, Ap = prior
+            d = beta - b
+            ll, g, A = ll + f + gp @ d - 0.5*d @ Ap @ d, g + gp - Ap @ d, \
+                A + Ap
+        return ll, g, A
+
+    beta = np.asarray(beta0, dtype=float)
+    ll, g, A = evaluate(beta)
+    niter = 0
+    converged = False
+
+    for it in range(maxiter + 1):
+
+        # Check convergence using the infinity norm of the gradient
+        grad_norm = np.linalg.norm(g, ord=np.inf)
+        if verbose:
+            print(f"Iter {it:3d}: ll = {ll: .6f}, ||grad||_inf = {grad_norm: .3e}")
+
+        if grad_norm < tol:
+            converged = True
+            break
+        if it == maxiter:
+            break
+
+        # Newton direction: d = A^{-1} g
+        if sp.issparse(A):
+            direction = spsolve(sp.csc_matrix(A), g)
+        else:
+            direction = np.linalg.solve(A, g)
+
+        # Step halving until the objective does not decrease
+        step = step0
+        while step > 1e-8:
+            beta_new = beta + step*direction
+            ll_new, g_new, A_new = evaluate(beta_new)
+            if ll_new >= ll:
+                beta, ll, g, A = beta_new, ll_new, g_new, A_new
+                break
+            step *= 0.5
+
+        if step <= 1e-8:
+            if verbose:
+                print("Step halving failed to improve objective; stopping.")
+            break
+        niter = it + 1
+
+    return {
+        "beta": beta,
+        "ll": ll,
+        "grad": g,
+        "info": A,
+        "niter": niter,
+        "converged": converged,
+    }
@@ -0,0 +1,517 @@
+import abc
+
+import numpy as np
+import scipy.sparse as sp
+from scipy import stats
+from scipy.sparse.linalg import splu
+from scipy.special import expit, logsumexp
+
+from mixed_precision import xdot, xtdot, xtwx
+
+
+class LikelihoodModel(abc.ABC):
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Discrete-choice model for maximum likelihood estimation, holding
+    the data and caching the last evaluation.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    The per-observation log-likelihoods, the gradient and (on request) the
+    Hessian are computed in one pass over the data by the method 'evaluate'
+    of each model, and stored together with the parameter vector at which
+    they were computed. Any later request at the same parameter vector (the
+    objective and the gradient in scipy.optimize.minimize, the final
+    evaluation of bhhh, the standard errors) is served from the cache. The
+    (n, p) matrix of scores is only formed when it is requested.
+
+    The regressors can be a dense array or a scipy.sparse matrix, and
+    categorical variables (fixed effects) can be passed as integer codes
+    instead of dummy columns. The coefficients of a categorical variable with
+    G levels are the G - 1 effects of all levels but the first one, which are
+    appended to the coefficients of xobs. Fixed effects are never expanded
+    into dummy columns: their contribution to the linear index is a look-up
+    theta[code], and their contributions to the gradient and the Hessian are
+    accumulated by code with np.bincount and scipy.sparse.coo_matrix. The
+    work is proportional to the number of non-zeros of the design, and the
+    Hessian is returned as a scipy.sparse matrix when xobs is sparse or there
+    are categorical variables.
+
+    With dtype=np.float32, xobs is stored and the linear index x'b computed
+    in single precision, which halves the memory and the memory traffic of
+    the data. Everything else is float64: the log-likelihood is summed with
+    np.sum (pairwise summation), and the gradient and the Hessian are
+    accumulated by blocks of observations as in mixed_precision.py.
+
+    ATTRIBUTES:
+    - yobs       <- (n,) vector of observations of the dependent variable.
+    - xobs       <- (n, k) matrix of explanatory variables, dense or
+                    scipy.sparse (converted to CSR), of type dtype.
+    - codes      <- list of (n,) codes 0, ..., G - 1 of each categorical
+                    variable.
+    - levels     <- list of the (G,) distinct values of each categorical
+                    variable (level 0 is the base).
+    - nparams    <- number of coefficients of each linear index.
+    - sparse     <- True if xobs is sparse or there are categorical variables.
+    - nevals     <- number of passes over the data.
+    - ncalls     <- number of requests (served from the cache or not).
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, yobs, xobs, categories=None, dtype=np.float64):
+        self.yobs = np.asarray(yobs).ravel()
+        if sp.issparse(xobs):
+            self.xobs = sp.csr_matrix(xobs, dtype=dtype)
+        else:
+            self.xobs = np.asarray(xobs, dtype=dtype)
+
+        # Categorical variables: a list of (n,) arrays or the columns of an
+        # (n, m) array, recoded as 0, ..., G - 1
+        if categories is None:
+            categories = []
+        elif isinstance(categories, np.ndarray):
+            categories = list(categories.reshape(len(self.yobs), -1).T)
+        self.codes = []
+        self.levels = []
+        for cat in categories:
+            levels, codes = np.unique(np.asarray(cat).ravel(),
+                                      return_inverse=True)
+            self.codes.append(codes.astype(np.intp))
+            self.levels.append(levels)
+        sizes = [levels.size - 1 for levels in self.levels]
+        self._offsets = self.xobs.shape[1] + np.cumsum([0] + sizes)
+        self.nparams = int(self._offsets[-1])
+        self.sparse = sp.issparse(self.xobs) or len(self.codes) > 0
+        self._design = None
+
+        self.nevals = 0
+        self.ncalls = 0
+        self._beta = None
+        self._cache = None
+
+    @abc.abstractmethod
+    def evaluate(self, beta, hessian):
+        # Return a dictionary with the entries ll_i (n,), F (derivatives of
+        # ll_i with respect to the linear indices, (n,) or (n, m)), grad (p,)
+        # and, if hessian is True, hessian (p, p)
+        pass
+
+    def _get(self, beta, key):
+        self.ncalls += 1
+        beta = np.asarray(beta, dtype=float)
+        if self._beta is None or not np.array_equal(beta, self._beta) or \
+                key not in self._cache:
+            self._cache = self.evaluate(beta, hessian=(key == 'hessian'))
+            self._beta = beta.copy()
+            self.nevals += 1
+        return self._cache[key]
+
+    # Linear indices x'b + sum_c theta_c[code_c] for the coefficients B,
+    # (nparams,) or (nparams, m)
+    def index(self, B):
+        k = self.xobs.shape[1]
+        z = xdot(self.xobs, B[:k])
+        for codes, lo, hi in zip(self.codes, self._offsets[:-1],
+                                 self._offsets[1:]):
+            theta = np.concatenate((np.zeros((1,) + B.shape[1:]), B[lo:hi]))
+            z = z + theta[codes]
+        return z
+
+    # Gradient sum_i F_i d_i with respect to the coefficients of the linear
+    # indices, for F (n,) or (n, m)
+    def design_gradient(self, F):
+        g = [xtdot(self.xobs, F)]
+        for codes, levels in zip(self.codes, self.levels):
+            if F.ndim == 1:
+                g.append(np.bincount(codes, F, levels.size)[1:])
+            else:
+                g.append(np.column_stack([
+                    np.bincount(codes, F[:, j], levels.size)[1:]
+                    for j in range(F.shape[1])]))
+        return np.concatenate(g)
+
+    # Per-observation scores F_i d_i, (n, nparams*m) with the coefficients of
+    # each index in turn. With sparse data they are a CSR matrix with the
+    # sparsity pattern of the design, built once
+    def design_scores(self, F):
+        F2 = F.reshape(F.shape[0], -1)
+        if not self.sparse:
+            X = self.xobs
+            return (F2[:, :, None]*X[:, None, :]).reshape(X.shape[0], -1)
+        if self._design is None:
+            n = self.xobs.shape[0]
+            blocks = [sp.csr_matrix(self.xobs)]
+            for codes, levels in zip(self.codes, self.levels):
+                rows = np.flatnonzero(codes)
+                blocks.append(sp.csr_matrix(
+                    (np.ones(rows.size), (rows, codes[rows] - 1)),
+                    shape=(n, levels.size - 1)))
+            self._design = sp.hstack(blocks, format='csr')
+        return sp.hstack([self._design.multiply(F2[:, [j]])
+                          for j in range(F2.shape[1])], format='csr')
+
+    # Weighted cross-product sum_i w_i d_i d_i' of the design, accumulated
+    # block by block: the fixed effects contribute the group sums of w (and
+    # of w x) and, for two categorical variables, the sums of w by pair of
+    # codes
+    def design_cross(self, w):
+        X = self.xobs
+        if not self.sparse:
+            return xtwx(X, w)
+        k = X.shape[1]
+        G = [levels.size for levels in self.levels]
+        if sp.issparse(X):
+            Xw = X.tocoo()
+            Xw = (Xw.row, Xw.col, Xw.data*w[Xw.row])
+            XX = xtwx(X, w)
+        else:
+            XX = sp.csr_matrix(xtwx(X, w))
+        nc = len(self.codes)
+        blocks = [[None]*(nc + 1) for _ in range(nc + 1)]
+        blocks[0][0] = XX
+        for c, codes in enumerate(self.codes):
+            if sp.issparse(X):
+                row, col, val = Xw
+                XC = sp.coo_matrix((val, (col, codes[row])),
+                                   shape=(k, G[c])).tocsr()[:, 1:]
+            else:
+                XC = sp.csr_matrix(np.array([
+                    np.bincount(codes, w*X[:, j], G[c])[1:]
+                    for j in range(k)]).reshape(k, G[c] - 1))
+            blocks[0][c + 1] = XC
+            blocks[c + 1][0] = XC.T
+            blocks[c + 1][c + 1] = sp.diags(np.bincount(codes, w, G[c])[1:])
+            for d in range(c + 1, nc):
+                CD = sp.coo_matrix((w, (codes, self.codes[d])),
+                                   shape=(G[c], G[d])).tocsr()[1:, 1:]
+                blocks[c + 1][d + 1] = CD
+                blocks[d + 1][c + 1] = CD.T
+        return sp.bmat(blocks, format='csr')
+
+    def loglik(self, beta):
+        return self._get(beta, 'll_i').sum()
+
+    def loglik_i(self, beta):
+        return self._get(beta, 'll_i')
+
+    def scores(self, beta):
+        F = self._get(beta, 'F')
+        if 'scores' not in self._cache:
+            self._cache['scores'] = self.design_scores(F)
+        return self._cache['scores']
+
+    def gradient(self, beta):
+        return self._get(beta, 'grad')
+
+    def hessian(self, beta):
+        return self._get(beta, 'hessian')
+
+    # Objective and gradient for minimization (log-likelihood times -1)
+    def negloglik(self, beta):
+        return -self.loglik(beta)
+
+    def negloglik_grad(self, beta):
+        return -self.gradient(beta)
+
+    # Same signature as probit_loglik_and_scores, so that the model can be
+    # passed to bhhh (yobs and xobs are those of the model)
+    def loglik_and_scores(self, beta, yobs=None, xobs=None):
+        return self.loglik_i(beta), self.scores(beta)
+
+    # Log-likelihood at each column of betas (p, S), without the cache. The
+    # models with a single index override it with one pass for all columns
+    def loglik_points(self, betas):
+        return np.array([self.evaluate(b, False)['ll_i'].sum()
+                         for b in np.asarray(betas, dtype=float).T])
+
+    def vcov(self, beta, kind='hessian', idx=None):
+        '''
+        ------------------------------------------------------------------------
+        Variance-covariance matrix of the estimates: inverse of minus the
+        Hessian ('hessian'), inverse of the outer product of the scores
+        ('bhhh') or the sandwich of both ('sandwich'), for the coefficients
+        idx (default: all). With sparse data, only the columns idx of the
+        inverse are computed, from a sparse LU factorization.
+        ------------------------------------------------------------------------
+        '''
+        if kind != 'hessian':
+            S = self.scores(beta)
+            B = S.T @ S
+        M = B if kind == 'bhhh' else -self.hessian(beta)
+        if not sp.issparse(M):
+            V = np.linalg.inv(M)
+            if kind == 'sandwich':
+                V = V @ B @ V
+            return V if idx is None else V[np.ix_(idx, idx)]
+        p = M.shape[0]
+        idx = np.arange(p) if idx is None else np.asarray(idx)
+        E = np.zeros((p, idx.size))
+        E[idx, np.arange(idx.size)] = 1
+        MinvE = splu(sp.csc_matrix(M)).solve(E)
+        if kind == 'sandwich':
+            return MinvE.T @ (B @ MinvE)
+        return MinvE[idx]
+
+    def se(self, beta, kind='hessian', idx=None):
+        return np.sqrt(np.diag(self.vcov(beta, kind, idx)))
+
+
+class ProbitModel(LikelihoodModel):
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Binary probit model, Pr(y = 1) = Phi(x'beta).
+
+    With q = 2y - 1 and z = x'beta, ll_i = log Phi(q z), the score is
+    lambda x with lambda = q phi(z)/Phi(q z), and the Hessian is
+    -sum lambda (lambda + z) x x'. Phi(q z) is computed on the log scale, so
+    that no clipping of the probabilities is needed.
+    ----------------------------------------------------------------------------
+    '''
+
+    def evaluate(self, beta, hessian):
+        q = 2*self.yobs - 1
+        z = self.index(beta)
+        logPhi = stats.norm.logcdf(q*z)
+        lam = q*np.exp(stats.norm.logpdf(z) - logPhi)
+        out = {'ll_i': logPhi, 'F': lam, 'grad': self.design_gradient(lam)}
+        if hessian:
+            out['hessian'] = -self.design_cross(lam*(lam + z))
+        return out
+
+    def loglik_points(self, betas):
+        self.nevals += 1
+        q = 2*self.yobs - 1
+        z = self.index(np.asarray(betas, dtype=float))
+        return stats.norm.logcdf(q[:, None]*z).sum(axis=0)
+
+
+class LogitModel(LikelihoodModel):
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Binary logit model, Pr(y = 1) = exp(x'beta)/(1 + exp(x'beta)).
+
+    ll_i = y z - log(1 + exp(z)), the score is (y - p) x and the Hessian is
+    -sum p (1 - p) x x'.
+    ----------------------------------------------------------------------------
+    '''
+
+    def evaluate(self, beta, hessian):
+        y = self.yobs
+        z = self.index(beta)
+        p = expit(z)
+        out = {'ll_i': y*z - np.logaddexp(0, z), 'F': y - p,
+               'grad': self.design_gradient(y - p)}
+        if hessian:
+            out['hessian'] = -self.design_cross(p*(1 - p))
+        return out
+
+    def loglik_points(self, betas):
+        self.nevals += 1
+        z = self.index(np.asarray(betas, dtype=float))
+        return (self.yobs[:, None]*z - np.logaddexp(0, z)).sum(axis=0)
+
+
+class MNLogitModel(LikelihoodModel):
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Multinomial logit model with alternatives y = 1, ..., J and the
+    first alternative as the base, as in mlogit_insurance_llike.m.
+
+    beta stacks the (p,) coefficients of alternatives 2, ..., J. With P the
+    (n, J) choice probabilities and D the choice indicators, the scores of
+    alternative j are (D_j - P_j) x and the Hessian block (j, l) is
+    -sum (1{j = l} P_j - P_j P_l) x x'.
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, yobs, xobs, categories=None, dtype=np.float64):
+        super().__init__(yobs, xobs, categories, dtype)
+        self.nalt = int(self.yobs.max())
+        self.D = (self.yobs[:, None] == np.arange(1, self.nalt + 1)[None, :])
+
+    def evaluate(self, beta, hessian):
+        m = self.nalt - 1
+        xb = np.zeros((self.yobs.size, self.nalt))
+        xb[:, 1:] = self.index(beta.reshape(m, self.nparams).T)
+        logP = xb - logsumexp(xb, axis=1, keepdims=True)
+        P = np.exp(logP)
+        R = (self.D - P)[:, 1:]
+        out = {'ll_i': logP[self.D], 'F': R,
+               'grad': self.design_gradient(R).T.ravel()}
+        if hessian:
+            W = P[:, 1:]
+            H = [[-self.design_cross(W[:, j]*((j == l) - W[:, l]))
+                  for l in range(m)] for j in range(m)]
+            out['hessian'] = sp.bmat(H, format='csr') if self.sparse else \
+                np.block(H)
+        return out
+
+
+class ConditionalLogitModel(LikelihoodModel):
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Conditional logit model for long-format data, with one row per
+    decision and alternative and alternative-specific regressors:
+    Pr(j | C_d) = exp(x_dj'beta)/sum_{l in C_d} exp(x_dl'beta).
+
+    The rows of each decision are made contiguous (sorted once by group),
+    and the log-sum-exp over each choice set is computed with segment
+    reductions (np.maximum.reduceat, np.add.reduceat) over the flat array of
+    utilities: the cost of an evaluation is proportional to the number of
+    rows, not to the number of decisions times the largest choice set. With
+    P the probabilities and xbar_d = sum_j P_dj x_dj, the score of decision d
+    is sum_j (y_dj - P_dj) x_dj and the Hessian is
+    -(sum P x x' - sum_d xbar_d xbar_d'). Alternative-specific constants can
+    be passed as categorical codes of the alternatives. offset adds a known
+    term to each utility, such as the correction for the sampling of
+    alternatives of sample_choice_sets.
+
+    ATTRIBUTES (in addition to those of LikelihoodModel, with the rows
+    sorted by group):
+    - group      <- (n,) decision of each row.
+    - offset     <- (n,) known term of each utility.
+    - starts     <- (D,) first row of each decision.
+    - order      <- (n,) original position of each row (None if the rows
+                    were already sorted).
+    - ndecisions <- number of decisions D.
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, chosen, xobs, group, offset=None, categories=None,
+                 dtype=np.float64):
+        group = np.asarray(group).ravel()
+        n = group.size
+        offset = np.zeros(n) if offset is None else \
+            np.asarray(offset, dtype=float).ravel()
+        chosen = (np.asarray(chosen).ravel() != 0).astype(float)
+        self.order = None
+        if np.any(group[1:] < group[:-1]):
+            self.order = np.argsort(group, kind='stable')
+            group, offset, chosen = group[self.order], offset[self.order], \
+                chosen[self.order]
+            xobs = xobs[self.order]
+            if categories is not None:
+                categories = [np.asarray(cat).ravel()[self.order]
+                              for cat in (categories.reshape(n, -1).T
+                                          if isinstance(categories, np.ndarray)
+                                          else categories)]
+        super().__init__(chosen, xobs, categories, dtype)
+        self.group = group
+        self.offset = offset
+        self.starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        self.ndecisions = self.starts.size
+        sizes = np.diff(np.r_[self.starts, n])
+        self._seg = np.repeat(np.arange(self.ndecisions), sizes)
+        if np.any(np.add.reduceat(self.yobs != 0, self.starts) != 1):
+            raise ValueError('each decision must have exactly one chosen '
+                             'alternative')
+        self._ichosen = np.flatnonzero(self.yobs)
+        self._agg = None
+
+    # Sums over the rows of each decision
+    def _segment_sum(self, A):
+        if not sp.issparse(A):
+            return np.add.reduceat(A, self.starts, axis=0)
+        if self._agg is None:
+            n = self._seg.size
+            self._agg = sp.csr_matrix((np.ones(n), (self._seg, np.arange(n))),
+                                      shape=(self.ndecisions, n))
+        return self._agg @ A
+
+    # Per-decision scores: sums of the per-row terms F x over each choice set
+    def design_scores(self, F):
+        return self._segment_sum(super().design_scores(F))
+
+    def evaluate(self, beta, hessian):
+        v = self.index(beta) + self.offset
+        m = np.maximum.reduceat(v, self.starts)
+        e = np.exp(v - m[self._seg])
+        S = np.add.reduceat(e, self.starts)
+        P = e/S[self._seg]
+        R = self.yobs - P
+        out = {'ll_i': v[self._ichosen] - m - np.log(S), 'F': R,
+               'grad': self.design_gradient(R)}
+        if hessian:
+            Xbar = self.design_scores(P)
+            out['hessian'] = Xbar.T @ Xbar - self.design_cross(P)
+        return out
+
+
+def sample_choice_sets(chosen, group, nsample, weights=None, seed=None):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Random sample of the alternatives of each decision of
+    long-format data, for the estimation of a conditional logit model on the
+    sampled choice sets.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    REFERENCE: McFadden, D. (1978): "Modelling the Choice of Residential
+    Location", in Karlqvist, A. et al. (eds.), Spatial Interaction Theory
+    and Planning Models, North-Holland, 75-96. Ben-Akiva, M. and Lerman, S.
+    R. (1985): "Discrete Choice Analysis", MIT Press, Section 9.3.
+
+    Without weights, nsample non-chosen alternatives are drawn uniformly
+    without replacement and added to the chosen one. The sampling satisfies
+    the uniform conditioning property, and the conditional logit on the
+    sampled sets is consistent without any correction (offset zero). With
+    weights, nsample alternatives are drawn with replacement with
+    probabilities q_j proportional to the weights, and the chosen one is
+    added; the choice set is made of the distinct alternatives, and the
+    utility of each is corrected by log(k_j/q_j), with k_j the number of
+    times it was drawn (plus one for the chosen alternative). The draws are
+    vectorized over all decisions.
+
+    INPUT:
+    - chosen  <- (n,) indicator of the chosen alternative (one per
+                 decision).
+    - group   <- (n,) decision of each row.
+    - nsample <- number of alternatives drawn per decision.
+    - weights <- (n,) positive sampling weights (None: uniform sampling).
+    - seed    <- seed of the random number generator.
+
+    OUTPUT:
+    - rows   <- indices of the sampled rows, sorted by decision.
+    - offset <- correction of the utility of each sampled row.
+    ----------------------------------------------------------------------------
+    '''
+
+    chosen = np.asarray(chosen).ravel() != 0
+    group = np.asarray(group).ravel()
+    n = group.size
+    order = np.argsort(group, kind='stable')
+    g = group[order]
+    c = chosen[order]
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    D = starts.size
+    seg = np.repeat(np.arange(D), np.diff(np.r_[starts, n]))
+    rng = np.random.default_rng(seed)
+
+    if weights is None:
+        # Random order within each decision, with the chosen row first, and
+        # the first nsample + 1 rows of each decision
+        key = rng.random(n)
+        key[c] = -1.0
+        perm = np.lexsort((key, seg))
+        rank = np.arange(n) - starts[seg]
+        keep = np.sort(perm[rank <= nsample])
+        return order[keep], np.zeros(keep.size)
+
+    # Sampling probabilities within each decision, and cumulative
+    # probabilities shifted by the index of the decision, so that all draws
+    # are one search in the flat array
+    w = np.asarray(weights, dtype=float).ravel()[order]
+    q = w/np.add.reduceat(w, starts)[seg]
+    cq = np.cumsum(q)
+    cq = cq - np.r_[0.0, cq[starts[1:] - 1]][seg] + seg
+    cq[np.r_[starts[1:] - 1, n - 1]] = np.arange(1, D + 1)
+    u = (rng.random((D, nsample)) + np.arange(D)[:, None]).ravel()
+    draws = np.searchsorted(cq, u, side='right')
+    draws = np.minimum(draws, np.repeat(np.r_[starts[1:], n] - 1, nsample))
+    counts = np.bincount(draws, minlength=n) + c
+    keep = np.flatnonzero(counts)
+    return order[keep], np.log(counts[keep]) - np.log(q[keep])
@@ -0,0 +1,154 @@
+import numpy as np
+
+from choice_models import ProbitModel
+from bprobit_nr import newton_raphson
+
+
+class IncrementalProbit:
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Binary probit model estimated incrementally, on batches of
+    observations that arrive over time.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    The log-likelihood of the batches already absorbed is summarized by its
+    second-order expansion around the current estimate beta_t,
+
+        Q(beta) = ll_t + g_t'(beta - beta_t)
+                  - (1/2) (beta - beta_t)' A_t (beta - beta_t),
+
+    with A_t the accumulated information (minus the Hessian, or the outer
+    product of the scores with info='bhhh') of each batch at the estimate
+    that followed it, and g_t the gradient of Q at beta_t (close to zero).
+    A new batch is absorbed with a few Newton steps on Q(beta) + ll_b(beta),
+    warm-started at beta_t, with step halving; each step is one pass over
+    the new batch only (ProbitModel evaluates its log-likelihood, gradient
+    and Hessian together). The expansion of ll_b at the new estimate is then
+    added to Q. The first batch is estimated to convergence.
+
+    The approximation error of Q grows with the distance travelled by the
+    estimates. With keep set, the batches are also stored (as float32 with
+    keep='float32', which halves the memory), and refit() re-estimates the
+    model exactly on all the data, warm-started at the current estimate, and
+    rebuilds Q; with refit_every = m it is run after every m batches. The
+    single-precision index of a float32 refit limits the accuracy of the
+    gradient to about 1e-7 relative, and tol should be set accordingly.
+
+    ATTRIBUTES:
+    - beta     <- (k,) current estimates.
+    - ll       <- log-likelihood of all the data at beta (exact after a
+                  refit, approximated by Q otherwise).
+    - info     <- (k, k) accumulated information A_t.
+    - grad     <- (k,) gradient g_t of Q at beta.
+    - nobs     <- number of observations absorbed.
+    - nbatches <- number of batches absorbed.
+    - npasses  <- number of passes over a batch (or over all the data in a
+                  refit).
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, info='hessian', keep=None, refit_every=None,
+                 maxiter=100, tol=1e-6):
+        self.kind = info
+        self.keep = keep
+        self.refit_every = refit_every
+        self.maxiter = maxiter
+        self.tol = tol
+        self.beta = None
+        self.ll = 0.0
+        self.info = None
+        self.grad = None
+        self.nobs = 0
+        self.nbatches = 0
+        self.npasses = 0
+        self._data = []
+
+    # Log-likelihood, gradient and information of a batch at beta
+    def _expand(self, model, beta):
+        if self.kind == 'bhhh':
+            S = model.scores(beta)
+            return model.loglik(beta), model.gradient(beta), S.T @ S
+        A = -model.hessian(beta)
+        return model.loglik(beta), model.gradient(beta), A
+
+    # Newton steps with step halving on Q(beta) + ll of the model
+    def _newton(self, model, beta, maxiter):
+        prior = None if self.info is None else \
+            (self.beta, self.ll, self.grad, self.info)
+        fit = newton_raphson(model, beta, maxiter=maxiter, tol=self.tol,
+                             info=self.kind, prior=prior)
+        return fit['beta'], fit['niter'], fit['converged']
+
+    def update(self, yobs, xobs, nsteps=3):
+        '''
+        ------------------------------------------------------------------------
+        Absorb a batch of observations with at most nsteps Newton steps (to
+        convergence for the first batch), and return the results as a
+        dictionary (see results()) with the entries niter and converged of
+        the update.
+        ------------------------------------------------------------------------
+        '''
+        model = ProbitModel(yobs, xobs)
+        first = self.beta is None
+        beta = np.zeros(model.nparams) if first else self.beta
+        beta, niter, converged = self._newton(
+            model, beta, self.maxiter if first else nsteps)
+
+        # Add the expansion of the batch at the new estimate to Q
+        ll_b, g_b, A_b = self._expand(model, beta)
+        if first:
+            self.ll, self.grad, self.info = ll_b, g_b, A_b
+        else:
+            d = beta - self.beta
+            self.ll += ll_b + self.grad @ d - 0.5*d @ self.info @ d
+            self.grad = self.grad - self.info @ d + g_b
+            self.info = self.info + A_b
+        self.beta = beta
+        self.npasses += model.nevals
+        self.nobs += model.yobs.size
+        self.nbatches += 1
+
+        if self.keep is not None:
+            dtype = np.float32 if self.keep == 'float32' else np.float64
+            self._data.append((model.yobs.astype(np.int8),
+                               np.asarray(xobs, dtype=dtype)))
+            if self.refit_every and self.nbatches % self.refit_every == 0:
+                return self.refit()
+        return dict(self.results(), niter=niter, converged=converged)
+
+    def refit(self):
+        '''
+        ------------------------------------------------------------------------
+        Exact re-estimation on all the stored batches (requires keep),
+        warm-started at the current estimates, with Newton-Raphson to
+        convergence; Q is rebuilt from the full-sample expansion.
+        ------------------------------------------------------------------------
+        '''
+        if not self._data:
+            raise ValueError('refit requires the batches to be kept '
+                             "(keep='float64' or 'float32')")
+        yobs = np.concatenate([y for y, _ in self._data])
+        xobs = np.concatenate([x for _, x in self._data])
+        model = ProbitModel(yobs, xobs, dtype=xobs.dtype)
+        self.info = None
+        beta, niter, converged = self._newton(model, self.beta, self.maxiter)
+        self.ll, self.grad, self.info = self._expand(model, beta)
+        self.beta = beta
+        self.npasses += model.nevals
+        return dict(self.results(), niter=niter, converged=converged)
+
+    def results(self):
+        # Estimates, variance-covariance matrix (inverse of the accumulated
+        # information) and standard errors
+        vcov = np.linalg.inv(self.info)
+        return {
+            'beta': self.beta.copy(),
+            'll': self.ll,
+            'vcov': vcov,
+            'se': np.sqrt(np.diag(vcov)),
+            'nobs': self.nobs,
+            'nbatches': self.nbatches,
+        }
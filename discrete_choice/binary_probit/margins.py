@@ -0,0 +1,250 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy import stats
+from scipy.special import expit
+
+from mixed_precision import xdot, xtdot
+
+
+# Links of the binary index models: cdf F, density f = F' and its derivative
+# f', as functions of the index z
+def _logit_pdf(z):
+    p = expit(z)
+    return p*(1 - p)
+
+
+LINKS = {
+    'probit': (stats.norm.cdf, stats.norm.pdf,
+               lambda z: -z*stats.norm.pdf(z)),
+    'logit': (expit, _logit_pdf,
+              lambda z: _logit_pdf(z)*(1 - 2*expit(z))),
+}
+
+
+# Blocks of rows of xobs: slices of an array (also np.memmap or
+# scipy.sparse), or the items of an iterable of blocks (for instance
+# pd.read_csv(..., chunksize=...) converted to arrays)
+def _blocks(xobs, chunk):
+    if hasattr(xobs, 'shape'):
+        for lo in range(0, xobs.shape[0], chunk):
+            yield xobs[lo:lo + chunk]
+    else:
+        for block in xobs:
+            yield block
+
+
+def _rows_dot(X, v):
+    # X @ v in float64 for a float32 block, or (for sparse blocks) a vector
+    return np.asarray(xdot(X, v)).ravel()
+
+
+def margins(beta, vcov, xobs, link='probit', continuous=None, discrete=None,
+            chunk=2**16):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Average predicted probability, average marginal effects and
+    marginal effects at the means of a binary probit or logit model, with
+    delta-method standard errors, in one pass over the data by blocks of
+    rows.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    With z = x'beta, the marginal effect of a continuous variable j is
+    f(z) beta_j, and that of a binary variable j the discrete change
+    F(z | x_j = 1) - F(z | x_j = 0). The Jacobians of the averages with
+    respect to beta are analytic:
+    - continuous: (1/n) sum [f(z) e_j + beta_j f'(z) x],
+    - binary: (1/n) sum [f(z1) x1 - f(z0) x0], with x1 (x0) equal to x with
+      x_j = 1 (0) and z1 (z0) the corresponding index,
+    so that only a few sums are accumulated over the blocks (sum x,
+    sum f(z) x, sum f'(z) x and, for each binary variable, sum f(z1) x and
+    sum f(z0) x): memory does not depend on n. The standard errors are
+    sqrt(diag(J vcov J')).
+
+    INPUT:
+    - beta       <- (k,) estimated coefficients.
+    - vcov       <- (k, k) variance-covariance matrix of the estimates.
+    - xobs       <- (n, k) matrix of explanatory variables (dense, np.memmap,
+                    scipy.sparse or float32, as in the likelihood functions),
+                    or an iterable of (m, k) blocks of rows.
+    - link       <- 'probit' or 'logit'.
+    - continuous <- indices of the continuous variables (default: all
+                    columns not in discrete).
+    - discrete   <- indices of the binary (0/1) variables.
+    - chunk      <- number of rows per block.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- n         : number of observations.
+        -- variables : indices of the variables: continuous, then discrete.
+        -- pred      : average predicted probability.
+        -- pred_se   : standard error of pred.
+        -- ame       : average marginal effects of the variables.
+        -- ame_se    : standard errors of ame.
+        -- ame_jac   : Jacobian of ame with respect to beta.
+        -- xbar      : (k,) means of the explanatory variables.
+        -- mem       : marginal effects at the means.
+        -- mem_se    : standard errors of mem.
+        -- mem_jac   : Jacobian of mem with respect to beta.
+    ----------------------------------------------------------------------------
+    '''
+
+    beta = np.asarray(beta, dtype=float)
+    vcov = np.asarray(vcov, dtype=float)
+    F, f, df = LINKS[link]
+    k = beta.size
+    discrete = [] if discrete is None else list(discrete)
+    if continuous is None:
+        continuous = [j for j in range(k) if j not in discrete]
+    continuous = list(continuous)
+    nd = len(discrete)
+
+    # Accumulators
+    n = 0
+    sx = np.zeros(k)             # sum x
+    sF = 0.0                     # sum F(z)
+    sf = 0.0                     # sum f(z)
+    sfx = np.zeros(k)            # sum f(z) x
+    sdfx = np.zeros(k)           # sum f'(z) x
+    sdF = np.zeros(nd)           # sum F(z1) - F(z0)
+    sf1x = np.zeros((nd, k))     # sum f(z1) x
+    sf0x = np.zeros((nd, k))     # sum f(z0) x
+    sf1 = np.zeros(nd)           # sum f(z1) (1 - x_j)
+    sf0 = np.zeros(nd)           # sum f(z0) x_j
+
+    for X in _blocks(xobs, chunk):
+        if not sp.issparse(X):
+            X = np.asarray(X)
+            if X.dtype != np.float32:
+                X = X.astype(np.float64, copy=False)
+        z = _rows_dot(X, beta)
+        fz = f(z)
+        n += z.size
+        sx += xtdot(X, np.ones(z.size))
+        sF += F(z).sum()
+        sf += fz.sum()
+        sfx += xtdot(X, fz)
+        sdfx += xtdot(X, df(z))
+        for d, j in enumerate(discrete):
+            xj = np.asarray(X[:, [j]].todense() if sp.issparse(X)
+                            else X[:, j], dtype=float).ravel()
+            z1 = z + beta[j]*(1 - xj)
+            z0 = z - beta[j]*xj
+            f1, f0 = f(z1), f(z0)
+            sdF[d] += (F(z1) - F(z0)).sum()
+            sf1x[d] += xtdot(X, f1)
+            sf0x[d] += xtdot(X, f0)
+            sf1[d] += (f1*(1 - xj)).sum()
+            sf0[d] += (f0*xj).sum()
+
+    # Average predicted probability
+    pred = sF/n
+    pred_jac = sfx/n
+    pred_se = np.sqrt(pred_jac @ vcov @ pred_jac)
+
+    # Average marginal effects: x1 = x + (1 - x_j) e_j and x0 = x - x_j e_j
+    ame = []
+    ame_jac = []
+    for j in continuous:
+        e = np.zeros(k)
+        e[j] = 1
+        ame.append(beta[j]*sf/n)
+        ame_jac.append((sf*e + beta[j]*sdfx)/n)
+    for d, j in enumerate(discrete):
+        jac = sf1x[d] - sf0x[d]
+        jac[j] += sf1[d] + sf0[d]
+        ame.append(sdF[d]/n)
+        ame_jac.append(jac/n)
+    ame = np.array(ame)
+    ame_jac = np.array(ame_jac).reshape(len(ame), k)
+
+    # Marginal effects at the means
+    xbar = sx/n
+    zbar = xbar @ beta
+    mem = []
+    mem_jac = []
+    for j in continuous:
+        e = np.zeros(k)
+        e[j] = 1
+        mem.append(f(zbar)*beta[j])
+        mem_jac.append(f(zbar)*e + beta[j]*df(zbar)*xbar)
+    for j in discrete:
+        x1, x0 = xbar.copy(), xbar.copy()
+        x1[j], x0[j] = 1, 0
+        mem.append(F(x1 @ beta) - F(x0 @ beta))
+        mem_jac.append(f(x1 @ beta)*x1 - f(x0 @ beta)*x0)
+    mem = np.array(mem)
+    mem_jac = np.array(mem_jac).reshape(len(mem), k)
+
+    return {
+        'n': n,
+        'variables': continuous + discrete,
+        'pred': pred,
+        'pred_se': pred_se,
+        'ame': ame,
+        'ame_se': np.sqrt(np.diag(ame_jac @ vcov @ ame_jac.T)),
+        'ame_jac': ame_jac,
+        'xbar': xbar,
+        'mem': mem,
+        'mem_se': np.sqrt(np.diag(mem_jac @ vcov @ mem_jac.T)),
+        'mem_jac': mem_jac,
+    }
+
+
+def predict(beta, xobs, vcov=None, link='probit', chunk=2**16, out=None):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Predicted probabilities F(x'beta) of a binary probit or logit
+    model and their delta-method standard errors f(x'beta) sqrt(x' vcov x),
+    by blocks of rows.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    INPUT:
+    - beta  <- (k,) estimated coefficients.
+    - xobs  <- (n, k) matrix of explanatory variables, or an iterable of
+               blocks of rows (see margins).
+    - vcov  <- (k, k) variance-covariance matrix (None: no standard errors).
+    - link  <- 'probit' or 'logit'.
+    - chunk <- number of rows per block.
+    - out   <- dictionary with preallocated (n,) arrays 'p' and, with vcov,
+               'se' (for instance np.lib.format.open_memmap arrays, so that
+               the predictions are written to disk); allocated if None,
+               which requires n to be known (xobs an array).
+
+    OUTPUT:
+    - out <- dictionary with the entries p (predicted probabilities) and, if
+             vcov is given, se (their standard errors).
+    ----------------------------------------------------------------------------
+    '''
+
+    beta = np.asarray(beta, dtype=float)
+    F, f, _ = LINKS[link]
+    if out is None:
+        out = {'p': np.empty(xobs.shape[0])}
+        if vcov is not None:
+            out['se'] = np.empty(xobs.shape[0])
+
+    lo = 0
+    for X in _blocks(xobs, chunk):
+        if not sp.issparse(X):
+            X = np.asarray(X)
+            if X.dtype != np.float32:
+                X = X.astype(np.float64, copy=False)
+        z = _rows_dot(X, beta)
+        hi = lo + z.size
+        out['p'][lo:hi] = F(z)
+        if vcov is not None:
+            # Quadratic forms x' vcov x of the rows of the block
+            XV = np.asarray(X @ np.asarray(vcov, dtype=float))
+            if sp.issparse(X):
+                q = np.asarray(X.multiply(XV).sum(axis=1)).ravel()
+            else:
+                q = np.einsum('ij,ij->i', XV, X)
+            out['se'][lo:hi] = f(z)*np.sqrt(np.maximum(q, 0))
+        lo = hi
+    return out
@@ -0,0 +1,114 @@
+import numpy as np
+import scipy.sparse as sp
+
+# Rows per block of the float64 accumulations
+BLOCK = 2**14
+
+
+def xdot(X, beta):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Linear index X @ beta. If X is stored in float32 (dense or
+    scipy.sparse), the product is computed in float32, without converting X
+    to float64, and the result is returned in float64.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    INPUT:
+    - X    <- (n, k) matrix of explanatory variables.
+    - beta <- (k,) or (k, m) parameters.
+
+    OUTPUT:
+    - z <- (n,) or (n, m) linear index in float64.
+    ----------------------------------------------------------------------------
+    '''
+
+    if X.dtype == np.float32:
+        return np.asarray(X @ np.asarray(beta, dtype=np.float32),
+                          dtype=np.float64)
+    return X @ beta
+
+
+def kahan_add(s, c, x):
+    # Add x to the running sum s with compensation c (Kahan summation)
+    y = x - c
+    t = s + y
+    return t, (t - s) - y
+
+
+def xtdot(X, F, block=BLOCK):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Product X' F of a float32 matrix of explanatory variables and
+    float64 weights, accumulated in float64.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    The rows of X are processed in blocks: each block is converted to float64
+    (a copy that fits in the cache), its product is computed in float64, and
+    the partial products of the blocks are added with Kahan compensation.
+    Memory traffic is that of the float32 data, and the accuracy that of a
+    float64 product. For a float64 X, it is the plain product.
+
+    INPUT:
+    - X     <- (n, k) matrix of explanatory variables (dense or scipy.sparse).
+    - F     <- (n,) or (n, m) weights.
+    - block <- number of rows per block.
+
+    OUTPUT:
+    - g <- (k,) or (k, m) product in float64.
+    ----------------------------------------------------------------------------
+    '''
+
+    if X.dtype != np.float32:
+        return np.asarray(X.T @ F)
+    F = np.asarray(F, dtype=np.float64)
+    s = np.zeros((X.shape[1],) + F.shape[1:])
+    c = np.zeros_like(s)
+    for lo in range(0, X.shape[0], block):
+        Xb = X[lo:lo + block].astype(np.float64)
+        s, c = kahan_add(s, c, np.asarray(Xb.T @ F[lo:lo + block]))
+    return s
+
+
+def xtwx(X, w, block=BLOCK):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Weighted cross-product X' diag(w) X, accumulated in float64 by
+    blocks of rows as in xtdot.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    INPUT:
+    - X     <- (n, k) matrix of explanatory variables (dense or scipy.sparse).
+    - w     <- (n,) weights.
+    - block <- number of rows per block.
+
+    OUTPUT:
+    - H <- (k, k) cross-product in float64 (scipy.sparse if X is sparse).
+    ----------------------------------------------------------------------------
+    '''
+
+    if X.dtype != np.float32:
+        if sp.issparse(X):
+            return X.T @ X.multiply(w[:, None])
+        return (X*w[:, None]).T @ X
+    if sp.issparse(X):
+        # Sparse blocks: exact float64 products, summed without compensation
+        H = sp.csr_matrix((X.shape[1], X.shape[1]))
+        for lo in range(0, X.shape[0], block):
+            Xb = X[lo:lo + block].astype(np.float64)
+            H = H + Xb.T @ Xb.multiply(w[lo:lo + block, None])
+        return sp.csr_matrix(H)
+    s = np.zeros((X.shape[1], X.shape[1]))
+    c = np.zeros_like(s)
+    for lo in range(0, X.shape[0], block):
+        Xb = X[lo:lo + block].astype(np.float64)
+        s, c = kahan_add(s, c, (Xb*w[lo:lo + block, None]).T @ Xb)
+    return s
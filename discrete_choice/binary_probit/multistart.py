@@ -0,0 +1,267 @@
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import minimize
+from scipy.stats import qmc
+
+from bhhh import bhhh
+
+# Model of each worker process, sent once when the pool is started
+_MODEL = None
+
+
+def _init_worker(model):
+    global _MODEL
+    _MODEL = model
+
+
+def _worker_step(args):
+    return multistart_step(_MODEL, *args)
+
+
+def multistart_step(model, method, beta, maxiter, tol):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Advance the local search from beta by at most maxiter
+    iterations of BHHH or L-BFGS-B.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    INPUT:
+    - model   <- likelihood model of choice_models.py.
+    - method  <- 'bhhh' or 'lbfgsb'.
+    - beta    <- (p,) current parameter vector.
+    - maxiter <- maximum number of iterations.
+    - tol     <- tolerance for the infinity norm of the gradient.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- beta      : (p,) parameter vector after the iterations.
+        -- ll        : log-likelihood at beta.
+        -- niter     : number of iterations performed.
+        -- converged : boolean indicating if convergence was achieved.
+        -- done      : False if the search stopped at maxiter and can go on.
+        -- nevals    : number of passes over the data.
+    ----------------------------------------------------------------------------
+    '''
+
+    nevals = model.nevals
+    if method == 'bhhh':
+        res = bhhh(model.loglik_and_scores, beta, None, None, maxiter, tol, 1.0,
+                   False)
+        beta, ll, niter = res['beta'], res['ll'], res['niter']
+        converged = res['converged']
+        # Stopped before maxiter without convergence: failed line search
+        done = converged or niter < maxiter
+    else:
+        # Only the gradient criterion of bhhh stops the search (ftol = 0:
+        # the relative reduction of the objective can be tiny far from the
+        # optimum of a badly scaled likelihood)
+        res = minimize(model.negloglik, beta, jac=model.negloglik_grad,
+                       method='L-BFGS-B',
+                       options={'maxiter': maxiter, 'gtol': tol, 'ftol': 0.0})
+        beta, ll, niter = res.x, -res.fun, res.nit
+        converged = np.max(np.abs(model.gradient(beta))) < tol
+        done = converged or res.status != 1
+    return {
+        'beta': np.asarray(beta, dtype=float),
+        'll': float(ll),
+        'niter': int(niter),
+        'converged': bool(converged),
+        'done': bool(done),
+        'nevals': model.nevals - nevals,
+    }
+
+
+# Index of the optimum in optima within xtol of beta (distances relative to
+# the width of the bounds), or None
+def _match(optima, beta, width, xtol):
+    for j, opt in enumerate(optima):
+        if np.max(np.abs(beta - opt['beta'])/width) < xtol:
+            return j
+    return None
+
+
+def multistart(model, bounds, nstart=16, nsample=None, method='lbfgsb',
+               sampling='sobol', seed=None, stage=20, maxiter=1000, tol=1e-6,
+               gap=100.0, xtol=1e-3, workers=1, batch=64, verbose=False):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Multi-start maximum likelihood estimation: local searches with
+    BHHH or L-BFGS-B from quasi-random starting points inside bounds.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    nsample starting points are drawn from a scrambled Sobol sequence or a
+    Latin hypercube inside the bounds, the log-likelihood is evaluated at all
+    of them at once (one pass over the data for a batch of points), and the
+    local searches start from the nstart best. The searches are advanced in
+    stages of at most 'stage' iterations, one search per task in a process
+    pool if workers > 1. After each stage:
+    - a converged search is assigned to a known optimum if it lies within
+      xtol of it (in units of the width of the bounds), or starts a new one;
+    - a search that has not converged is cancelled if it is already within
+      xtol of a known optimum (it would converge there) or if its
+      log-likelihood is more than gap below the best optimum found.
+    L-BFGS-B is restarted at each stage, which discards its curvature
+    estimates; BHHH keeps no memory across iterations.
+
+    INPUT:
+    - model    <- likelihood model of choice_models.py.
+    - bounds   <- (p, 2) lower and upper bounds of the starting points (the
+                  local searches are not bounded).
+    - nstart   <- number of local searches.
+    - nsample  <- number of points drawn and screened (default nstart).
+    - method   <- 'lbfgsb' or 'bhhh'.
+    - sampling <- 'sobol' or 'lhs'.
+    - seed     <- seed of the scrambling of the starting points.
+    - stage    <- iterations of each search between cancellation checks.
+    - maxiter  <- maximum number of iterations of each search.
+    - tol      <- tolerance for the infinity norm of the gradient.
+    - gap      <- log-likelihood gap to the best optimum above which a search
+                  is cancelled.
+    - xtol     <- tolerance for two parameter vectors to be the same optimum.
+    - workers  <- number of worker processes (1: no pool).
+    - batch    <- number of points screened in one pass over the data.
+    - verbose  <- if True, print a summary after each stage.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- beta    : (p,) best parameter vector.
+        -- ll      : log-likelihood at beta.
+        -- converged : True if beta is an optimum to which a search converged
+                     (False if no search converged: beta is then the best
+                     last iterate).
+        -- basins  : list of the distinct optima, from best to worst, each a
+                     dictionary with the entries beta, ll, nconverged (number
+                     of searches that converged to it), nduplicate (number of
+                     searches cancelled on their way to it) and share (of all
+                     searches).
+        -- starts  : (nstart, p) starting points.
+        -- status  : (nstart,) outcome of each search: 'converged',
+                     'duplicate', 'hopeless' or 'failed'.
+        -- basin   : (nstart,) index in basins of the optimum of each search
+                     (-1 if none).
+        -- niter   : (nstart,) number of iterations of each search.
+        -- nevals  : number of passes over the data.
+        -- time    : wall time (seconds).
+    ----------------------------------------------------------------------------
+    '''
+
+    t0 = time.perf_counter()
+    bounds = np.asarray(bounds, dtype=float)
+    lo, hi = bounds[:, 0], bounds[:, 1]
+    width = hi - lo
+    p = lo.size
+    nsample = nstart if nsample is None else max(nsample, nstart)
+    nevals = model.nevals
+
+    # Starting points (the first 2^m Sobol points, for their balance)
+    rng = np.random.default_rng(seed)
+    if sampling == 'sobol':
+        m = int(np.ceil(np.log2(nsample)))
+        u = qmc.Sobol(p, rng=rng).random_base2(m)[:nsample]
+    else:
+        u = qmc.LatinHypercube(p, rng=rng).random(nsample)
+    points = qmc.scale(u, lo, hi)
+
+    # Screening: log-likelihood at all points, by batches of points
+    ll0 = np.concatenate([model.loglik_points(points[i:i + batch].T)
+                          for i in range(0, nsample, batch)])
+    ll0 = np.where(np.isfinite(ll0), ll0, -np.inf)
+    keep = np.argsort(-ll0, kind='stable')[:nstart]
+    starts = points[keep]
+    nevals = model.nevals - nevals
+
+    beta = starts.copy()
+    ll = ll0[keep].copy()
+    niter = np.zeros(nstart, dtype=int)
+    status = np.array(['active']*nstart, dtype=object)
+    basin = np.full(nstart, -1)
+    optima = []
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_init_worker,
+                                   initargs=(model,))
+    try:
+        while np.any(status == 'active'):
+            act = np.flatnonzero(status == 'active')
+            tasks = [(method, beta[i], min(stage, maxiter - niter[i]), tol)
+                     for i in act]
+            if pool is None:
+                outs = [multistart_step(model, *task) for task in tasks]
+            else:
+                outs = list(pool.map(_worker_step, tasks))
+
+            for i, out in zip(act, outs):
+                beta[i] = out['beta']
+                ll[i] = out['ll']
+                niter[i] += out['niter']
+                nevals += out['nevals']
+                if out['done'] or niter[i] >= maxiter:
+                    status[i] = 'converged' if out['converged'] else 'failed'
+                if status[i] != 'converged':
+                    continue
+                j = _match(optima, beta[i], width, xtol)
+                if j is None:
+                    optima.append({'beta': beta[i].copy(), 'll': ll[i],
+                                   'nconverged': 0, 'nduplicate': 0})
+                    j = len(optima) - 1
+                elif ll[i] > optima[j]['ll']:
+                    optima[j]['beta'], optima[j]['ll'] = beta[i].copy(), ll[i]
+                optima[j]['nconverged'] += 1
+                basin[i] = j
+
+            # Cancellation of the searches that cannot find a new optimum
+            if optima:
+                llbest = max(opt['ll'] for opt in optima)
+                for i in np.flatnonzero(status == 'active'):
+                    j = _match(optima, beta[i], width, xtol)
+                    if j is not None:
+                        status[i] = 'duplicate'
+                        optima[j]['nduplicate'] += 1
+                        basin[i] = j
+                    elif ll[i] < llbest - gap:
+                        status[i] = 'hopeless'
+
+            if verbose:
+                print(f"Stage: {np.sum(status == 'active'):4d} active, "
+                      f"{len(optima):3d} optima, best ll = {np.max(ll): .6f}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Optima from best to worst
+    order = sorted(range(len(optima)), key=lambda j: -optima[j]['ll'])
+    rank = np.full(len(optima) + 1, -1)
+    rank[order] = np.arange(len(optima))
+    basins = []
+    for j in order:
+        opt = optima[j]
+        opt['share'] = (opt['nconverged'] + opt['nduplicate'])/nstart
+        basins.append(opt)
+    basin = rank[basin]
+
+    if basins:
+        best_beta, best_ll = basins[0]['beta'], basins[0]['ll']
+    else:
+        best_beta, best_ll = beta[np.argmax(ll)], np.max(ll)
+
+    return {
+        'beta': best_beta,
+        'll': best_ll,
+        'converged': bool(basins),
+        'basins': basins,
+        'starts': starts,
+        'status': status.astype(str),
+        'basin': basin,
+        'niter': niter,
+        'nevals': nevals,
+        'time': time.perf_counter() - t0,
+    }
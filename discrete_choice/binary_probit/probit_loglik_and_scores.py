@@ -1,6 +1,9 @@
 import numpy as np
+import scipy.sparse as sp
 from scipy import stats
 
+from mixed_precision import xdot
+
 def probit_loglik_and_scores(beta, yobs, xobs):
     '''
     ----------------------------------------------------------------------------
@@ -14,24 +17,29 @@ def probit_loglik_and_scores(beta, yobs, xobs):
     INPUT:
     - beta  <- (k,) vector of parameters.
     - yobs  <- (n,) vector of observations of the dependent variable.
-    - xobs  <- (n, k) matrix of explanatory variables.
+    - xobs  <- (n, k) matrix of explanatory variables (dense or
+               scipy.sparse). If it is float32, the index is computed in
+               float32 and everything else in float64.
 
     OUTPUT:
     - ll_i  <- (n,) vector of per-observation log-likelihoods.
-    - scores <- (n, k) matrix of per-observation scores.
+    - scores <- (n, k) matrix of per-observation scores (CSR if xobs is
+                sparse).
     ----------------------------------------------------------------------------
     '''
 
     # Convert inputs to numpy arrays. yobs is flattened to a 1-D array, X 
-    # becomes an (n, k) matrix, beta is a (k,) vector
+    # becomes an (n, k) matrix (kept sparse if it is), beta is a (k,) vector
     beta = np.asarray(beta)
     y = np.asarray(yobs).ravel()
-    X = np.asarray(xobs)
+    X = sp.csr_matrix(xobs) if sp.issparse(xobs) else np.asarray(xobs)
+    if X.dtype != np.float32:
+        X = X.astype(np.float64, copy=False)
 
     # Conditional choice probabilities. z has shape (n,), Phi is the probit
     # probability and phi is the standard normal density at z, needed for the
     # scores
-    z = X @ beta
+    z = xdot(X, beta)
     Phi = stats.norm.cdf(z)
     phi = stats.norm.pdf(z)
 
@@ -49,6 +57,9 @@ def probit_loglik_and_scores(beta, yobs, xobs):
     # Each row i: s_i(beta) = score_factor[i] * x_i' (shape (n, k)). This is
     # to convert the scalar derivative into a gradient with respect to each
     # parameter in beta. Multiplying by X produces an (n, k) matrix of scores
-    scores = score_factor[:, None] * X
+    if sp.issparse(X):
+        scores = X.multiply(score_factor[:, None]).tocsr()
+    else:
+        scores = score_factor[:, None] * X
 
     return ll_i, scores
\ No newline at end of file
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+import scipy.sparse as sp
+
+# Files of a store: the arrays of all fits, one after the other, and one
+# line of metadata per fit
+DATA = 'arrays.bin'
+INDEX = 'index.jsonl'
+
+
+def fingerprint(*arrays):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Fingerprint of the data of an estimation: SHA-256 of the
+    shapes, types and contents of the arrays (truncated to 16 hexadecimal
+    digits), so that the fits on the same data can be found in a store.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    INPUT:
+    - arrays <- arrays of the data (dense or scipy.sparse), e.g. yobs, xobs.
+
+    OUTPUT:
+    - digest <- fingerprint (string).
+    ----------------------------------------------------------------------------
+    '''
+
+    h = hashlib.sha256()
+    for a in arrays:
+        if sp.issparse(a):
+            a = sp.csr_matrix(a)
+            parts = (a.data, a.indices, a.indptr)
+        else:
+            parts = (np.asarray(a),)
+        h.update(repr(a.shape).encode())
+        for p in parts:
+            p = np.ascontiguousarray(p)
+            h.update(p.dtype.str.encode())
+            h.update(p.tobytes())
+    return h.hexdigest()[:16]
+
+
+class ResultsStore:
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Store of estimation results on disk, so that estimates, variance-
+    covariance matrices and iteration traces can be reported without
+    re-running the estimations or parsing printed output.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    A store is a directory with two files: arrays.bin, to which the arrays
+    of each fit are appended in binary form (8-byte aligned), and
+    index.jsonl, with one line per fit holding its scalar results
+    (log-likelihood, iterations, convergence, ...), the fingerprint of the
+    data, user metadata and the offset, type and shape of each of its
+    arrays. The index is read once (it is small: thousands of fits take a
+    few hundred kilobytes), queries are run on it without touching the
+    arrays, and the arrays of a fit are returned as read-only np.memmap views
+    of arrays.bin, so that nothing is read from disk until used. Appending
+    never rewrites earlier fits.
+
+    ATTRIBUTES:
+    - path    <- directory of the store.
+    - entries <- list of the index entries (dictionaries), in order of
+                 storage.
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.entries = []
+        index = os.path.join(path, INDEX)
+        if os.path.exists(index):
+            with open(index) as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self, results, name=None, data=None, trace=None, **meta):
+        '''
+        ------------------------------------------------------------------------
+        Append a fit to the store and return its id. The numeric arrays of
+        results (a dictionary as returned by bhhh, bprobit_nr, multistart,
+        ..., or a scipy.optimize.OptimizeResult) are stored as arrays, its
+        numbers, booleans and strings in the index; other entries are
+        skipped. data is a tuple of data arrays to fingerprint (or a
+        fingerprint), trace a dictionary of iteration histories (e.g. the
+        history dictionary of bprobit_llike), stored as arrays 'trace/...',
+        and meta any other JSON-serializable metadata (model, sample, ...).
+        ------------------------------------------------------------------------
+        '''
+        arrays = {}
+        scalars = {}
+        items = list(dict(results).items())
+        if trace is not None:
+            items += [('trace/' + key, value) for key, value in trace.items()]
+        for key, value in items:
+            if isinstance(value, (bool, np.bool_, int, float, str,
+                                  np.integer, np.floating)):
+                scalars[key] = value.item() if hasattr(value, 'item') else value
+                continue
+            if sp.issparse(value):
+                value = value.toarray()
+            try:
+                value = np.asarray(value)
+            except (ValueError, TypeError):
+                continue
+            if value.dtype.kind in 'biuf' and value.ndim == 0:
+                scalars[key] = value.item()
+            elif value.dtype.kind in 'biuf' and value.size > 0:
+                arrays[key] = value
+            elif value.dtype.kind in 'U' and value.ndim == 1:
+                scalars[key] = value.tolist()
+
+        if isinstance(data, tuple):
+            data = fingerprint(*data)
+        entry = {'id': len(self.entries), 'name': name,
+                 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                 'data': data, 'meta': meta, 'results': scalars,
+                 'arrays': {}}
+
+        # Arrays, appended at 8-byte aligned offsets
+        with open(os.path.join(self.path, DATA), 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            for key, value in arrays.items():
+                pad = -offset % 8
+                f.write(b'\0'*pad)
+                offset += pad
+                value = np.ascontiguousarray(value)
+                f.write(value.tobytes())
+                entry['arrays'][key] = {'offset': offset,
+                                        'dtype': value.dtype.str,
+                                        'shape': list(value.shape)}
+                offset += value.nbytes
+
+        with open(os.path.join(self.path, INDEX), 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        self.entries.append(entry)
+        return entry['id']
+
+    def query(self, where=None, **filters):
+        '''
+        ------------------------------------------------------------------------
+        Index entries of the fits that match all the filters: name, data or
+        id, a scalar result (e.g. converged=True) or a metadata entry; where
+        is an optional function of the entry returning True for the fits to
+        keep. Nothing is read from arrays.bin.
+        ------------------------------------------------------------------------
+        '''
+        out = []
+        for entry in self.entries:
+            ok = True
+            for key, value in filters.items():
+                if key in entry and key not in ('meta', 'results', 'arrays'):
+                    found = entry[key]
+                elif key in entry['results']:
+                    found = entry['results'][key]
+                else:
+                    found = entry['meta'].get(key)
+                if found != value:
+                    ok = False
+                    break
+            if ok and (where is None or where(entry)):
+                out.append(entry)
+        return out
+
+    def load(self, fit, keys=None):
+        '''
+        ------------------------------------------------------------------------
+        Results of a fit (id or index entry) as a dictionary with the scalar
+        results and its arrays (all, or those in keys) as read-only
+        np.memmap views, plus the entries name, data, meta and id.
+        ------------------------------------------------------------------------
+        '''
+        entry = self.entries[fit] if not isinstance(fit, dict) else fit
+        out = dict(entry['results'])
+        filename = os.path.join(self.path, DATA)
+        for key, spec in entry['arrays'].items():
+            if keys is not None and key not in keys:
+                continue
+            out[key] = np.memmap(filename, dtype=spec['dtype'], mode='r',
+                                 offset=spec['offset'],
+                                 shape=tuple(spec['shape']))
+        out.update({'id': entry['id'], 'name': entry['name'],
+                    'data': entry['data'], 'meta': entry['meta']})
+        return out
+
+    def table(self, key='beta', fits=None):
+        # (nfits, p) array of one array entry (e.g. the estimates) of the fits
+        # (default: all that have it), for comparisons across fits
+        fits = self.query(where=lambda e: key in e['arrays']) if fits is None \
+            else fits
+        return np.array([self.load(e, keys=[key])[key] for e in fits])
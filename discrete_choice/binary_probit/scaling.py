@@ -0,0 +1,158 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+def scale_regressors(xobs, center=True):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Standardize the columns of the matrix of explanatory variables,
+    so that the optimizers work in well-scaled coordinates.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    Each non-constant column j is replaced by (x_j - m_j)/s_j, with m_j its
+    mean and s_j its standard deviation, if center is True, xobs is dense and
+    it has a constant column, which absorbs the means. Otherwise, it is
+    divided by its root mean square (this keeps a sparse matrix sparse). The
+    index is unchanged, x'beta = xs'(T beta), for the (k, k) matrix
+
+        T = diag(s) + e_c (m/x_c)',
+
+    where c is the constant column and x_c its value (T is diagonal without
+    centering). The coefficients, their variance-covariance matrix and the
+    bounds of a search are transformed with scale_beta, unscale_results and
+    scale_bounds.
+
+    INPUT:
+    - xobs   <- (n, k) matrix of explanatory variables (dense or
+                scipy.sparse).
+    - center <- if True, center the columns when possible.
+
+    OUTPUT:
+    - xs <- (n, k) standardized matrix, of the same type and dtype as xobs
+            (float64 for integer data).
+    - T  <- (k, k) matrix of the transformation of the coefficients.
+    ----------------------------------------------------------------------------
+    '''
+
+    dtype = xobs.dtype if xobs.dtype == np.float32 else np.float64
+    if sp.issparse(xobs):
+        X = sp.csr_matrix(xobs, dtype=dtype)
+        mean = np.asarray(X.mean(axis=0), dtype=float).ravel()
+        msq = np.asarray(X.multiply(X).mean(axis=0), dtype=float).ravel()
+    else:
+        X = np.asarray(xobs, dtype=dtype)
+        mean = X.mean(axis=0, dtype=float)
+        msq = (X.astype(float)**2).mean(axis=0)
+    std = np.sqrt(np.maximum(msq - mean**2, 0))
+
+    # Constant columns (std zero up to rounding, non-zero mean)
+    const = (std <= 1e-12*np.sqrt(msq)) & (mean != 0)
+    k = mean.size
+    T = np.eye(k)
+    if center and const.any() and not sp.issparse(X):
+        c = np.flatnonzero(const)[0]
+        move = ~const
+        s = np.where(move & (std > 0), std, 1.0)
+        m = np.where(move, mean, 0.0)
+        xs = ((X - m.astype(dtype))/s.astype(dtype)).astype(dtype)
+        T[np.diag_indices(k)] = s
+        T[c] += m/mean[c]
+        return xs, T
+
+    rms = np.sqrt(msq)
+    s = np.where(rms > 0, rms, 1.0)
+    s[const] = 1.0
+    if sp.issparse(X):
+        xs = sp.csr_matrix(X @ sp.diags((1/s).astype(dtype)))
+    else:
+        xs = (X/s.astype(dtype)).astype(dtype)
+    T[np.diag_indices(k)] = s
+    return xs, T
+
+
+# Transformation of all p coefficients: nblocks blocks (one per linear index
+# of a multinomial model), each with the k coefficients of xobs, transformed
+# by T, followed by those of the fixed effects, which are unchanged
+def _full(T, p, nblocks=1):
+    B = np.eye(p//nblocks)
+    B[:T.shape[0], :T.shape[0]] = T
+    return np.kron(np.eye(nblocks), B)
+
+
+def scale_beta(beta, T, nblocks=1):
+    # Coefficients in the standardized coordinates, T beta
+    beta = np.asarray(beta, dtype=float)
+    return _full(T, beta.size, nblocks) @ beta
+
+
+def unscale_results(results, T, nblocks=1):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Transform estimation results from the standardized coordinates
+    of scale_regressors back to the original ones: beta = T^{-1} beta_s,
+    vcov = T^{-1} vcov_s T^{-T}, se = sqrt(diag(vcov)) and the gradient
+    g = T' g_s.
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    INPUT:
+    - results <- dictionary returned by bhhh (entries beta, vcov, se) or
+                 scipy.optimize.OptimizeResult (entries x, jac), estimated
+                 with the standardized regressors.
+    - T       <- (k, k) matrix returned by scale_regressors.
+    - nblocks <- number of linear indices (alternatives but the base of a
+                 multinomial model).
+
+    OUTPUT:
+    - results <- copy of the dictionary with the entries beta, x, vcov, se
+                 and jac (those present) in the original coordinates.
+    ----------------------------------------------------------------------------
+    '''
+
+    out = type(results)(results)
+    key = 'beta' if 'beta' in results else 'x'
+    Tf = _full(T, np.size(results[key]), nblocks)
+    Tinv = np.linalg.inv(Tf)
+    for name in ('beta', 'x'):
+        if name in results:
+            out[name] = Tinv @ np.asarray(results[name], dtype=float)
+    if 'jac' in results:
+        out['jac'] = Tf.T @ np.asarray(results['jac'], dtype=float)
+    if 'vcov' in results:
+        out['vcov'] = Tinv @ np.asarray(results['vcov']) @ Tinv.T
+        out['se'] = np.sqrt(np.diag(out['vcov']))
+    return out
+
+
+def scale_bounds(bounds, T, nblocks=1):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Smallest box in the standardized coordinates that contains the
+    image T beta of a box of coefficients (for the starting points of
+    multistart or the gene space of the genetic algorithm).
+
+    AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin).
+
+    THIS VERSION: October 2026.
+
+    INPUT:
+    - bounds  <- (p, 2) lower and upper bounds of the coefficients.
+    - T       <- (k, k) matrix returned by scale_regressors.
+    - nblocks <- number of linear indices (see unscale_results).
+
+    OUTPUT:
+    - bounds_s <- (p, 2) bounds in the standardized coordinates.
+    ----------------------------------------------------------------------------
+    '''
+
+    bounds = np.asarray(bounds, dtype=float)
+    Tf = _full(T, bounds.shape[0], nblocks)
+    mid = (bounds[:, 0] + bounds[:, 1])/2
+    rad = (bounds[:, 1] - bounds[:, 0])/2
+    mid, rad = Tf @ mid, np.abs(Tf) @ rad
+    return np.column_stack((mid - rad, mid + rad))
@@ -0,0 +1,98 @@
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(1, os.path.join(HERE, '..', '..', 'genetic_algorithm'))
+
+from bprobit_llike import bprobit_llike
+from bprobit_nll import bprobit_nll
+from bprobit_nr import bprobit_nr
+from mixed_precision import kahan_add, xtdot, xtwx
+
+
+@pytest.fixture(scope='module')
+def car_data():
+    auto = pd.read_csv(os.path.join(HERE, 'auto.csv'))
+    # Weight in thousands of pounds: with weight in pounds, rounding of the
+    # float32 index leaves the gradient above any useful tolerance
+    choice = auto['foreign'].to_numpy(dtype=float)
+    regressors = np.column_stack((auto['mpg'].to_numpy(),
+                                  auto['weight'].to_numpy()/1000,
+                                  np.ones(len(choice))))
+    return choice, regressors
+
+
+def test_probit_float32_matches_float64(car_data):
+    # The estimates with float32 regressors must match those in float64 up
+    # to a small fraction of their standard errors (the float32 gradient is
+    # only accurate to about 1e-5)
+    choice, regressors = car_data
+    res64 = bprobit_nr(choice, regressors, np.zeros(3))
+    res32 = bprobit_nr(choice, regressors, np.zeros(3), tol=1e-4,
+                       dtype=np.float32)
+    assert res64['converged'] and res32['converged']
+    dev = np.abs(res32['beta'] - res64['beta'])/res64['se']
+    assert np.max(dev) < 1e-3
+    np.testing.assert_allclose(res32['se'], res64['se'], rtol=1e-3)
+
+
+def test_bprobit_llike_float32_matches_float64(car_data):
+    choice, regressors = car_data
+    beta = bprobit_nr(choice, regressors, np.zeros(3))['beta']
+    info = {'Nfeval': 1, 'nfeval': [], 'fval': [], 'params': []}
+    ll64 = bprobit_llike(beta, choice, regressors, info)
+    ll32 = bprobit_llike(beta, choice, regressors.astype(np.float32), info)
+    assert ll32 == pytest.approx(ll64, rel=1e-5)
+
+
+def test_bprobit_nll_float32_matches_float64(car_data):
+    # Negative log-likelihood of the genetic algorithm example
+    choice, regressors = car_data
+    beta = bprobit_nr(choice, regressors, np.zeros(3))['beta']
+    nll64 = bprobit_nll(beta, choice, regressors)
+    nll32 = bprobit_nll(beta, choice, regressors.astype(np.float32))
+    assert nll32 == pytest.approx(nll64, rel=1e-5)
+
+
+def test_kahan_add_matches_exact_sum():
+    # Running Kahan sum of many terms of mixed magnitude against the exactly
+    # rounded sum (math.fsum)
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(20000)*10.0**rng.integers(-8, 8, 20000)
+    s, c = 0.0, 0.0
+    for xi in x:
+        s, c = kahan_add(s, c, xi)
+    exact = math.fsum(x)
+    assert abs(s - exact) <= 2*np.spacing(np.abs(x).sum())
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_xtdot_matches_float64_product(sparse):
+    # The float32 data are exact in float64, so the blocked product must
+    # match the float64 product of the converted data
+    rng = np.random.default_rng(1)
+    X = (rng.standard_normal((50000, 4))*[1.0, 1e3, 1e-3, 1.0]
+         ).astype(np.float32)
+    X[:, 3] = 1.0
+    F = rng.standard_normal((50000, 2))
+    X64 = X.astype(np.float64)
+    if sparse:
+        X[rng.random(X.shape) < 0.7] = 0.0
+        X64 = X.astype(np.float64)
+        X = sp.csr_matrix(X)
+    expected = X64.T @ F
+    np.testing.assert_allclose(xtdot(X, F, block=4096), expected,
+                               rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(xtdot(X, F[:, 0], block=4096), expected[:, 0],
+                               rtol=1e-12, atol=1e-9)
+    w = rng.random(50000)
+    H = xtwx(X, w, block=4096)
+    H = H.toarray() if sp.issparse(H) else H
+    np.testing.assert_allclose(H, (X64*w[:, None]).T @ X64, rtol=1e-12)
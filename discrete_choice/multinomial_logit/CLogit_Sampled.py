@@ -0,0 +1,90 @@
+#===============================================================================
+# PROGRAM: Estimation of a conditional logit model with sampled choice sets
+#
+# AUTHOR: Manuel V. Montesinos (ROCKWOOL Foundation Berlin)
+#
+# THIS VERSION: October 2026
+#
+# DESCRIPTION: This program simulates long-format data of D decisions among
+# J alternatives with alternative-specific attributes (one row per decision
+# and alternative), and estimates the conditional logit model
+# Pr(j | C_d) = exp(x_dj'beta)/sum_{l in C_d} exp(x_dl'beta) with all the
+# alternatives and with random samples of the non-chosen alternatives
+# (McFadden, 1978): a uniform sample, which needs no correction, and a
+# sample with probabilities proportional to an attribute, with the
+# correction log(k_j/q_j) of the utilities. The likelihood object of
+# choice_models.py computes the log-sum-exp over each choice set with
+# segment reductions over the flat array of rows, so that the cost of the
+# estimation is proportional to the size of the sampled choice sets.
+#===============================================================================
+
+# Import modules
+import os
+import sys
+import time
+import numpy as np
+from scipy.optimize import minimize
+
+# Likelihood objects of the binary probit folder (path relative to this
+# script, not to the working directory)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'binary_probit'))
+from choice_models import ConditionalLogitModel, sample_choice_sets
+
+# Simulate the data: attributes x1 (e.g. price), x2 (e.g. distance) and x3
+# (e.g. size of the alternative), and utilities with type I extreme value
+# errors
+D, J = 2000, 1000
+beta_true = np.array([-1.0, 0.5, 0.8])
+rng = np.random.default_rng(12345)
+group = np.repeat(np.arange(D), J)
+xobs = np.column_stack((rng.normal(size=D*J), rng.normal(size=D*J),
+                        rng.exponential(size=D*J)))
+utility = (xobs @ beta_true + rng.gumbel(size=D*J)).reshape(D, J)
+chosen = np.zeros(D*J)
+chosen[np.arange(D)*J + utility.argmax(axis=1)] = 1
+
+
+# Estimate a conditional logit model by BFGS with the analytic gradient, and
+# return the estimates, standard errors (from the analytic Hessian) and time
+def estimate(chosen, xobs, group, offset=None):
+    t0 = time.perf_counter()
+    model = ConditionalLogitModel(chosen, xobs, group, offset=offset)
+    outmin = minimize(model.negloglik, np.zeros(xobs.shape[1]),
+                      jac=model.negloglik_grad, method='BFGS',
+                      options={'gtol': 1e-6})
+    se = model.se(outmin.x)
+    return outmin.x, se, time.perf_counter() - t0, len(group)
+
+
+def report(label, beta, se, seconds, nrows):
+    print(f"{label} ({nrows} rows, {seconds:.2f} seconds): ")
+    for j in range(beta.size):
+        print(f"x{j + 1}: {beta[j]: .4f} ({se[j]:.4f})")
+    print('')
+
+
+print('')
+print(f"True parameters: {beta_true}")
+print('')
+
+# All the alternatives
+report('Full choice sets', *estimate(chosen, xobs, group))
+
+# Uniform sampling of 20 non-chosen alternatives per decision
+rows, offset = sample_choice_sets(chosen, group, 20, seed=1)
+report('Uniformly sampled choice sets',
+       *estimate(chosen[rows], xobs[rows], group[rows], offset))
+
+# Sampling of 20 alternatives per decision with probabilities proportional
+# to x3 (importance sampling), with the correction of the utilities
+rows, offset = sample_choice_sets(chosen, group, 20, weights=xobs[:, 2],
+                                  seed=1)
+report('Importance-sampled choice sets (corrected)',
+       *estimate(chosen[rows], xobs[rows], group[rows], offset))
+
+# The same sample without the correction: the estimates are biased
+report('Importance-sampled choice sets (not corrected)',
+       *estimate(chosen[rows], xobs[rows], group[rows]))
+print('-----------------------------------------------------------------------')
+print('')
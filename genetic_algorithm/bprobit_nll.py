@@ -13,7 +13,9 @@ def bprobit_nll(betas, yobs, xobs):
     yobs : array-like
         Observed binary outcomes (0 or 1).
     xobs : array-like
-        Matrix of explanatory variables (features).
+        Matrix of explanatory variables (features). If it is a float32 array,
+        the index xobs @ betas is computed in single precision (without a
+        float64 copy of xobs) and the log-likelihood in double precision.
 
     Returns
     -------
@@ -25,8 +27,13 @@ def bprobit_nll(betas, yobs, xobs):
     - Uses the cumulative distribution function (CDF) of the standard normal distribution
       to model the probability of the binary outcome.
     - Applies numerical clipping to probabilities for stability.
+    - The log-likelihood terms are summed in float64 with np.sum, which uses
+      pairwise summation.
     """
-    xb = xobs @ betas
+    if getattr(xobs, 'dtype', None) == np.float32:
+        xb = (xobs @ np.asarray(betas, dtype=np.float32)).astype(np.float64)
+    else:
+        xb = xobs @ betas
 
     # numerical safety: clip away from 0 and 1
     p = stats.norm.cdf(xb)
@@ -9,11 +9,21 @@
 #===============================================================================
 
 # Import modules
+import os
 import numpy as np
 import pandas as pd
 import pygad
+import sys
 from make_fitness import make_fitness
 
+# Standardization of the regressors, shared with the estimators of the binary
+# probit model (paths relative to this script, not to the working directory)
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROBIT_DIR = os.path.join(HERE, '..', 'discrete_choice', 'binary_probit')
+sys.path.append(PROBIT_DIR)
+from scaling import scale_regressors
+from results_store import ResultsStore, fingerprint
+
 print('')
 print('EXAMPLE OF IMPLEMENTATION OF THE GENETIC ALGORITHM FOR OPTIMIZATION')
 print('')
@@ -24,7 +34,7 @@ print('')
 np.random.seed(13)
 
 # Import the data
-auto = pd.read_csv('../discrete_choice/binary_probit/auto.csv')
+auto = pd.read_csv(os.path.join(PROBIT_DIR, 'auto.csv'))
 
 # Organize the data and add a constant
 choice = auto['foreign'].to_numpy()
@@ -33,13 +43,18 @@ weight = auto['weight'].to_numpy()
 constant = np.ones(len(choice))
 regressors = np.column_stack((mpg, weight, constant))
 
+# The genes are the coefficients of the standardized regressors (centered and
+# divided by their standard deviations), which are of order one: the same
+# gene range suits all of them, and they are transformed back at the end
+regressors_s, T = scale_regressors(regressors)
+
 #-------------------------------------------------------------------------------
 
 # Number of parameters to be estimated
 k = regressors.shape[1]
 
 # Prepare PyGAD inputs
-fitness_function = make_fitness(choice, regressors)
+fitness_function = make_fitness(choice, regressors_s)
 
 # Function to print the best solution in each generation
 def on_generation(ga):
@@ -57,7 +72,9 @@ num_parents_mating = 4
 # Number of genes in the solution
 num_genes = k
 
-# Define the gene space to limit the range of each gene (parameter)
+# Define the gene space to limit the range of each gene (parameter). A box
+# for the original coefficients can be converted with
+# scale_bounds(bounds, T)
 gene_space = [{"low": -5.0, "high": 5.0}] * k
 
 # Number of solutions in the population
@@ -97,11 +114,22 @@ ga_instance.run()
 
 # Retrieve the best solution
 best_params, best_fitness, solution_idx = ga_instance.best_solution()
+best_params = np.linalg.solve(T, best_params)
 print("Best params:", best_params)
 print("Best log-likelihood (≈ fitness):", best_fitness)
 print("Best NLL:", -best_fitness)
 
-# Solution obtained
+# Store the solution and the best fitness of each generation in a results
+# store next to this script (same format as the store of the binary probit
+# estimates)
+store = ResultsStore(os.path.join(HERE, 'results_store'))
+store.save({'beta': best_params, 'll': best_fitness},
+           name='genetic_algorithm', data=fingerprint(choice, regressors),
+           trace={'fitness': ga_instance.best_solutions_fitness},
+           model='probit')
+
+# Solution obtained with the original (unstandardized) regressors and the
+# same gene space
 # Best params: [ 2.41247088 -0.02486435  3.37247157]
 # Best log-likelihood (≈ fitness): -234.3797255256226
 # Best NLL: 234.3797255256226
\ No newline at end of file
@@ -0,0 +1,189 @@
+#==============================================================================#
+# PROGRAM: Benchmarks of the solution methods for the cake-eating problem
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+#
+# DESCRIPTION: Runs the solvers of the cake-eating problem on grids of
+# increasing size and for several discount factors, and records for each run
+# the wall time, the number of iterations, the peak memory allocated during
+# the run and the sup-norm errors against the analytical solution of
+# cake_eating_analytic.ipynb. Records are appended to a file as JSON lines,
+# together with the date and the versions of Python and NumPy, so that the
+# performance of the solvers can be tracked over time.
+#
+# The peak memory is measured with tracemalloc, which also tracks NumPy
+# arrays. Since tracing slows down the solvers, it is measured in a second run
+# of each configuration and the wall time in a run without tracing.
+#==============================================================================#
+
+# Import modules
+import json
+import time
+import platform
+import tracemalloc
+import numpy as np
+
+from cake_model import cake_analytic
+from cake_vfi import cake_vfi
+from cake_egm import cake_egm
+
+
+# Analytical solution, timed as a reference
+def cake_analytic_solver(a, beta, gamma):
+    t0 = time.perf_counter()
+    c, V = cake_analytic(a, beta, gamma)
+    return {'c': c, 'V': V, 'niter': 0, 'converged': True,
+            'time': time.perf_counter() - t0, 'err_V': 0.0, 'err_c': 0.0}
+
+
+# Solution methods: name -> (solver(a, beta, gamma), grid). The grid is the
+# uniform grid of cake_eating_analytic.ipynb, or a geometric grid over the
+# same range for the methods that bracket a+ on the grid
+CAKE_METHODS = {
+    'analytic': (cake_analytic_solver, 'uniform'),
+    'vfi': (lambda a, beta, gamma: cake_vfi(a, beta, gamma, howard=0,
+                                            mqp=False), 'uniform'),
+    'mpi': (lambda a, beta, gamma: cake_vfi(a, beta, gamma, howard=50,
+                                            mqp=True), 'uniform'),
+    'pi': (lambda a, beta, gamma: cake_vfi(a, beta, gamma, howard='full'),
+           'uniform'),
+    'mpi_monotone': (lambda a, beta, gamma: cake_vfi(a, beta, gamma,
+                                                     howard=50, mqp=True,
+                                                     maximize='monotone'),
+                     'geometric'),
+    'egm': (lambda a, beta, gamma: cake_egm(a, beta, gamma), 'uniform'),
+}
+
+
+# Grid of NA resources between 1 and 1 + a0
+def cake_benchmark_grid(NA, a0=100, kind='uniform'):
+    if kind == 'geometric':
+        return np.geomspace(1, 1 + a0, NA)
+    return 1 + np.arange(NA)/NA*a0
+
+
+def cake_benchmark_run(method, NA, beta, gamma, memory=True):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Run one solution method once and record its performance.
+
+    INPUT:
+    - method <- name of the method in CAKE_METHODS.
+    - NA     <- number of grid points.
+    - beta   <- time discount factor.
+    - gamma  <- intertemporal elasticity of substitution.
+    - memory <- if True, run the method a second time to measure the peak
+                memory.
+
+    OUTPUT:
+    - record <- dictionary with the entries method, grid, NA, beta, gamma,
+                time, niter, converged, nsolves (number of times the method
+                was run: 2 with memory), peak_mb, err_V and err_c (None if
+                the method does not compute V, or peak_mb if memory is
+                False).
+    ----------------------------------------------------------------------------
+    '''
+
+    solver, kind = CAKE_METHODS[method]
+    a = cake_benchmark_grid(NA, kind=kind)
+    t0 = time.perf_counter()
+    res = solver(a, beta, gamma)
+    elapsed = time.perf_counter() - t0
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            solver(a, beta, gamma)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'method': method,
+        'grid': kind,
+        'NA': int(NA),
+        'beta': beta,
+        'gamma': gamma,
+        'time': elapsed,
+        'niter': int(res['niter']),
+        'converged': bool(res['converged']),
+        'nsolves': 2 if memory else 1,
+        'peak_mb': None if peak is None else peak/2**20,
+        'err_V': float(res['err_V']) if 'err_V' in res else None,
+        'err_c': float(res['err_c']),
+    }
+
+
+def cake_benchmark(methods=None, sizes=(100, 1000, 10000, 100000, 1000000),
+                   betas=(0.9, 0.95, 0.99), gamma=0.5, path=None,
+                   max_time=60.0, memory=True, verbose=True):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Run the benchmark suite of the cake-eating solvers.
+
+    INPUT:
+    - methods  <- list of names in CAKE_METHODS (default: all).
+    - sizes    <- increasing grid sizes.
+    - betas    <- time discount factors.
+    - gamma    <- intertemporal elasticity of substitution.
+    - path     <- file where the records are appended as JSON lines (None:
+                  not saved).
+    - max_time <- once a run of a method takes longer than max_time seconds,
+                  larger grids are skipped for that method and discount
+                  factor.
+    - memory   <- if True, measure the peak memory of each run (in a second
+                  solve of each configuration, so the suite takes about
+                  twice the reported times).
+    - verbose  <- if True, print one line per run.
+
+    OUTPUT:
+    - records <- list of records of cake_benchmark_run, with the entries
+                 date, python and numpy added.
+    ----------------------------------------------------------------------------
+    '''
+
+    if methods is None:
+        methods = list(CAKE_METHODS)
+    env = {'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+           'python': platform.python_version(), 'numpy': np.__version__}
+    records = []
+    if verbose and memory:
+        print('Each configuration is solved twice: the time is that of the '
+              'first solve,')
+        print('the peak memory is measured with tracemalloc in the second.')
+
+    for method in methods:
+        for beta in betas:
+            for NA in sizes:
+                rec = cake_benchmark_run(method, NA, beta, gamma, memory)
+                rec.update(env)
+                records.append(rec)
+                if path is not None:
+                    with open(path, 'a') as f:
+                        f.write(json.dumps(rec) + '\n')
+                if verbose:
+                    err_V = '       -' if rec['err_V'] is None else \
+                        f"{rec['err_V']:.2e}"
+                    peak = '      -' if rec['peak_mb'] is None else \
+                        f"{rec['peak_mb']:7.1f}"
+                    print(f"{method:>13s} beta = {beta:.2f} NA = {NA:8d}: "
+                          f"time {rec['time']:9.3f} s, iter {rec['niter']:6d}, "
+                          f"peak {peak} MB, err_V {err_V}, "
+                          f"err_c {rec['err_c']:.2e}"
+                          f"{'' if rec['converged'] else ' (not converged)'}")
+                if rec['time'] > max_time:
+                    break
+
+    return records
+
+
+# Read the records of one or several benchmark files
+def cake_benchmark_load(paths):
+    if isinstance(paths, str):
+        paths = [paths]
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records += [json.loads(line) for line in f if line.strip()]
+    return records
@@ -0,0 +1,56 @@
+#==============================================================================#
+# PROGRAM: Benchmark suite of the cake-eating solvers
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+#
+# DESCRIPTION: Runs all solution methods of cake_benchmark.py on grids from
+# 1e2 to 1e6 points and for three discount factors, and appends the records
+# to cake_benchmark.jsonl, next to this script. Each run of the script adds
+# one dated set of records, so that the file keeps the history of the
+# performance of the solvers. Every configuration is solved twice: once for
+# the wall time and once under tracemalloc for the peak memory.
+#==============================================================================#
+
+# Import modules
+import os
+import numpy as np
+
+from cake_benchmark import cake_benchmark, cake_benchmark_load
+
+print('')
+print('BENCHMARKS OF THE CAKE-EATING SOLVERS')
+print('')
+
+# Model parameters
+gamma = 0.5
+betas = (0.9, 0.95, 0.99)
+
+# Grid sizes
+sizes = (100, 1000, 10000, 100000, 1000000)
+
+# File of results, next to this script whatever the working directory
+path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    'cake_benchmark.jsonl')
+
+#------------------------------------------------------------------------------#
+
+records = cake_benchmark(sizes=sizes, betas=betas, gamma=gamma, path=path,
+                         max_time=60.0)
+print('')
+print('------------------------------------------------------------------------')
+print('')
+
+# Largest grid solved by each method within the time limit, over all runs in
+# the file. Only the runs that converged count as solved
+print('Largest grid solved per method (converged runs in the file): ')
+history = cake_benchmark_load(path)
+for method in sorted({rec['method'] for rec in history}):
+    solved = [rec for rec in history
+              if rec['method'] == method and rec['converged']]
+    if not solved:
+        print(f"{method:>13s}: no converged run")
+        continue
+    NA = max(rec['NA'] for rec in solved)
+    times = [rec['time'] for rec in solved if rec['NA'] == NA]
+    print(f"{method:>13s}: NA = {NA:8d}, median time {np.median(times):.3f} s")
+print('')
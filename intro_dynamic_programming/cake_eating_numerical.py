@@ -0,0 +1,218 @@
+#==============================================================================#
+# PROGRAM: Numerical solution to the cake-eating problem
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Fehr, H. and Kindermann, F. (2018): "Computational
+#            Economics using Fortran", Oxford University Press
+#
+# DESCRIPTION: Solves the cake-eating problem of cake_eating_analytic.ipynb
+# numerically and compares the result with the analytical solution.
+#==============================================================================#
+
+# Import modules
+import time
+import tempfile
+import numpy as np
+
+from cake_model import cake_analytic
+from cake_vfi import cake_vfi, cake_bellman
+from cake_egm import cake_egm
+from cake_finite import cake_backward, cake_finite_load, cake_simulate
+from cake_stochastic import cake_rouwenhorst, cake_tauchen, \
+    cake_sparse_transition, cake_stochastic_vfi, cake_euler_errors
+from cake_simulation import cake_simulate_panel
+from cake_multigrid import cake_multigrid, cake_regrid
+
+print('')
+print('NUMERICAL SOLUTION TO THE CAKE-EATING PROBLEM')
+print('')
+
+# Model parameters
+gamma = 0.5
+beta = 0.95
+a0 = 100
+
+# Number of points in the assets grid
+NA = 1000
+
+# Grid of resources, as in cake_eating_analytic.ipynb
+a = 1 + np.arange(NA)/NA*a0
+
+#------------------------------------------------------------------------------#
+
+# Value function iteration
+print('Value function iteration: ')
+results = cake_vfi(a, beta, gamma, howard=0, mqp=False)
+print(f"Converged: {results['converged']}, iterations: {results['niter']}, "
+      f"time: {results['time']:.3f} s")
+print(f"Sup-norm error of V(a): {results['err_V']:.3e}")
+print(f"Sup-norm error of c(a): {results['err_c']:.3e}")
+print('')
+print('------------------------------------------------------------------------')
+print('')
+
+# Value function iteration with Howard's improvement (50 policy evaluations
+# after each maximization) and MacQueen-Porteus error bounds
+print('Modified policy iteration with MacQueen-Porteus bounds: ')
+results = cake_vfi(a, beta, gamma, howard=50, mqp=True)
+print(f"Converged: {results['converged']}, iterations: {results['niter']}, "
+      f"policy evaluations: {results['nhoward']}, "
+      f"time: {results['time']:.3f} s")
+print(f"Sup-norm error of V(a): {results['err_V']:.3e}")
+print(f"Sup-norm error of c(a): {results['err_c']:.3e}")
+print('')
+print('------------------------------------------------------------------------')
+print('')
+
+# Maximum bracketed on the grid and refined between grid points. The grid is
+# geometric over the same range, so that it is equally fine relative to a
+# everywhere
+print('Modified policy iteration with a+ bracketed on a geometric grid: ')
+ag = np.geomspace(a[0], a[-1], 10*NA)
+_, V_true = cake_analytic(ag, beta, gamma)
+for maximize in ['grid', 'concave', 'monotone']:
+    t0 = time.perf_counter()
+    cake_bellman(V_true, ag, beta, gamma, maximize=maximize)
+    print(f"Time of one Bellman step, NA = {10*NA} ({maximize}): "
+          f"{time.perf_counter() - t0:.4f} s")
+for n in [NA, 10*NA]:
+    ag = np.geomspace(a[0], a[-1], n)
+    results = cake_vfi(ag, beta, gamma, howard=50, mqp=True,
+                       maximize='monotone')
+    print(f"NA = {n}: converged: {results['converged']}, "
+          f"iterations: {results['niter']}, time: {results['time']:.3f} s")
+    print(f"Sup-norm error of V(a): {results['err_V']:.3e}")
+    print(f"Sup-norm error of c(a): {results['err_c']:.3e}")
+print('')
+print('------------------------------------------------------------------------')
+print('')
+
+# Endogenous grid method
+print('Endogenous grid method: ')
+results = cake_egm(a, beta, gamma)
+print(f"Converged: {results['converged']}, iterations: {results['niter']}, "
+      f"time: {results['time']:.3f} s")
+print(f"Sup-norm error of c(a): {results['err_c']:.3e}")
+print('')
+print('------------------------------------------------------------------------')
+print('')
+# Finite horizon of TT periods, as in cake_eating_all_in_one.ipynb. The
+# policy tables are saved to a temporary directory and reloaded from there
+TT = 200
+print(f'Backward induction over {TT} periods: ')
+path = tempfile.mkdtemp()
+results = cake_backward(a, beta, gamma, TT, path=path)
+print(f"Time: {results['time']:.3f} s")
+print(f"Sup-norm error of c_t(a): {results['err_c']:.3e}")
+print(f"Sup-norm error of V_t(a): {results['err_V']:.3e}")
+results = cake_finite_load(path)
+print(f"Reloaded {results['c'].shape} {results['c'].dtype} tables from "
+      f"{path}")
+c_t, a_t = cake_simulate(results, a0)
+c_inf = beta**(np.arange(TT)*gamma)*(1 - beta**gamma)*a0
+print(f"Consumption in t = 0: {c_t[0]:.4f} (infinite horizon: "
+      f"{c_inf[0]:.4f})")
+print(f"Consumption in t = {TT-1}: {c_t[-1]:.4f} (infinite horizon: "
+      f"{c_inf[-1]:.4f})")
+print('')
+print('------------------------------------------------------------------------')
+print('')
+# Income shocks: log income follows an AR(1) process discretized with the
+# Rouwenhorst and Tauchen methods. Without income the solution is the
+# deterministic one
+print('Stochastic cake-eating problem: ')
+rho = 0.9
+sigma = 0.1
+results = cake_stochastic_vfi(a, np.zeros(1), np.ones((1, 1)), beta, gamma,
+                              howard=50, mqp=True)
+print(f"No income: sup-norm error of c(a): "
+      f"{np.max(np.abs(results['c'][:, 0] - a*(1 - beta**gamma))):.3e}")
+
+# Grid of cash on hand, finer where the borrowing constraint binds
+ay = 0.5 + (a0 - 0.5)*np.linspace(0, 1, NA)**2
+for name, NZ, (z, Pi) in [('Rouwenhorst', 5, cake_rouwenhorst(5, rho, sigma)),
+                          ('Tauchen', 50, cake_tauchen(50, rho, sigma))]:
+    Pi = cake_sparse_transition(Pi)
+    results = cake_stochastic_vfi(ay, np.exp(z), Pi, beta, gamma, howard=50,
+                                  mqp=True)
+    # Euler equation errors, with next-period consumption from the decision
+    # rule of the solution at the off-grid resources. The largest errors are
+    # at the first grid points where the borrowing constraint stops binding
+    err = np.log10(cake_euler_errors(results, Pi, beta, gamma))
+    print(f"{name}, NZ = {NZ}: converged: {results['converged']}, "
+          f"iterations: {results['niter']}, time: {results['time']:.3f} s")
+    print(f"Euler equation errors (log10): mean {np.nanmean(err):.2f}, "
+          f"max {np.nanmax(err):.2f}")
+print('')
+print('------------------------------------------------------------------------')
+print('')
+# Panel simulation: one million agents with initial cakes uniform on
+# [a0/2, a0] through the policy of the endogenous grid method. Since c(a) is
+# linear, mean consumption follows the path of cake_eating_all_in_one.ipynb
+# for the mean initial cake
+print('Panel simulation: ')
+N = 1000000
+cake0 = np.random.default_rng(0).uniform(a0/2, a0, N)
+moments = cake_simulate_panel(cake_egm(a, beta, gamma), cake0, TT, seed=0)
+c_inf = beta**(np.arange(TT)*gamma)*(1 - beta**gamma)*np.mean(cake0)
+print(f"{N} agents, {TT} periods, time: {moments['time']:.3f} s")
+print(f"Sup-norm error of mean consumption: "
+      f"{np.max(np.abs(moments['mean_c'] - c_inf)):.3e}")
+
+# With income shocks (the last stochastic solution above)
+moments = cake_simulate_panel(results, np.full(N//10, a0), TT, Pi=Pi,
+                              seed=0)
+print(f"Income shocks, {N//10} agents, time: {moments['time']:.3f} s")
+print(f"Mean consumption in t = 0, {TT//2}, {TT-1}: "
+      f"{moments['mean_c'][0]:.4f}, {moments['mean_c'][TT//2]:.4f}, "
+      f"{moments['mean_c'][-1]:.4f}")
+print('')
+print('------------------------------------------------------------------------')
+print('')
+# Adaptive grid refinement: the problem is solved on a coarse subset of the
+# grid and refined where the value function curves (at low resources). The
+# cost counts evaluations of the Bellman operator and policy evaluation steps
+# per state, over all levels. It is compared with the cost of the smallest
+# uniform subset of the grid (of 11, 21, 41, ... points, as the levels)
+# whose solution, interpolated on the full grid, is as accurate
+def uniform_match(solve, grid, Vref, err):
+    for m in (11, 21, 41, 81, 161, 321, 641, grid.size):
+        g = grid[np.unique(np.round(np.linspace(0, grid.size - 1,
+                                                m)).astype(int))]
+        res = solve(g)
+        err_m = np.max(np.abs(cake_regrid(res['V'], g, grid) - Vref))
+        if err_m <= err:
+            break
+    return g.size, (res['niter'] + res['nhoward'])*res['V'].size, err_m
+
+
+print('Adaptive grid refinement: ')
+results = cake_multigrid(a, beta, gamma, eps=1e-3)
+print(f"Adaptive: {results['npoints'][-1]} points, "
+      f"cost: {results['cost']}, time: {results['time']:.3f} s, "
+      f"error of V(a): {results['err_V']:.3e}")
+m, cost, err = uniform_match(lambda g: cake_vfi(g, beta, gamma), a,
+                             cake_analytic(a, beta, gamma)[1],
+                             results['err_V'])
+print(f"Uniform grid as accurate: {m} points, cost: {cost}, "
+      f"error of V(a): {err:.3e}")
+
+# With income shocks, against the solution on the full grid
+z, Pi = cake_rouwenhorst(5, rho, sigma)
+Pi = cake_sparse_transition(Pi)
+ay = np.linspace(0.5, a0, NA + 1)
+full = cake_stochastic_vfi(ay, np.exp(z), Pi, beta, gamma, howard=50,
+                           mqp=True)
+results = cake_multigrid(ay, beta, gamma, y=np.exp(z), Pi=Pi, eps=1e-3)
+err_V = np.max(np.abs(results['V'] - full['V']))
+print(f"Income shocks, adaptive: {results['npoints'][-1]} points, "
+      f"cost: {results['cost']}, "
+      f"error of V(a,z): {err_V:.3e}")
+m, cost, err = uniform_match(
+    lambda g: cake_stochastic_vfi(g, np.exp(z), Pi, beta, gamma, howard=50,
+                                  mqp=True), ay, full['V'], err_V)
+print(f"Income shocks, uniform grid as accurate: {m} points, cost: {cost}, "
+      f"error of V(a,z): {err:.3e}")
+print('')
+print('------------------------------------------------------------------------')
+print('')
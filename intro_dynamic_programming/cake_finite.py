@@ -0,0 +1,194 @@
+#==============================================================================#
+# PROGRAM: Finite-horizon cake-eating problem by backward induction
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Fehr, H. and Kindermann, F. (2018): "Computational
+#            Economics using Fortran", Oxford University Press
+#
+# DESCRIPTION: The agent lives for T periods, t = 0, ..., T-1, and eats the
+# rest of the cake in the last one, V_{T-1}(a) = u(a). Earlier value functions
+# follow from one Bellman step each,
+#
+#   V_t(a) = max_{0 < a+ < a} u(a - a+) + beta*V_{t+1}(a+),
+#
+# carried out for the whole grid at once with cake_bellman (cake_vfi.py).
+#
+# Only the value function of the next period is kept in double precision
+# during the recursion. The per-period tables c_t(a) and V_t(a) are stored as
+# T-by-NA arrays in single precision (half the memory of float64). If a
+# directory is given, the tables are written there as .npy files through
+# memory maps, so that they do not have to fit in memory and can be reloaded
+# later with cake_finite_load without solving the problem again.
+#==============================================================================#
+
+# Import modules
+import os
+import json
+import time
+import numpy as np
+
+from cake_model import cake_utility, cake_analytic_finite
+from cake_vfi import cake_bellman
+
+
+# Discounted number of periods in the coefficient of log(a) of V with n
+# periods left (log utility), sum_{s<n} beta^s
+def cake_kappa(beta, n):
+    return (1 - beta**n)/(1 - beta)
+
+
+# Table of T-by-NA values, in memory or memory-mapped to a .npy file
+def cake_table(path, name, shape, dtype):
+    if path is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(os.path.join(path, name + '.npy'),
+                                     mode='w+', dtype=dtype, shape=shape)
+
+
+def cake_backward(a, beta, gamma, T, dtype=np.float32, path=None,
+                  xtol=1e-8, maximize='golden', verbose=False):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Solve the finite-horizon cake-eating problem by backward
+    induction.
+
+    INPUT:
+    - a        <- (NA,) increasing grid of resources (all points positive).
+    - beta     <- time discount factor.
+    - gamma    <- intertemporal elasticity of substitution.
+    - T        <- number of periods.
+    - dtype    <- data type of the stored tables (default float32).
+    - path     <- directory where the tables are memory-mapped and saved
+                  (None keeps them in memory).
+    - xtol     <- relative tolerance of the golden-section search.
+    - maximize <- maximization of the Bellman step (see cake_vfi.py).
+    - verbose  <- if True, print progress.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- a     : (NA,) grid of resources.
+        -- c     : (T, NA) consumption c_t(a) in each period.
+        -- V     : (T, NA) value function V_t(a) in each period.
+        -- beta  : time discount factor.
+        -- gamma : intertemporal elasticity of substitution.
+        -- time  : wall time of the solution (seconds).
+        -- err_c : sup-norm error of c against the analytical solution.
+        -- err_V : sup-norm error of V against the analytical solution.
+    ----------------------------------------------------------------------------
+    '''
+
+    t0 = time.perf_counter()
+    a = np.asarray(a, dtype=float)
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'a.npy'), a)
+    c = cake_table(path, 'c', (T, a.size), dtype)
+    Vt = cake_table(path, 'V', (T, a.size), dtype)
+
+    # Last period: eat the whole cake
+    V = cake_utility(a, gamma)
+    c[T - 1] = a
+    Vt[T - 1] = V
+
+    # Backward induction, with n = T - t periods left in period t
+    for t in range(T - 2, -1, -1):
+        V, aplus = cake_bellman(V, a, beta, gamma, xtol=xtol,
+                                kappa=cake_kappa(beta, T - t - 1),
+                                maximize=maximize)
+        c[t] = a - aplus
+        Vt[t] = V
+        if verbose and (t % 100 == 0):
+            print(f"Period {t:5d}: c_t(a[-1]) = {c[t, -1]: .6f}")
+
+    elapsed = time.perf_counter() - t0
+
+    # Errors against the analytical solution, computed row by row so that
+    # memory-mapped tables are not loaded at once
+    err_c = 0.0
+    err_V = 0.0
+    for t in range(T):
+        c_true, V_true = cake_analytic_finite(a, beta, gamma, T - t)
+        err_c = max(err_c, np.max(np.abs(c[t] - c_true)))
+        err_V = max(err_V, np.max(np.abs(Vt[t] - V_true)))
+
+    if path is not None:
+        c.flush()
+        Vt.flush()
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'beta': beta, 'gamma': gamma, 'T': T,
+                       'dtype': np.dtype(dtype).name}, f)
+
+    return {
+        'a': a,
+        'c': c,
+        'V': Vt,
+        'beta': beta,
+        'gamma': gamma,
+        'time': elapsed,
+        'err_c': err_c,
+        'err_V': err_V,
+    }
+
+
+def cake_finite_load(path, mmap=True):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Reload the tables of a finite-horizon solution saved by
+    cake_backward.
+
+    INPUT:
+    - path <- directory given to cake_backward.
+    - mmap <- if True, the tables are memory-mapped read-only instead of read
+              into memory.
+
+    OUTPUT:
+    - results <- dictionary with entries a, c, V, beta and gamma, as returned
+                 by cake_backward.
+    ----------------------------------------------------------------------------
+    '''
+
+    mode = 'r' if mmap else None
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    return {
+        'a': np.load(os.path.join(path, 'a.npy')),
+        'c': np.load(os.path.join(path, 'c.npy'), mmap_mode=mode),
+        'V': np.load(os.path.join(path, 'V.npy'), mmap_mode=mode),
+        'beta': meta['beta'],
+        'gamma': meta['gamma'],
+    }
+
+
+def cake_simulate(results, a0):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Simulate the path of consumption of the finite-horizon problem
+    from the stored policies.
+
+    INPUT:
+    - results <- dictionary returned by cake_backward or cake_finite_load.
+    - a0      <- initial size of the cake.
+
+    OUTPUT:
+    - c_t <- (T,) consumption in each period.
+    - a_t <- (T,) resources at the start of each period.
+    ----------------------------------------------------------------------------
+    '''
+
+    a = results['a']
+    c = results['c']
+    T = c.shape[0]
+    c_t = np.empty(T)
+    a_t = np.empty(T)
+    a_t[0] = a0
+    for t in range(T):
+        # Interpolation of row t of the policy; below the grid, consumption
+        # is proportional to resources
+        ct = np.asarray(c[t], dtype=float)
+        if a_t[t] < a[0]:
+            c_t[t] = ct[0]*a_t[t]/a[0]
+        else:
+            c_t[t] = np.interp(a_t[t], a, ct)
+        if t < T - 1:
+            a_t[t + 1] = a_t[t] - c_t[t]
+    return c_t, a_t
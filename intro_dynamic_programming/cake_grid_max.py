@@ -0,0 +1,188 @@
+#==============================================================================#
+# PROGRAM: Maximization of the cake-eating Bellman equation over a grid
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Gordon, G. and Qiu, S. (2018): "A Divide and Conquer Algorithm
+#            for Exploiting Policy Function Monotonicity", Quantitative
+#            Economics, 9(2), 521-540
+#
+# DESCRIPTION: The Bellman equation is first maximized over the points of the
+# asset grid, a+ = a[j] with j < i at a = a[i]. The brute-force approach
+# evaluates the NA-by-NA matrix u(a[i] - a[j]) + beta*V[j], which costs
+# O(NA^2) time and memory. Two properties of the problem make this
+# unnecessary:
+#
+# - Concavity: for given i, the objective is concave in j, so its maximum can
+#   be found by binary search on the sign of its forward difference, in
+#   O(log NA) evaluations.
+# - Monotonicity: the policy j*(i) is increasing in i. Rows are solved in
+#   divide-and-conquer order: once rows l < u are solved, the optimum of the
+#   middle row lies in [j*(l), j*(u)].
+#
+# Each binary search step is carried out for all rows at once with NumPy
+# arrays, so that both the time and the memory of a maximization step are
+# O(NA log NA) and O(NA), respectively.
+#
+# Both searches rely on the objective being single-peaked in j, which holds
+# as long as V is concave. By concavity, the maximum over continuous a+ then
+# lies between the neighbours a[j*-1] and a[j*+1] of the best grid point
+# (between 0 and a[1] if j* = 0, and below a[0] in the first row). The choice
+# is refined there by a golden-section search on the interpolated
+# continuation value (cake_model.py), as in cake_vfi.py but on a bracket of
+# two grid cells, which needs about 25 to 30 golden steps instead of 38 for
+# xtol = 1e-8. Without the refinement, a+ restricted to the grid is a poor
+# approximation where the grid is coarse relative to a (the lowest points of
+# a uniform grid starting at a = 1), and the errors of V and c are orders of
+# magnitude larger than with the golden-section search of cake_vfi.py.
+#
+# The bracket search and the refinement together cost about as much as the
+# golden-section search over (0, a), so the grid options are not faster than
+# maximize='golden'; they pay off when the objective may have several local
+# maxima in a+ ('grid' finds the best grid point in any case). Intermediate
+# value functions of modified policy iteration are not always concave, and
+# the binary searches may then bracket a local maximum, which costs
+# iterations but not accuracy at convergence.
+#==============================================================================#
+
+# Import modules
+import numpy as np
+
+from cake_model import cake_utility, cake_transform, cake_continuation, \
+    cake_golden_max
+
+
+# Binary search for the maximum of a concave function of an integer j in
+# [lo, hi], for many rows at once. f(rows, j) returns the objective of the
+# given rows at the given choices (arrays of the same shape)
+def concave_argmax(f, rows, lo, hi):
+    lo = np.array(lo, dtype=np.int64)
+    hi = np.array(hi, dtype=np.int64)
+    active = np.flatnonzero(hi > lo)
+    while active.size > 0:
+        r = rows[active]
+        m = (lo[active] + hi[active])//2
+        # If the objective still increases at m, the maximum is to the right
+        up = f(r, m + 1) > f(r, m)
+        lo[active] = np.where(up, m + 1, lo[active])
+        hi[active] = np.where(up, hi[active], m)
+        active = active[hi[active] > lo[active]]
+    return lo
+
+
+# Maximization with monotone brackets in divide-and-conquer order. lo0 and
+# hi0 are the widest admissible brackets of each row, and the policy of a row
+# is searched between the policies of the closest solved rows
+def monotone_argmax(f, lo0, hi0):
+    n = lo0.size
+    jstar = np.empty(n, dtype=np.int64)
+
+    # First and last rows with their full brackets
+    ends = np.unique([0, n - 1])
+    jstar[ends] = concave_argmax(f, ends, lo0[ends], hi0[ends])
+
+    # Intervals (l, u) of solved rows with unsolved rows in between
+    left = np.array([0])
+    right = np.array([n - 1])
+    while left.size > 0:
+        keep = right - left > 1
+        left = left[keep]
+        right = right[keep]
+        if left.size == 0:
+            break
+        mid = (left + right)//2
+        lo = np.maximum(jstar[left], lo0[mid])
+        hi = np.maximum(np.minimum(jstar[right], hi0[mid]), lo)
+        jstar[mid] = concave_argmax(f, mid, lo, hi)
+        left, right = np.concatenate((left, mid)), np.concatenate((mid, right))
+
+    return jstar
+
+
+def cake_bellman_grid(V, a, beta, gamma, xtol=1e-8, kappa=None,
+                      maximize='monotone', chunk=2**22):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Bellman operator of the cake-eating problem with the maximum
+    bracketed on the asset grid and refined between grid points.
+
+    INPUT:
+    - V        <- (NA,) value function on the grid a.
+    - a        <- (NA,) increasing grid of resources (all points positive).
+    - beta     <- time discount factor.
+    - gamma    <- intertemporal elasticity of substitution.
+    - xtol     <- relative tolerance (to a) of the refinement of a+.
+    - kappa    <- discounted number of remaining periods (log utility only,
+                  default 1/(1-beta)).
+    - maximize <- search of the best grid point: 'grid' (brute force over
+                  the NA-by-NA matrix, processed in blocks of 'chunk'
+                  elements), 'concave' (binary search in every row) or
+                  'monotone' (binary search within monotone brackets).
+    - chunk    <- maximum number of matrix elements per block ('grid').
+
+    OUTPUT:
+    - Vnew  <- (NA,) updated value function.
+    - aplus <- (NA,) next-period resources a+(a).
+    ----------------------------------------------------------------------------
+    '''
+
+    if kappa is None:
+        kappa = 1/(1 - beta)
+    n = a.size
+
+    # Objective of rows i at grid choices j < i
+    def f(rows, j):
+        return cake_utility(a[rows] - a[j], gamma) + beta*V[j]
+
+    # Admissible choices of row i >= 1 are j = 0, ..., i-1
+    rows = np.arange(1, n)
+    if maximize == 'grid':
+        jstar = np.empty(n - 1, dtype=np.int64)
+        step = max(1, chunk//n)
+        for start in range(0, n - 1, step):
+            r = rows[start:start + step]
+            with np.errstate(divide='ignore', over='ignore',
+                             invalid='ignore'):
+                obj = cake_utility(a[r, None] - a[None, :], gamma) + \
+                    beta*V[None, :]
+            obj[r[:, None] <= np.arange(n)[None, :]] = -np.inf
+            jstar[start:start + step] = np.argmax(obj, axis=1)
+    elif maximize == 'concave':
+        jstar = concave_argmax(f, rows, np.zeros(n - 1), rows - 1)
+    elif maximize == 'monotone':
+        jstar = monotone_argmax(lambda r, j: f(r + 1, j), np.zeros(n - 1),
+                                rows - 1)
+    else:
+        raise ValueError("maximize must be 'grid', 'concave' or 'monotone'")
+
+    # Bracket of a+ around the best grid point of each row: the first row
+    # has no grid point below it and searches (0, a[0])
+    lo = np.empty(n)
+    hi = np.empty(n)
+    lo[0], hi[0] = xtol*a[0], (1 - xtol)*a[0]
+    lo[1:] = np.where(jstar > 0, a[np.maximum(jstar - 1, 0)], xtol*a[1:])
+    hi[1:] = np.minimum(a[jstar + 1], (1 - xtol)*a[1:])
+
+    # Golden-section refinement on the interpolated continuation value. The
+    # brackets of two grid cells need fewer steps than those reaching down
+    # to 0, so that both groups of rows are refined separately, each with
+    # enough steps to shrink its widest bracket below xtol*a
+    v = cake_transform(V, gamma, kappa)
+    rg = (np.sqrt(5) - 1)/2
+    Vnew = np.empty(n)
+    aplus = np.empty(n)
+    edge = lo < a[0]
+    for group in (np.flatnonzero(edge), np.flatnonzero(~edge)):
+        if group.size == 0:
+            continue
+        ag = a[group]
+
+        def rhs(ap):
+            return cake_utility(ag - ap, gamma) + \
+                beta*cake_continuation(v, a, ap, gamma, kappa)
+
+        width = hi[group] - lo[group]
+        niter = int(np.ceil(np.max(np.log(xtol*ag/width)/np.log(rg))))
+        Vnew[group], aplus[group] = cake_golden_max(rhs, lo[group],
+                                                    hi[group], max(niter, 0))
+
+    return Vnew, aplus
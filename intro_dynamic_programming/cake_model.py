@@ -0,0 +1,131 @@
+#==============================================================================#
+# PROGRAM: Building blocks of the cake-eating problem
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Fehr, H. and Kindermann, F. (2018): "Computational
+#            Economics using Fortran", Oxford University Press
+#
+# DESCRIPTION: CRRA utility u(c) = c^(1-1/gamma)/(1-1/gamma) (log utility if
+# gamma = 1), the analytical solution c(a) = a(1-beta^gamma) and
+# V(a) = (1-beta^gamma)^(-1/gamma) a^(1-1/gamma)/(1-1/gamma) from
+# cake_eating_analytic.ipynb, and the interpolation of the value function
+# between the points of an asset grid used by the numerical solvers, which
+# maximize the right-hand side of the Bellman equation over a+ with a
+# golden-section search vectorized over the grid.
+#
+# The value function is not interpolated directly, since it is very curved
+# close to a = 0. Instead, it is transformed into v = ((1-1/gamma)V)^(1/(1-1/gamma))
+# (v = exp(V/kappa) with log utility, where kappa is the discounted number of
+# remaining periods), which is linear in a for the cake-eating problem, and v
+# is interpolated linearly. Below the first grid point, v is extended along
+# the ray through the origin, which is the homogeneity of V in a.
+#==============================================================================#
+
+# Import modules
+import numpy as np
+
+
+# Instantaneous utility function
+def cake_utility(c, gamma):
+    egam = 1 - 1/gamma
+    if egam == 0:
+        return np.log(c)
+    return c**egam/egam
+
+
+# Analytical policy and value function on a grid of resources a
+def cake_analytic(a, beta, gamma):
+    egam = 1 - 1/gamma
+    a = np.asarray(a, dtype=float)
+    c = a*(1 - beta**gamma)
+    if egam == 0:
+        V = np.log(1 - beta)/(1 - beta) + \
+            beta*np.log(beta)/(1 - beta)**2 + np.log(a)/(1 - beta)
+    else:
+        V = (1 - beta**gamma)**(-1/gamma)*a**egam/egam
+    return c, V
+
+
+# Analytical policy and value function with n periods left (eat everything in
+# the last one). With D = sum_{s<n} beta^(gamma*s), c(a) = a/D and
+# V(a) = D^(1/gamma) u(a); with log utility D = sum_{s<n} beta^s and
+# V(a) = D log(a) + K, where the constant K follows a backward recursion
+def cake_analytic_finite(a, beta, gamma, n):
+    egam = 1 - 1/gamma
+    a = np.asarray(a, dtype=float)
+    if egam != 0:
+        D = np.sum(beta**(gamma*np.arange(n)))
+        return a/D, D**(1/gamma)*a**egam/egam
+    D, K = 1.0, 0.0
+    for m in range(2, n + 1):
+        D_new = 1 + beta*D
+        K = -np.log(D_new) + beta*(D*np.log(1 - 1/D_new) + K)
+        D = D_new
+    return a/D, D*np.log(a) + K
+
+
+# Transformation of the value function that is linear in a, and its inverse
+def cake_transform(V, gamma, kappa):
+    egam = 1 - 1/gamma
+    if egam == 0:
+        return np.exp(V/kappa)
+    return (egam*V)**(1/egam)
+
+
+def cake_untransform(v, gamma, kappa):
+    egam = 1 - 1/gamma
+    if egam == 0:
+        return kappa*np.log(v)
+    return v**egam/egam
+
+
+# Interpolation weights of the points x on the grid a: the interpolated value
+# is w_lo*v[idx] + w_hi*v[idx+1]. Below the first grid point the weights give
+# the ray through the origin, v(x) = v[0]*x/a[0], and above the last grid point
+# the last segment is extended linearly
+def cake_interp_weights(a, x):
+    x = np.asarray(x, dtype=float)
+    idx = np.clip(np.searchsorted(a, x, side='right') - 1, 0, a.size - 2)
+    w_lo = (a[idx + 1] - x)/(a[idx + 1] - a[idx])
+    w_hi = 1 - w_lo
+    below = x < a[0]
+    if np.any(below):
+        w_lo = np.where(below, x/a[0], w_lo)
+        w_hi = np.where(below, 0.0, w_hi)
+    return idx, w_lo, w_hi
+
+
+# Value of the continuation at the points x, given the transformed value
+# function v on the grid a. Same interpolation as cake_interp_weights, using
+# np.interp inside the grid since it is much faster for sorted points
+def cake_continuation(v, a, x, gamma, kappa):
+    x = np.asarray(x, dtype=float)
+    vx = np.interp(x, a, v)
+    vx = np.where(x < a[0], v[0]*x/a[0], vx)
+    vx = np.where(x > a[-1], v[-1] + (v[-1] - v[-2])/(a[-1] - a[-2]) *
+                  (x - a[-1]), vx)
+    return cake_untransform(vx, gamma, kappa)
+
+
+# Golden-section search for the maximum of f on the intervals [lo, hi], for
+# all points of a grid at once (f, lo and hi are vectorized over the grid).
+# Returns the maximum and the maximizer after niter steps
+def cake_golden_max(f, lo, hi, niter):
+    rg = (np.sqrt(5) - 1)/2
+    x1 = hi - rg*(hi - lo)
+    x2 = lo + rg*(hi - lo)
+    f1 = f(x1)
+    f2 = f(x2)
+    for it in range(niter):
+        # If f1 < f2 the maximum lies in [x1, hi], otherwise in [lo, x2]
+        move = f1 < f2
+        lo = np.where(move, x1, lo)
+        hi = np.where(move, hi, x2)
+        xnew = np.where(move, lo + rg*(hi - lo), hi - rg*(hi - lo))
+        fnew = f(xnew)
+        x1, f1, x2, f2 = (np.where(move, x2, xnew), np.where(move, f2, fnew),
+                          np.where(move, xnew, x1), np.where(move, fnew, f1))
+
+    # Keep the best of the two interior points
+    best = f2 > f1
+    return np.where(best, f2, f1), np.where(best, x2, x1)
@@ -0,0 +1,167 @@
+#==============================================================================#
+# PROGRAM: Adaptive grid refinement for the cake-eating problem
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Chow, C.-S. and Tsitsiklis, J. N. (1991): "An Optimal One-Way
+#            Multigrid Algorithm for Discrete-Time Stochastic Control", IEEE
+#            Transactions on Automatic Control, 36(8), 898-914
+#
+# DESCRIPTION: Instead of solving the problem on the full target grid a from
+# the start, it is first solved on a coarse subset of a. After each level,
+# every interval of the current grid whose interpolation error is estimated
+# to be above eps is split at the target point closest to its midpoint, and
+# the problem is solved again on the refined grid, starting from the
+# interpolated solution of the previous level. Refinement stops when no
+# interval needs to be split.
+#
+# The interpolation error of an interval of length h is estimated as
+# h^2/8*|V''|, with V'' the largest second divided difference of the value
+# function at its two ends (the policy is not used: it is linear in a without
+# income, and inherits the noise of the maximization). The value function
+# itself is used rather than the transformed value function v(a) of
+# cake_model.py, which is linear in a without income and would never be
+# refined: V curves most at low resources, where the points are added, and
+# with income shocks also where the borrowing constraint starts to bind. The
+# solution on the target grid is the linear interpolation of the solution on
+# the final grid, whose error is the one estimated.
+#==============================================================================#
+
+# Import modules
+import time
+import numpy as np
+
+from cake_model import cake_analytic, cake_transform, cake_untransform, \
+    cake_interp_weights
+from cake_vfi import cake_vfi
+from cake_stochastic import cake_stochastic_vfi
+
+
+# Interpolation of f (one column per shock) from the grid g to the points x
+def cake_regrid(f, g, x):
+    idx, w_lo, w_hi = cake_interp_weights(g, x)
+    if f.ndim == 2:
+        w_lo, w_hi = w_lo[:, None], w_hi[:, None]
+    return w_lo*f[idx] + w_hi*f[idx + 1]
+
+
+# Estimated interpolation error of each interval of the grid g for f (one
+# column per shock)
+def cake_interval_error(f, g):
+    f = f.reshape(g.size, -1)
+    h = np.diff(g)[:, None]
+    slope = np.diff(f, axis=0)/h
+    d2 = np.zeros_like(f)
+    d2[1:-1] = np.abs(np.diff(slope, axis=0))/(h[1:] + h[:-1])*2
+    d2[0], d2[-1] = d2[1], d2[-2]
+    return np.max(h**2/8*np.maximum(d2[:-1], d2[1:]), axis=1)
+
+
+def cake_multigrid(a, beta, gamma, y=None, Pi=None, NA0=11, eps=1e-4,
+                   tol=1e-6, howard=50, mqp=True, verbose=False):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Solve the cake-eating problem on an adaptively refined subset
+    of a grid, with the solution of each level as the initial guess of the
+    next one.
+
+    INPUT:
+    - a       <- (NA,) increasing target grid of resources.
+    - beta    <- time discount factor.
+    - gamma   <- intertemporal elasticity of substitution.
+    - y       <- (NZ,) income in each shock state (None: no income, solved
+                 with cake_vfi; otherwise with cake_stochastic_vfi).
+    - Pi      <- (NZ, NZ) transition matrix of the shocks.
+    - NA0     <- number of points of the initial grid.
+    - eps     <- tolerance for the estimated interpolation error of the
+                 value function.
+    - tol     <- tolerance of value function iteration on each level.
+    - howard  <- number of policy evaluations after each maximization
+                 (default 50, as cake_vfi).
+    - mqp     <- if True (default), stop with MacQueen-Porteus error bounds.
+    - verbose <- if True, print the size of each level.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- a         : (NA,) target grid of resources.
+        -- V         : value function on the target grid.
+        -- c         : policy function c(a) on the target grid.
+        -- aplus     : next-period resources (savings) on the target grid.
+        -- y         : (NZ,) income in each shock state (only with income).
+        -- grid      : final adaptive grid.
+        -- npoints   : number of grid points on each level.
+        -- niter     : number of iterations on each level.
+        -- cost      : number of evaluations of the Bellman operator and of
+                       policy evaluation steps, times the number of states.
+        -- converged : boolean indicating if all levels converged.
+        -- time      : wall time of the solution (seconds).
+        -- err_V     : sup-norm error of V against the analytical solution
+                       (without income).
+        -- err_c     : sup-norm error of c against the analytical solution
+                       (without income).
+    ----------------------------------------------------------------------------
+    '''
+
+    t0 = time.perf_counter()
+    a = np.asarray(a, dtype=float)
+    kappa = 1/(1 - beta)
+    idx = np.unique(np.round(np.linspace(0, a.size - 1, NA0)).astype(int))
+    V0 = None
+    npoints = []
+    niter = []
+    cost = 0
+    converged = True
+
+    while True:
+        g = a[idx]
+        if y is None:
+            res = cake_vfi(g, beta, gamma, V0=V0, tol=tol, howard=howard,
+                           mqp=mqp)
+        else:
+            res = cake_stochastic_vfi(g, y, Pi, beta, gamma, V0=V0, tol=tol,
+                                      howard=howard, mqp=mqp)
+        nstates = res['V'].size
+        npoints.append(idx.size)
+        niter.append(res['niter'])
+        cost += (res['niter'] + res['nhoward'])*nstates
+        converged = converged and res['converged']
+        v = cake_transform(res['V'], gamma, kappa)
+        if verbose:
+            print(f"Level {len(npoints):2d}: {idx.size:5d} points, "
+                  f"{res['niter']:5d} iterations")
+
+        # Intervals to split: estimated error above eps and a target point
+        # strictly inside
+        err = cake_interval_error(res['V'], g)
+        split = (err > eps) & (np.diff(idx) > 1)
+        if not np.any(split):
+            break
+        mid = (idx[:-1][split] + idx[1:][split])//2
+        idx = np.union1d(idx, mid)
+
+        # Initial guess on the refined grid
+        V0 = cake_untransform(cake_regrid(v, g, a[idx]), gamma, kappa)
+
+    # Solution on the target grid
+    V = cake_regrid(res['V'], g, a)
+    c = cake_regrid(res['c'], g, a)
+    aplus = a[:, None] - c if c.ndim == 2 else a - c
+    results = {
+        'a': a,
+        'V': V,
+        'c': c,
+        'aplus': aplus,
+        'grid': g,
+        'npoints': npoints,
+        'niter': niter,
+        'cost': cost,
+        'converged': converged,
+        'time': time.perf_counter() - t0,
+    }
+    if y is not None:
+        # Income, as in the results of cake_stochastic_vfi
+        results['y'] = np.asarray(y, dtype=float)
+    else:
+        c_true, V_true = cake_analytic(a, beta, gamma)
+        results['err_V'] = np.max(np.abs(V - V_true))
+        results['err_c'] = np.max(np.abs(c - c_true))
+    return results
@@ -0,0 +1,191 @@
+#==============================================================================#
+# PROGRAM: Panel simulation of the cake-eating problem
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Chan, T. F., Golub, G. H. and LeVeque, R. J. (1979): "Updating
+#            Formulae and a Pairwise Algorithm for Computing Sample
+#            Variances", Technical Report STAN-CS-79-773, Stanford University
+#
+# DESCRIPTION: Simulates N agents with heterogeneous initial cakes through a
+# solved policy function: the infinite-horizon policy c(a) of cake_vfi.py or
+# cake_egm.py, the period-specific policies c_t(a) of cake_finite.py, or the
+# policy c(a,z) with income shocks of cake_stochastic.py.
+#
+# The agents are split into chunks of fixed size. Within a chunk, each period
+# is one vectorized interpolation of the policy for all agents, and shocks
+# are drawn by inverse transform sampling from the rows of the transition
+# matrix. Every chunk has its own random generator, spawned from a single
+# seed, so that the results do not depend on the number of workers that
+# process the chunks in parallel. The N-by-T panel is never stored: within a
+# chunk, the mean, the sum of squared deviations, the minimum and the maximum
+# of consumption and resources are computed period by period, and chunks are
+# merged with the pairwise formulas of Chan et al. (1979).
+#==============================================================================#
+
+# Import modules
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from cake_model import cake_interp_weights
+
+
+# Stationary distribution of the Markov chain with transition matrix Pi
+def cake_stationary(Pi, tol=1e-12, maxiter=100000):
+    Pi = Pi.toarray() if hasattr(Pi, 'toarray') else np.asarray(Pi)
+    pi = np.full(Pi.shape[0], 1/Pi.shape[0])
+    for it in range(maxiter):
+        pi_new = pi @ Pi
+        if np.max(np.abs(pi_new - pi)) < tol:
+            break
+        pi = pi_new
+    return pi_new
+
+
+# Moments of one chunk in period t: mean, sum of squared deviations, min and
+# max of x, stored in row t of the arrays of s
+def cake_chunk_moments(s, t, x):
+    s[1][t] = x.mean()
+    s[2][t] = ((x - s[1][t])**2).sum()
+    s[3][t] = x.min()
+    s[4][t] = x.max()
+
+
+# Pairwise merge of the moments of two chunks
+def cake_merge_moments(s, r):
+    n = s[0] + r[0]
+    delta = r[1] - s[1]
+    mean = s[1] + delta*r[0]/n
+    m2 = s[2] + r[2] + delta**2*s[0]*r[0]/n
+    return [n, mean, m2, np.minimum(s[3], r[3]), np.maximum(s[4], r[4])]
+
+
+def cake_simulate_panel(results, a0, TT, z0=None, Pi=None, seed=None,
+                        chunk=100000, workers=1):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Simulate a panel of agents through a solved cake-eating policy
+    and return cross-sectional moments per period.
+
+    INPUT:
+    - results <- dictionary returned by cake_vfi, cake_egm, cake_backward,
+                 cake_finite_load, cake_stochastic_vfi or cake_multigrid
+                 (policies with income shocks are recognized by the entry
+                 y of the results).
+    - a0      <- (N,) initial resources of each agent.
+    - TT      <- number of simulated periods (at most T with finite horizon).
+    - z0      <- (N,) initial shock state of each agent (income shocks only,
+                 default: draws from the stationary distribution).
+    - Pi      <- (NZ, NZ) transition matrix, dense or scipy.sparse (income
+                 shocks only).
+    - seed    <- seed of the random number generators.
+    - chunk   <- number of agents simulated at once.
+    - workers <- number of threads that simulate chunks in parallel.
+
+    OUTPUT:
+    - moments <- dictionary with the following entries:
+        -- N      : number of agents.
+        -- mean_c : (TT,) mean consumption per period.
+        -- std_c  : (TT,) standard deviation of consumption per period.
+        -- min_c  : (TT,) minimum consumption per period.
+        -- max_c  : (TT,) maximum consumption per period.
+        -- mean_a : (TT,) mean resources at the start of each period.
+        -- std_a  : (TT,) standard deviation of resources per period.
+        -- min_a  : (TT,) minimum resources per period.
+        -- max_a  : (TT,) maximum resources per period.
+        -- time   : wall time of the simulation (seconds).
+    ----------------------------------------------------------------------------
+    '''
+
+    t0 = time.perf_counter()
+    a = results['a']
+    c = results['c']
+    a0 = np.asarray(a0, dtype=float)
+    N = a0.size
+    stochastic = 'y' in results
+    finite = c.ndim == 2 and not stochastic
+    if finite and c.shape[1] != a.size:
+        raise ValueError('A policy with income shocks needs the income y in '
+                         'the results')
+    if finite and TT > c.shape[0]:
+        raise ValueError('TT exceeds the number of periods of the policy')
+
+    # Income shocks: cumulative transition probabilities, with row z shifted
+    # by z so that all rows can be searched at once in the flattened array,
+    # and initial states
+    if stochastic:
+        y = results['y']
+        nz = y.size
+        if Pi is None:
+            raise ValueError('Pi is required to simulate a policy with income '
+                             'shocks (results of cake_stochastic_vfi)')
+        Pi = Pi.toarray() if hasattr(Pi, 'toarray') else np.asarray(Pi)
+        if Pi.shape != (nz, nz):
+            raise ValueError(f'Pi must be a ({nz}, {nz}) transition matrix, '
+                             f'got shape {Pi.shape}')
+        cumPi = np.cumsum(Pi, axis=1)
+        cumPi[:, -1] = 1.0
+        cumPi = (cumPi + np.arange(nz)[:, None]).ravel()
+        if z0 is None:
+            cum0 = np.cumsum(cake_stationary(Pi))
+            cum0[-1] = 1.0
+    seeds = np.random.SeedSequence(seed).spawn(int(np.ceil(N/chunk)))
+
+    # Simulation of the agents in chunk k. The agents are sorted by their
+    # resources, which makes the grid search faster; without shocks the
+    # policy a - c(a) is increasing and the order is kept over time
+    def simulate(k):
+        lo, hi = k*chunk, min((k + 1)*chunk, N)
+        rng = np.random.default_rng(seeds[k])
+        order = np.argsort(a0[lo:hi], kind='stable')
+        at = a0[lo:hi][order]
+        if stochastic:
+            if z0 is None:
+                z = np.searchsorted(cum0, rng.random(hi - lo), side='right')
+            else:
+                z = np.asarray(z0[lo:hi], dtype=np.int64)[order]
+        sc = [hi - lo] + [np.empty(TT) for _ in range(4)]
+        sa = [hi - lo] + [np.empty(TT) for _ in range(4)]
+        for t in range(TT):
+            # Policy at the resources of each agent (proportional to
+            # resources below the grid)
+            idx, w_lo, w_hi = cake_interp_weights(a, at)
+            if stochastic:
+                ct = w_lo*c[idx, z] + w_hi*c[idx + 1, z]
+            elif finite:
+                row = np.asarray(c[t], dtype=float)
+                ct = w_lo*row[idx] + w_hi*row[idx + 1]
+            else:
+                ct = w_lo*c[idx] + w_hi*c[idx + 1]
+            cake_chunk_moments(sc, t, ct)
+            cake_chunk_moments(sa, t, at)
+            at = at - ct
+            if stochastic:
+                # Next shock by inverse transform sampling, and income
+                u = rng.random(hi - lo)
+                z = np.minimum(np.searchsorted(cumPi, z + u, side='right') -
+                               z*nz, nz - 1)
+                at = at + y[z]
+        return sc, sa
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        stats = list(pool.map(simulate, range(len(seeds))))
+
+    # Merge of the moments of all chunks
+    sc, sa = stats[0]
+    for rc, ra in stats[1:]:
+        sc = cake_merge_moments(sc, rc)
+        sa = cake_merge_moments(sa, ra)
+
+    return {
+        'N': N,
+        'mean_c': sc[1],
+        'std_c': np.sqrt(sc[2]/N),
+        'min_c': sc[3],
+        'max_c': sc[4],
+        'mean_a': sa[1],
+        'std_a': np.sqrt(sa[2]/N),
+        'min_a': sa[3],
+        'max_a': sa[4],
+        'time': time.perf_counter() - t0,
+    }
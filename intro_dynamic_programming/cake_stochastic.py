@@ -0,0 +1,300 @@
+#==============================================================================#
+# PROGRAM: Cake-eating problem with Markov income shocks
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Fehr, H. and Kindermann, F. (2018): "Computational
+#            Economics using Fortran", Oxford University Press
+#            Tauchen, G. (1986): "Finite State Markov-Chain Approximations to
+#            Univariate and Vector Autoregressions", Economics Letters, 20(2),
+#            177-181
+#            Kopecky, K. A. and Suen, R. M. H. (2010): "Finite State
+#            Markov-Chain Approximations to Highly Persistent Processes",
+#            Review of Economic Dynamics, 13(3), 701-714
+#
+# DESCRIPTION: The agent receives an income y(z) that follows a Markov chain
+# with transition matrix Pi, the discretization of an AR(1) process for log
+# income, z' = rho*z + eps. With resources (cash on hand) a and savings
+# 0 <= b < a, the Bellman equation reads
+#
+#   V(a,z) = max_{0 <= b < a} u(a - b) + beta*EV(b,z),
+#   EV(b,z) = sum_{z'} Pi(z,z') V(b + y(z'), z').
+#
+# EV is computed on a grid of savings b in two steps for all states at once:
+# V is interpolated at the (NB, NZ) points b + y(z'), whose interpolation
+# weights never change and are computed only once, and the expectation is
+# the matrix product of this array with Pi' (a scipy.sparse matrix if Pi has
+# many zeros). The golden-section search over b is vectorized over the whole
+# (NA, NZ) grid, and the interpolations are carried out in the transformed
+# space of cake_model.py.
+#==============================================================================#
+
+# Import modules
+import time
+import numpy as np
+import scipy.sparse as sp
+from scipy.stats import norm
+
+from cake_model import cake_utility, cake_transform, cake_untransform, \
+    cake_interp_weights, cake_golden_max
+
+
+# Tauchen (1986) discretization of z' = rho*z + eps, eps ~ N(0, sigma^2), on
+# an equally spaced grid of m unconditional standard deviations
+def cake_tauchen(nz, rho, sigma, m=3):
+    sigma_z = sigma/np.sqrt(1 - rho**2)
+    z = np.linspace(-m*sigma_z, m*sigma_z, nz)
+    if nz == 1:
+        return z, np.ones((1, 1))
+    h = (z[1] - z[0])/2
+    mu = rho*z[:, None]
+    Pi = norm.cdf((z[None, :] + h - mu)/sigma) - \
+        norm.cdf((z[None, :] - h - mu)/sigma)
+    Pi[:, 0] = norm.cdf((z[0] + h - mu[:, 0])/sigma)
+    Pi[:, -1] = 1 - norm.cdf((z[-1] - h - mu[:, 0])/sigma)
+    return z, Pi
+
+
+# Rouwenhorst discretization (Kopecky and Suen, 2010), which matches the
+# persistence and variance of the process exactly
+def cake_rouwenhorst(nz, rho, sigma):
+    sigma_z = sigma/np.sqrt(1 - rho**2)
+    z = np.linspace(-1, 1, nz)*sigma_z*np.sqrt(max(nz - 1, 1))
+    p = (1 + rho)/2
+    Pi = np.ones((1, 1))
+    for n in range(2, nz + 1):
+        P = np.zeros((n, n))
+        P[:-1, :-1] += p*Pi
+        P[:-1, 1:] += (1 - p)*Pi
+        P[1:, :-1] += (1 - p)*Pi
+        P[1:, 1:] += p*Pi
+        P[1:-1] /= 2
+        Pi = P
+    return z, Pi
+
+
+# Sparse transition matrix: probabilities below tol are dropped and the rows
+# are normalized to one again
+def cake_sparse_transition(Pi, tol=1e-12):
+    Pi = np.where(Pi < tol, 0.0, Pi)
+    Pi /= Pi.sum(axis=1, keepdims=True)
+    return sp.csr_matrix(Pi)
+
+
+# Interpolation weights of the points x (one column per shock) on the grid g.
+# The value at x[i,k] is w_lo*f[idx,k] + w_hi*f[idx+1,k]
+def cake_weights2d(g, x):
+    idx, w_lo, w_hi = cake_interp_weights(g, x)
+    return idx, w_lo, w_hi, np.arange(x.shape[1])[None, :]
+
+
+def cake_interp2d(f, weights):
+    idx, w_lo, w_hi, col = weights
+    return w_lo*f[idx, col] + w_hi*f[idx + 1, col]
+
+
+# Transformed expected continuation value EV(b,z) on the grid of savings b:
+# one interpolation of V at all next-period resources b + y(z') (weights
+# wnext) and one product with Pi'
+def cake_expected_value(V, Pi, wnext, gamma, kappa):
+    with np.errstate(divide='ignore'):
+        W = cake_untransform(cake_interp2d(cake_transform(V, gamma, kappa),
+                                           wnext), gamma, kappa)
+        EV = np.asarray(Pi @ W.T).T
+        return cake_transform(EV, gamma, kappa)
+
+
+# Optimal savings at resources x (one column per shock z) given the
+# transformed expected continuation value e on the grid b: golden-section
+# search on [lo, hi] with niter steps, compared with the corner b = 0.
+# Returns the maximized right-hand side and the savings
+def cake_savings(e, b, x, beta, gamma, kappa, lo, hi, niter):
+
+    def rhs(bp):
+        with np.errstate(divide='ignore'):
+            return cake_utility(x - bp, gamma) + \
+                beta*cake_untransform(cake_interp2d(e, cake_weights2d(b, bp)),
+                                      gamma, kappa)
+
+    Vnew, bplus = cake_golden_max(rhs, lo, hi, niter)
+
+    # The borrowing constraint b = 0 may bind
+    f0 = rhs(np.zeros_like(x))
+    corner = f0 > Vnew
+    return np.where(corner, f0, Vnew), np.where(corner, 0.0, bplus)
+
+
+def cake_stochastic_vfi(a, y, Pi, beta, gamma, b=None, V0=None, tol=1e-6,
+                        maxiter=5000, xtol=1e-8, howard=0, mqp=False,
+                        verbose=False):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Solve the cake-eating problem with Markov income shocks by
+    value function iteration.
+
+    INPUT:
+    - a       <- (NA,) increasing grid of resources (all points positive).
+    - y       <- (NZ,) income in each shock state (non-negative).
+    - Pi      <- (NZ, NZ) transition matrix, Pi[z,z'], dense or scipy.sparse.
+    - beta    <- time discount factor.
+    - gamma   <- intertemporal elasticity of substitution.
+    - b       <- (NB,) increasing grid of savings starting at 0 (default
+                 a - a[0]).
+    - V0      <- (NA, NZ) initial guess for the value function (default: eat
+                 all resources, u(a)).
+    - tol     <- tolerance for convergence, based on the sup-norm of the
+                 change in the value function.
+    - maxiter <- maximum number of iterations.
+    - xtol    <- relative tolerance of the golden-section search.
+    - howard  <- number of policy evaluations after each maximization.
+    - mqp     <- if True, stop with MacQueen-Porteus error bounds.
+    - verbose <- if True, print iteration details.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- a         : (NA,) grid of resources.
+        -- b         : (NB,) grid of savings.
+        -- y         : (NZ,) income in each shock state.
+        -- V         : (NA, NZ) value function.
+        -- c         : (NA, NZ) policy function c(a,z).
+        -- aplus     : (NA, NZ) savings b(a,z).
+        -- niter     : number of iterations performed.
+        -- nhoward   : number of policy evaluation steps.
+        -- converged : boolean indicating if convergence was achieved.
+        -- time      : wall time of the solution (seconds).
+    ----------------------------------------------------------------------------
+    '''
+
+    t0 = time.perf_counter()
+    a = np.asarray(a, dtype=float)
+    y = np.asarray(y, dtype=float)
+    b = a - a[0] if b is None else np.asarray(b, dtype=float)
+    nz = y.size
+    kappa = 1/(1 - beta)
+    A = np.repeat(a[:, None], nz, axis=1)
+    V = cake_utility(A, gamma) if V0 is None else np.array(V0, dtype=float)
+    converged = False
+    nhoward = 0
+
+    # Interpolation weights of next-period resources b + y(z') on the grid a
+    wnext = cake_weights2d(a, b[:, None] + y[None, :])
+
+    def expectation(V):
+        return cake_expected_value(V, Pi, wnext, gamma, kappa)
+
+    rg = (np.sqrt(5) - 1)/2
+    niter = int(np.ceil(np.log(xtol)/np.log(rg)))
+    for it in range(1, maxiter + 1):
+
+        # Maximization step: golden-section search over the whole grid
+        Vnew, aplus = cake_savings(expectation(V), b, A, beta, gamma, kappa,
+                                   np.zeros_like(A), (1 - xtol)*A, niter)
+
+        dV = Vnew - V
+        diff = np.max(np.abs(dV))
+        if mqp:
+            lower = beta/(1 - beta)*np.min(dV)
+            upper = beta/(1 - beta)*np.max(dV)
+            diff = upper - lower
+
+        if verbose and (it % 50 == 0 or diff < tol or howard != 0):
+            print(f"Iter {it:5d}: ||V - V_old||_inf = "
+                  f"{np.max(np.abs(dV)): .3e}")
+
+        if diff < tol:
+            V = Vnew + (lower + upper)/2 if mqp else Vnew
+            converged = True
+            break
+
+        # Policy evaluation steps, with weights and utility of the policy
+        # computed once, and stopped if the changes grow
+        V = Vnew
+        if howard > 0:
+            u = cake_utility(A - aplus, gamma)
+            wpol = cake_weights2d(b, aplus)
+            diff_old = np.inf
+            for _ in range(howard):
+                Vh = u + beta*cake_untransform(
+                    cake_interp2d(expectation(V), wpol), gamma, kappa)
+                diff = np.max(np.abs(Vh - V))
+                if not diff <= diff_old:
+                    break
+                V = Vh
+                diff_old = diff
+                nhoward += 1
+
+    elapsed = time.perf_counter() - t0
+
+    return {
+        'a': a,
+        'b': b,
+        'y': y,
+        'V': V,
+        'c': A - aplus,
+        'aplus': aplus,
+        'niter': it,
+        'nhoward': nhoward,
+        'converged': converged,
+        'time': elapsed,
+    }
+
+
+def cake_euler_errors(results, Pi, beta, gamma, xtol=1e-8):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Euler equation errors of the stochastic cake-eating problem,
+    |1 - (beta*E[u'(c')])^(-gamma)/c|, at the grid points where the
+    borrowing constraint does not bind.
+
+    Next-period consumption c' = x - b(x,z') at the off-grid resources
+    x = b + y(z') is not interpolated: the savings b(x,z') are obtained by
+    maximizing the right-hand side of the Bellman equation at x with the
+    solved value function, so that the errors measure the solution and not
+    an interpolation of its policy (c(a,z) is not linear in a, and has a
+    kink where the borrowing constraint starts to bind). Since savings are
+    increasing in resources, b(x,z') lies between the savings at the grid
+    points around x, and the golden-section search runs on that bracket.
+
+    INPUT:
+    - results <- dictionary returned by cake_stochastic_vfi.
+    - Pi      <- (NZ, NZ) transition matrix, dense or scipy.sparse.
+    - beta    <- time discount factor.
+    - gamma   <- intertemporal elasticity of substitution.
+    - xtol    <- relative tolerance of the golden-section search.
+
+    OUTPUT:
+    - err <- (NA, NZ) Euler equation errors (NaN where b = 0).
+    ----------------------------------------------------------------------------
+    '''
+
+    a, b, y, c, aplus = results['a'], results['b'], results['y'], \
+        results['c'], results['aplus']
+    na, nz = c.shape
+    kappa = 1/(1 - beta)
+    e = cake_expected_value(results['V'], Pi,
+                            cake_weights2d(a, b[:, None] + y[None, :]),
+                            gamma, kappa)
+
+    # Next-period resources, one column per next-period shock z', and the
+    # brackets of their savings from the policy at the neighbouring grid
+    # points (up to the resources themselves above the grid)
+    x = np.stack([(aplus + y[k]).ravel() for k in range(nz)], axis=1)
+    idx, _, _ = cake_interp_weights(a, x)
+    col = np.arange(nz)[None, :]
+    lo = np.where(x < a[0], 0.0, aplus[idx, col])
+    hi = np.where(x > a[-1], x, aplus[idx + 1, col])
+    hi = np.minimum(np.maximum(hi, lo), (1 - xtol)*x)
+    lo = np.minimum(lo, hi)
+    rg = (np.sqrt(5) - 1)/2
+    width = np.max((hi - lo)/x)
+    niter = int(np.ceil(np.log(xtol/width)/np.log(rg))) if width > xtol \
+        else 0
+    _, bnext = cake_savings(e, b, x, beta, gamma, kappa, lo, hi, niter)
+
+    # Expected marginal utility, accumulated over next-period shocks
+    Pi = Pi.toarray() if sp.issparse(Pi) else np.asarray(Pi)
+    mu = ((x - bnext)**(-1/gamma)).reshape(na, nz, nz)
+    Emu = np.einsum('zk,izk->iz', Pi, mu)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        err = np.abs(1 - (beta*Emu)**(-gamma)/c)
+    return np.where(aplus > 0, err, np.nan)
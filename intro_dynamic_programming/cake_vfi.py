@@ -0,0 +1,205 @@
+#==============================================================================#
+# PROGRAM: Value function iteration for the cake-eating problem
+# AUTHOR: Manuel V. Montesinos
+# DATE: October 2026
+# REFERENCE: Fehr, H. and Kindermann, F. (2018): "Computational
+#            Economics using Fortran", Oxford University Press
+#
+# DESCRIPTION: Numerical solution of the Bellman equation
+#
+#   V(a) = max_{0 < a+ < a} u(a - a+) + beta*V(a+)
+#
+# on a grid of resources a. The maximization is carried out for all grid
+# points at once: a golden-section search over next-period resources a+ is run
+# simultaneously on the whole grid with NumPy arrays, and continuation values
+# V(a+) between grid points are interpolated as described in cake_model.py.
+#
+# Two accelerations are available. With Howard's improvement (modified policy
+# iteration), every maximization step is followed by 'howard' cheap
+# evaluations of the current policy, V <- u(c) + beta*V(a+(a)), which reuse the
+# interpolation weights of a+(a); howard='full' evaluates the policy until
+# convergence (policy iteration). With MacQueen-Porteus bounds, the iteration
+# stops as soon as the bounds
+#
+#   TV + beta/(1-beta)*min(TV - V) <= V* <= TV + beta/(1-beta)*max(TV - V)
+#
+# are tighter than tol, and V is set to the midpoint of the bounds.
+#==============================================================================#
+
+# Import modules
+import time
+import numpy as np
+
+from cake_model import cake_utility, cake_analytic, cake_transform, \
+    cake_untransform, cake_continuation, cake_interp_weights, cake_golden_max
+from cake_grid_max import cake_bellman_grid
+
+
+# Bellman operator: returns the updated value function and the policy a+(a).
+# With maximize='golden' a+ is searched in (0, a); the other options first
+# locate the best grid point and search a+ between its neighbours (see
+# cake_grid_max.py)
+def cake_bellman(V, a, beta, gamma, xtol=1e-8, kappa=None, maximize='golden'):
+
+    # Discounted number of remaining periods (only used with log utility)
+    if kappa is None:
+        kappa = 1/(1 - beta)
+
+    if maximize != 'golden':
+        return cake_bellman_grid(V, a, beta, gamma, xtol=xtol, kappa=kappa,
+                                 maximize=maximize)
+
+    # Right-hand side of the Bellman equation for a vector of choices a+
+    v = cake_transform(V, gamma, kappa)
+
+    def rhs(ap):
+        return cake_utility(a - ap, gamma) + \
+            beta*cake_continuation(v, a, ap, gamma, kappa)
+
+    # Golden-section search over a+ in (0, a), vectorized over the grid
+    rg = (np.sqrt(5) - 1)/2
+    niter = int(np.ceil(np.log(xtol)/np.log(rg)))
+    return cake_golden_max(rhs, xtol*a, (1 - xtol)*a, niter)
+
+
+# Evaluation of a fixed policy a+(a): applies V <- u(a - a+) + beta*V(a+)
+# niter times, or until the change is below tol if niter is None. The
+# evaluation also stops when the changes start to grow: early policies may eat
+# the cake so slowly that their value is minus infinity
+def cake_policy_eval(V, a, aplus, beta, gamma, niter, tol=1e-6, kappa=None):
+
+    if kappa is None:
+        kappa = 1/(1 - beta)
+
+    # Utility and interpolation weights do not change with V
+    u = cake_utility(a - aplus, gamma)
+    idx, w_lo, w_hi = cake_interp_weights(a, aplus)
+
+    it = 0
+    diff_old = np.inf
+    while niter is None or it < niter:
+        it += 1
+        v = cake_transform(V, gamma, kappa)
+        Vnew = u + beta*cake_untransform(w_lo*v[idx] + w_hi*v[idx + 1], gamma,
+                                         kappa)
+        diff = np.max(np.abs(Vnew - V))
+        if not diff <= diff_old:
+            break
+        V = Vnew
+        if niter is None and diff < tol:
+            break
+        diff_old = diff
+
+    return V, it
+
+
+def cake_vfi(a, beta, gamma, V0=None, tol=1e-6, maxiter=5000, xtol=1e-8,
+             howard=50, mqp=True, maximize='golden', verbose=False):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Solve the cake-eating problem by value function iteration.
+
+    The defaults are the fastest settings: 50 policy evaluations after each
+    maximization and MacQueen-Porteus bounds. With beta = 0.95, gamma = 0.5
+    and a grid of 1,000 points between 1 and 101, they converge in 29
+    maximizations and 0.1-0.15 s, against 710 maximizations and 1.6-2.5 s
+    for plain value function iteration (howard=0, mqp=False); on 10,000
+    points they take about 1 s. Each maximization runs a golden-section
+    search on the whole grid, so the solution takes tenths of a second to
+    seconds, not milliseconds. Only the endogenous grid method
+    (cake_egm.py), which needs no maximization, comes close: about 0.02 s
+    on 1,000 points and 0.08 s on 10,000.
+
+    INPUT:
+    - a       <- (NA,) increasing grid of resources (all points positive).
+    - beta    <- time discount factor.
+    - gamma   <- intertemporal elasticity of substitution.
+    - V0      <- (NA,) initial guess for the value function (default: the
+                 utility of eating the whole cake, u(a)).
+    - tol     <- tolerance for convergence, based on the sup-norm of the
+                 change in the value function.
+    - maxiter <- maximum number of iterations.
+    - xtol    <- relative tolerance of the golden-section search.
+    - howard  <- number of policy evaluations after each maximization (0 is
+                 plain value function iteration, 'full' is policy iteration;
+                 default 50).
+    - mqp     <- if True (default), stop with MacQueen-Porteus error bounds.
+    - maximize <- 'golden' (search of a+ over (0, a)), or 'grid', 'concave'
+                  and 'monotone' (search of a+ next to the best grid point,
+                  see cake_grid_max.py).
+    - verbose <- if True, print iteration details.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- a         : (NA,) grid of resources.
+        -- V         : (NA,) value function.
+        -- c         : (NA,) policy function c(a).
+        -- aplus     : (NA,) next-period resources a+(a).
+        -- niter     : number of iterations performed.
+        -- nbellman  : number of applications of the Bellman operator.
+        -- nhoward   : number of policy evaluation steps.
+        -- converged : boolean indicating if convergence was achieved.
+        -- time      : wall time of the solution (seconds).
+        -- err_V     : sup-norm error of V against the analytical solution.
+        -- err_c     : sup-norm error of c against the analytical solution.
+    ----------------------------------------------------------------------------
+    '''
+
+    t0 = time.perf_counter()
+    a = np.asarray(a, dtype=float)
+    V = cake_utility(a, gamma) if V0 is None else np.array(V0, dtype=float)
+    converged = False
+    nhoward = 0
+
+    for it in range(1, maxiter + 1):
+
+        # Maximization step
+        Vnew, aplus = cake_bellman(V, a, beta, gamma, xtol=xtol,
+                                   maximize=maximize)
+        dV = Vnew - V
+        diff = np.max(np.abs(dV))
+
+        # MacQueen-Porteus bounds on the fixed point
+        if mqp:
+            lower = beta/(1 - beta)*np.min(dV)
+            upper = beta/(1 - beta)*np.max(dV)
+            diff = upper - lower
+
+        if verbose and (it % 50 == 0 or diff < tol or howard != 0):
+            print(f"Iter {it:5d}: ||V - V_old||_inf = "
+                  f"{np.max(np.abs(dV)): .3e}")
+
+        if diff < tol:
+            V = Vnew + (lower + upper)/2 if mqp else Vnew
+            converged = True
+            break
+
+        # Policy evaluation steps
+        if howard == 'full':
+            V, nh = cake_policy_eval(Vnew, a, aplus, beta, gamma, None,
+                                     tol=tol)
+        elif howard > 0:
+            V, nh = cake_policy_eval(Vnew, a, aplus, beta, gamma, howard)
+        else:
+            V, nh = Vnew, 0
+        nhoward += nh
+
+    elapsed = time.perf_counter() - t0
+
+    # Errors against the analytical solution
+    c = a - aplus
+    c_true, V_true = cake_analytic(a, beta, gamma)
+
+    return {
+        'a': a,
+        'V': V,
+        'c': c,
+        'aplus': aplus,
+        'niter': it,
+        'nbellman': it,
+        'nhoward': nhoward,
+        'converged': converged,
+        'time': elapsed,
+        'err_V': np.max(np.abs(V - V_true)),
+        'err_c': np.max(np.abs(c - c_true)),
+    }
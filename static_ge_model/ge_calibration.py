@@ -0,0 +1,296 @@
+#===============================================================================
+# PROGRAM:   Calibration of the static general equilibrium model with variable
+#            labor supply to target moments
+# AUTHOR:    Manuel V. Montesinos
+# REFERENCE: Fehr, H., and Kindermann F. (2018), "Introduction to Computational
+#            Economics using Fortran", Oxford University Press
+# DATE:      October 2026
+#
+# DESCRIPTION: The Cobb-Douglas shares (alpha, beta) and endowments (Kbar,
+# Tbar) of market_static_labor.py are chosen to match target moments of the
+# equilibrium, either by a nested fixed point (an equilibrium is solved for
+# every trial parameter vector) or by MPEC (prices and parameters are chosen
+# jointly subject to the market equations). In the nested fixed point, the
+# sensitivities of the equilibrium to the parameters come from the implicit
+# function theorem,
+#
+#   dx/dtheta = -F_x^{-1} F_theta,   dm/dtheta = m_theta + m_x dx/dtheta,
+#
+# with the partial derivatives F_x, F_theta, m_x and m_theta computed by
+# finite differences of the market equations and moments at the solved
+# equilibrium (ge_sensitivities), so each outer iteration needs one
+# equilibrium solve rather than one per parameter. Trial parameters without
+# an equilibrium are rejected with a penalty.
+#===============================================================================
+
+# Import libraries
+import numpy as np
+from scipy.optimize import least_squares, minimize
+
+from ge_sensitivities import ge_jacobian, ge_ift
+from ge_solver_log import ge_instrumented_solve
+
+# Default parameterization (the one used in market_static_labor.py)
+LABOR_PARAMS = {
+    'Kbar': 10.0,
+    'Tbar': 30.0,
+    'alpha': np.array([0.3, 0.4]),
+    'beta': np.array([0.3, 0.6]),
+}
+
+# Initial guess for the price vector
+LABOR_X0 = np.array([0.5, 0.5, 0.5])
+
+# Parameters that can be calibrated
+LABOR_THETA = ('alpha1', 'alpha2', 'beta1', 'beta2', 'Kbar', 'Tbar')
+
+
+# Function to write a vector of calibrated parameters into a dictionary
+def labor_set_params(par, names, theta):
+    par = {'Kbar': par['Kbar'], 'Tbar': par['Tbar'],
+           'alpha': np.array(par['alpha'], dtype=float),
+           'beta': np.array(par['beta'], dtype=float)}
+    for name, value in zip(names, theta):
+        if name in ('Kbar', 'Tbar'):
+            par[name] = value
+        elif name in ('alpha1', 'alpha2', 'beta1', 'beta2'):
+            par[name[:-1]][int(name[-1]) - 1] = value
+        else:
+            raise ValueError("Calibrated parameters must be in LABOR_THETA")
+    return par
+
+
+# Function to read a vector of calibrated parameters from a dictionary
+def labor_get_params(par, names):
+    theta = []
+    for name in names:
+        if name in ('Kbar', 'Tbar'):
+            theta.append(par[name])
+        else:
+            theta.append(par[name[:-1]][int(name[-1]) - 1])
+    return np.array(theta, dtype=float)
+
+
+# Function to determine market equilibrium
+def labor_markets(x, par):
+    Kbar = par['Kbar']
+    Tbar = par['Tbar']
+    alpha = par['alpha']
+    beta = par['beta']
+    # Copy prices (the price of good 1 is normalized)
+    p = [1, x[0]]
+    w = x[1]
+    r = x[2]
+    # Compute total income
+    Ybar = w*Tbar + r*Kbar
+    # Market equations
+    ms1 = 1/p[0] - (beta[0]/w)**beta[0] * ((1-beta[0])/r)**(1-beta[0])
+    ms2 = 1/p[1] - (beta[1]/w)**beta[1] * ((1-beta[1])/r)**(1-beta[1])
+    ms3 = beta[0]*alpha[0]*Ybar/w + beta[1]*alpha[1]*Ybar/w + \
+        (1-alpha[0]-alpha[1])*Ybar/w - Tbar
+    return [ms1, ms2, ms3]
+
+
+# Function to compute the moments that can be targeted at an equilibrium
+def labor_moments(x, par):
+    Kbar = par['Kbar']
+    Tbar = par['Tbar']
+    alpha = par['alpha']
+    beta = par['beta']
+    p = np.array([1, x[0]])
+    w = x[1]
+    r = x[2]
+    Ybar = w*Tbar + r*Kbar
+    Y = alpha*Ybar/p
+    ell = (1-alpha[0]-alpha[1])*Ybar/w
+    L = beta*p*Y/w
+    K = (1-beta)*p*Y/r
+    return {
+        'X1': Y[0], 'X2': Y[1], 'p2': p[1], 'w': w, 'r': r,
+        'exp_share1': p[0]*Y[0] / (p[0]*Y[0] + p[1]*Y[1]),
+        'emp_share1': L[0] / (L[0] + L[1]),
+        'cap_share1': K[0] / (K[0] + K[1]),
+        'hours': (Tbar - ell) / Tbar,
+        'labor_income_share': w*(Tbar - ell) / (w*(Tbar - ell) + r*Kbar),
+        'U': Y[0]**alpha[0] * Y[1]**alpha[1] * ell**(1-alpha[0]-alpha[1]),
+    }
+
+
+def ge_calibrate(targets, names, par0=None, weights=None, bounds=None,
+                 method='nfxp', tol=1e-10, log=None):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Calibrate the parameters of the static general equilibrium model
+    with variable labor supply to target moments.
+
+    INPUT:
+    - targets <- dictionary {moment: target value}, with moments among the
+                 keys returned by labor_moments.
+    - names   <- list of calibrated parameters, among LABOR_THETA.
+    - par0    <- dictionary with the initial values of all parameters
+                 (defaults to LABOR_PARAMS).
+    - weights <- (m,) weights of the moment deviations (default: ones).
+    - bounds  <- list of (low, high) bounds for the calibrated parameters
+                 (default: (0, 1) for shares and (0, inf) for endowments).
+    - method  <- 'nfxp' (nested fixed point) or 'mpec' (mathematical program
+                 with equilibrium constraints).
+    - tol     <- tolerance of the outer optimization.
+    - log     <- optional SolverLog recording the inner solves (nfxp).
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- theta     : (p,) calibrated parameters.
+        -- par       : dictionary with all parameters at the solution.
+        -- x         : (3,) equilibrium prices (p2, w, r).
+        -- moments   : dictionary of model moments at the solution.
+        -- residuals : (m,) weighted deviations from the targets.
+        -- nsolves   : number of calls to fsolve in the inner solves, including
+                       the cold retries after failed warm starts (nfxp).
+        -- nfailed   : number of trial parameters at which no equilibrium
+                       was found, rejected with a penalty (nfxp).
+        -- niter     : number of outer iterations.
+        -- nfev      : number of evaluations of the outer objective.
+        -- converged : boolean indicating if the calibration converged.
+    ----------------------------------------------------------------------------
+    '''
+
+    par0 = LABOR_PARAMS if par0 is None else par0
+    mnames = list(targets.keys())
+    target = np.array([targets[m] for m in mnames], dtype=float)
+    weights = np.ones(len(mnames)) if weights is None else \
+        np.asarray(weights, dtype=float)
+    theta0 = labor_get_params(par0, names)
+
+    if bounds is None:
+        bounds = [(0.0, np.inf) if name in ('Kbar', 'Tbar') else (0.0, 1.0)
+                  for name in names]
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+
+    # Weighted deviations from the targets at prices x and parameters theta
+    def deviations(x, theta):
+        mom = labor_moments(x, labor_set_params(par0, names, theta))
+        return weights * (np.array([mom[m] for m in mnames]) - target)
+
+    if method == 'nfxp':
+
+        # The equilibrium of the last trial parameters at which the inner
+        # solve converged is the starting value of the next inner solve
+        state = {'theta': None, 'x': LABOR_X0.copy(), 'nsolves': 0,
+                 'nfailed': 0}
+
+        # Equilibrium at theta, or None if neither the warm nor the cold
+        # start converged
+        def solve(theta):
+            if state['theta'] is not None and \
+                    np.array_equal(theta, state['theta']):
+                return state['x']
+            par = labor_set_params(par0, names, theta)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                x, rec = ge_instrumented_solve(labor_markets, state['x'],
+                                               args=(par,), log=log,
+                                               label='ge_calibrate')
+                state['nsolves'] += 1
+                if not rec['converged']:
+                    x, rec = ge_instrumented_solve(labor_markets, LABOR_X0,
+                                                   args=(par,), log=log,
+                                                   label='ge_calibrate')
+                    state['nsolves'] += 1
+            if not rec['converged']:
+                state['nfailed'] += 1
+                return None
+            state['theta'] = np.array(theta, dtype=float)
+            state['x'] = x
+            return x
+
+        # Trial parameters without an equilibrium get deviations far above
+        # any attainable ones, so that least_squares rejects the step and
+        # shrinks its trust region (the Jacobian is only evaluated at
+        # accepted points)
+        def fun(theta):
+            x = solve(theta)
+            if x is None:
+                return np.full(len(mnames), 1e10)
+            return deviations(x, theta)
+
+        def jac(theta):
+            x = solve(theta)
+            par = labor_set_params(par0, names, theta)
+            F_x = ge_jacobian(lambda z: labor_markets(z, par), x)
+            F_theta = ge_jacobian(
+                lambda t: labor_markets(x, labor_set_params(par0, names, t)),
+                theta)
+            m_x = ge_jacobian(lambda z: deviations(z, theta), x)
+            m_theta = ge_jacobian(lambda t: deviations(x, t), theta)
+            return ge_ift(F_x, F_theta, m_x, m_theta)[1]
+
+        if solve(theta0) is None:
+            raise RuntimeError("No equilibrium found at the initial "
+                               "parameters")
+        out = least_squares(fun, theta0, jac=jac, bounds=(lower, upper),
+                            xtol=tol, ftol=tol, gtol=tol)
+        theta = out.x
+        x = solve(theta)
+        if x is None:
+            raise RuntimeError("No equilibrium found at the calibrated "
+                               "parameters")
+        nsolves = state['nsolves']
+        nfailed = state['nfailed']
+        # least_squares does not report its iterations: the Jacobian is
+        # evaluated at the initial point and after every accepted step
+        niter = out.njev - 1
+        converged = bool(out.success)
+
+    elif method == 'mpec':
+
+        # Choose z = (x, theta) to minimize the squared deviations subject to
+        # the market equations
+        nx = LABOR_X0.size
+        z0 = np.concatenate((LABOR_X0, theta0))
+
+        def objective(z):
+            dev = deviations(z[:nx], z[nx:])
+            return 0.5 * dev @ dev
+
+        def objective_grad(z):
+            dev = deviations(z[:nx], z[nx:])
+            J = ge_jacobian(lambda v: deviations(v[:nx], v[nx:]), z)
+            return J.T @ dev
+
+        def constraints(z):
+            return np.array(labor_markets(
+                z[:nx], labor_set_params(par0, names, z[nx:])))
+
+        def constraints_jac(z):
+            return ge_jacobian(constraints, z)
+
+        zbounds = [(1e-8, None)] * nx + \
+            [(b[0], None if np.isinf(b[1]) else b[1]) for b in bounds]
+        out = minimize(objective, z0, jac=objective_grad, method='SLSQP',
+                       bounds=zbounds,
+                       constraints={'type': 'eq', 'fun': constraints,
+                                    'jac': constraints_jac},
+                       options={'ftol': tol, 'maxiter': 500})
+        x = out.x[:nx]
+        theta = out.x[nx:]
+        nsolves = 0
+        nfailed = 0
+        niter = out.nit
+        converged = bool(out.success)
+
+    else:
+        raise ValueError("method must be 'nfxp' or 'mpec'")
+
+    par = labor_set_params(par0, names, theta)
+    return {
+        'theta': theta,
+        'par': par,
+        'x': x,
+        'moments': labor_moments(x, par),
+        'residuals': deviations(x, theta),
+        'nsolves': nsolves,
+        'nfailed': nfailed,
+        'niter': niter,
+        'nfev': out.nfev,
+        'converged': converged,
+    }
@@ -0,0 +1,284 @@
+#===============================================================================
+# PROGRAM:   Persistent cache of solved equilibria for the static general
+#            equilibrium model with government activity
+# AUTHOR:    Manuel V. Montesinos
+# DATE:      October 2026
+#
+# DESCRIPTION: Solved equilibria are stored under the normalized parameter
+# vector (Kbar, Tbar, alpha, beta, G, tauw, taur, tauc). A repeated query is
+# answered from the cache without calling fsolve, and a new query is started
+# from the solution of the nearest cached parameterization instead of the fixed
+# initial guess. The cache is saved to a .npz file (every 'save_every' new
+# entries and on request) and keeps at most 'maxsize' entries, evicting the
+# least recently used ones.
+#===============================================================================
+
+# Import libraries
+import os
+import numpy as np
+from scipy.spatial import cKDTree
+
+from ge_government_model import ge_markets, GE_X0
+from ge_solver_log import ge_instrumented_solve
+
+
+# Function to map a parameter dictionary into a normalized vector. Endowments
+# and the public good enter in logs, so that distances are relative
+def ge_param_vector(par):
+    return np.concatenate((
+        [np.log(par['Kbar']), np.log(par['Tbar'])],
+        np.asarray(par['alpha'], dtype=float),
+        np.asarray(par['beta'], dtype=float),
+        [np.log1p(par['G']), par['tauw'], par['taur']],
+        np.asarray(par['tauc'], dtype=float)))
+
+
+class EquilibriumCache:
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Size-bounded, disk-backed cache of solved equilibria.
+
+    The entries are kept in preallocated arrays whose capacity doubles when
+    full, so that storing N equilibria costs O(N) copies in total. Exact hits
+    are found with a dictionary keyed by the rounded parameter vector, and
+    the nearest cached parameterization with a k-d tree
+    (scipy.spatial.cKDTree) for each endogenous tax, rebuilt only when the
+    entries stored since the last build outnumber those in the tree (the
+    newer ones are scanned directly): a query costs O(log N) amortized
+    instead of a scan of the whole cache. When the cache exceeds maxsize,
+    the least recently used tenth of the entries is evicted at once.
+
+    With a path, the cache is written to disk every save_every new entries;
+    call save() at the end of a run to write the remaining ones.
+
+    INPUT:
+    - path       <- name of the .npz file used to persist the cache (None
+                    keeps the cache in memory only). An existing file is
+                    loaded.
+    - maxsize    <- maximum number of stored equilibria.
+    - decimals   <- number of decimals used to round the normalized parameter
+                    vector when looking for an exact hit.
+    - save_every <- number of new entries between automatic saves (None: only
+                    explicit calls to save()).
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, path=None, maxsize=10000, decimals=10, save_every=100):
+        self.path = path
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.save_every = save_every
+        self._n = 0
+        self._keys = np.empty((0, 0))
+        self._sols = np.empty((0, 0))
+        self._endog = np.empty(0, dtype='U5')
+        self._stamp = np.empty(0, dtype=np.int64)
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+        else:
+            self._reindex()
+
+    def __len__(self):
+        return self._n
+
+    # Stored entries (views of the filled part of the arrays)
+    @property
+    def keys(self):
+        return self._keys[:self._n]
+
+    @property
+    def sols(self):
+        return self._sols[:self._n]
+
+    @property
+    def endog(self):
+        return self._endog[:self._n]
+
+    @property
+    def stamp(self):
+        return self._stamp[:self._n]
+
+    def _key(self, par):
+        # Adding 0.0 turns -0.0 into 0.0, so that equal keys have equal bytes
+        return np.round(ge_param_vector(par), self.decimals) + 0.0
+
+    def _touch(self, idx):
+        self.clock += 1
+        self._stamp[idx] = self.clock
+
+    def _reindex(self):
+        # Dictionary of exact keys, and no trees: every entry is in the tail
+        # of its endogenous tax until the first nearest-neighbour query
+        self._index = {(self._endog[i], self._keys[i].tobytes()): i
+                       for i in range(self._n)}
+        self._trees = {}
+        self._tail = {}
+        for i in range(self._n):
+            self._tail.setdefault(self._endog[i], []).append(i)
+
+    def lookup(self, par):
+        # Exact hit: same endogenous tax and same rounded parameter vector
+        i = self._index.get((par['endog'], self._key(par).tobytes()))
+        if i is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(i)
+        return self._sols[i].copy()
+
+    def nearest(self, par):
+        # Solution of the closest cached parameterization with the same
+        # endogenous tax (Euclidean distance of normalized vectors)
+        endog = par['endog']
+        tail = self._tail.get(endog, [])
+        tree, rows = self._trees.get(endog, (None, None))
+        if tail and len(tail) > (0 if rows is None else rows.size):
+            rows = np.flatnonzero(self.endog == endog)
+            tree = cKDTree(self._keys[rows])
+            self._trees[endog] = (tree, rows)
+            self._tail[endog] = tail = []
+        if tree is None:
+            return None
+        key = self._key(par)
+        dist, i = tree.query(key)
+        best = rows[i]
+        if tail:
+            dtail = np.sum((self._keys[tail] - key)**2, axis=1)
+            if dtail.min() < dist**2:
+                best = tail[int(np.argmin(dtail))]
+        return self._sols[best].copy()
+
+    def store(self, par, x):
+        key = self._key(par)
+        x = np.asarray(x, dtype=float)
+        i = self._index.get((par['endog'], key.tobytes()))
+        if i is not None:
+            self._sols[i] = x
+            self._touch(i)
+            return
+
+        # Append, doubling the capacity of the arrays when they are full
+        if self._n == self._keys.shape[0]:
+            cap = max(16, 2*self._n)
+            keys = np.empty((cap, key.size))
+            sols = np.empty((cap, x.size))
+            if self._n > 0:
+                keys[:self._n], sols[:self._n] = self.keys, self.sols
+            self._keys, self._sols = keys, sols
+            self._endog = np.resize(self._endog, cap)
+            self._stamp = np.resize(self._stamp, cap)
+        i = self._n
+        self._keys[i], self._sols[i] = key, x
+        self._endog[i] = par['endog']
+        self._n += 1
+        self._touch(i)
+        self._index[(par['endog'], key.tobytes())] = i
+        self._tail.setdefault(par['endog'], []).append(i)
+
+        # Evict the least recently used entries, a tenth of maxsize at once
+        if self._n > self.maxsize:
+            keep = np.sort(np.argsort(self.stamp)[-(self.maxsize -
+                                                    self.maxsize//10):])
+            self._set(self.keys[keep], self.sols[keep], self.endog[keep],
+                      self.stamp[keep])
+
+        self._unsaved += 1
+        if self.path is not None and self.save_every and \
+                self._unsaved >= self.save_every:
+            self.save()
+
+    def _set(self, keys, sols, endog, stamp):
+        self._keys = np.array(keys, dtype=float, ndmin=2)
+        self._sols = np.array(sols, dtype=float, ndmin=2)
+        self._endog = np.array(endog, dtype='U5')
+        self._stamp = np.array(stamp, dtype=np.int64)
+        self._n = self._endog.size
+        self._reindex()
+
+    def save(self):
+        # Write to a temporary file first so that an interrupted run does not
+        # leave a corrupted cache behind
+        if self.path is None:
+            return
+        tmp = self.path + '.tmp.npz'
+        np.savez(tmp, keys=self.keys, sols=self.sols, endog=self.endog,
+                 stamp=self.stamp, clock=self.clock)
+        os.replace(tmp, self.path)
+        self._unsaved = 0
+
+    def load(self):
+        with np.load(self.path) as data:
+            self._set(data['keys'], data['sols'], data['endog'], data['stamp'])
+            self.clock = int(data['clock'])
+
+
+def ge_solve(par, cache=None, x0=None, xtol=1.49012e-08, maxres=1e-8,
+             log=None, scenario=None):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Solve the static general equilibrium model with government
+    activity, using a cache of previously solved equilibria.
+
+    INPUT:
+    - par    <- dictionary of parameters (see ge_government_model.ge_params).
+    - cache  <- EquilibriumCache instance (None solves without caching).
+    - x0     <- optional starting value (e.g., the equilibrium of a nearby
+                problem), tried before the nearest cached solution and the
+                default initial guess GE_X0.
+    - xtol   <- relative tolerance passed to fsolve.
+    - maxres <- maximum absolute residual accepted as an equilibrium.
+    - log    <- optional SolverLog recording every fsolve call.
+    - scenario <- name of the parameterization, stored in the log records.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- x         : (4,) prices (q2, w, r) and endogenous tax rate.
+        -- converged : boolean indicating if an equilibrium was found.
+        -- source    : 'cache' (exact hit), 'warm' (started from x0 or the
+                       nearest cached solution) or 'cold' (started from GE_X0).
+        -- nfev      : number of evaluations of the market equations.
+        -- nsolves   : number of calls to fsolve (0 for a cache hit, more
+                       than one if a warm start failed).
+    ----------------------------------------------------------------------------
+    '''
+
+    # Exact hit: no need to solve
+    if cache is not None:
+        x = cache.lookup(par)
+        if x is not None:
+            return {'x': x, 'converged': True, 'source': 'cache', 'nfev': 0,
+                    'nsolves': 0}
+
+    # Starting values: given guess, nearest cached solution, then the fixed
+    # initial guess
+    starts = []
+    if x0 is not None:
+        starts.append(('warm', np.asarray(x0, dtype=float)))
+    if cache is not None:
+        xnear = cache.nearest(par)
+        if xnear is not None:
+            starts.append(('warm', xnear))
+    starts.append(('cold', GE_X0))
+
+    nfev = 0
+    nsolves = 0
+    for source, xs in starts:
+        x, rec = ge_instrumented_solve(ge_markets, xs, args=(par,),
+                                       xtol=xtol, log=log,
+                                       label='ge_solve/' + source,
+                                       scenario=scenario)
+        nfev += rec['nfev']
+        nsolves += 1
+        converged = rec['converged'] and rec['maxres'] < maxres
+        if converged:
+            break
+
+    if converged and cache is not None:
+        cache.store(par, x)
+
+    return {'x': x, 'converged': converged, 'source': source, 'nfev': nfev,
+            'nsolves': nsolves}
@@ -0,0 +1,133 @@
+#===============================================================================
+# PROGRAM:   Parameterized static general equilibrium model with government
+#            activity
+# AUTHOR:    Manuel V. Montesinos
+# REFERENCE: Fehr, H., and Kindermann F. (2018), "Introduction to Computational
+#            Economics using Fortran", Oxford University Press
+# DATE:      October 2026
+#
+# DESCRIPTION: Same market equations as static_ge_government.py, but with all
+# parameters passed in a dictionary instead of read from globals, so that the
+# model can be solved repeatedly for different parameterizations. The tax that
+# balances the government budget is selected with par['endog'] ('taur',
+# 'tauw', 'tauc1' or 'tauc2') instead of uncommenting lines.
+#===============================================================================
+
+# Import libraries
+import numpy as np
+
+# Default parameterization (the one used in static_ge_government.py)
+GE_PARAMS = {
+    'Kbar': 10.0,
+    'Tbar': 30.0,
+    'alpha': np.array([0.3, 0.4]),
+    'beta': np.array([0.3, 0.6]),
+    'G': 3.0,
+    'tauw': 0.0,
+    'taur': 0.0,
+    'tauc': np.array([0.0, 0.0]),
+    'endog': 'taur',
+}
+
+# Initial guess for prices and the endogenous tax rate
+GE_X0 = np.array([0.5, 0.5, 0.5, 0.5])
+
+
+# Function to build a full parameter dictionary from the defaults
+def ge_params(**kwargs):
+    par = dict(GE_PARAMS)
+    par.update(kwargs)
+    par['alpha'] = np.asarray(par['alpha'], dtype=float)
+    par['beta'] = np.asarray(par['beta'], dtype=float)
+    par['tauc'] = np.asarray(par['tauc'], dtype=float)
+    return par
+
+
+# Function to set tax rates, replacing the endogenous one by x[3]
+def ge_taxes(x, par):
+    tauw = par['tauw']
+    taur = par['taur']
+    tauc = np.array(par['tauc'], dtype=float)
+    if par['endog'] == 'taur':
+        taur = x[3]
+    elif par['endog'] == 'tauw':
+        tauw = x[3]
+    elif par['endog'] == 'tauc1':
+        tauc[0] = x[3]
+    elif par['endog'] == 'tauc2':
+        tauc[1] = x[3]
+    else:
+        raise ValueError("par['endog'] must be 'taur', 'tauw', 'tauc1' or "
+                         "'tauc2'")
+    return tauw, taur, tauc
+
+
+# Function to determine market equilibrium
+def ge_markets(x, par):
+
+    # Parameters
+    Kbar = par['Kbar']
+    Tbar = par['Tbar']
+    alpha = par['alpha']
+    beta = par['beta']
+    G = par['G']
+
+    # Copy producer prices and taxes
+    q = np.array([1, x[0]])
+    w = x[1]
+    r = x[2]
+    tauw, taur, tauc = ge_taxes(x, par)
+
+    # Calculate consumer prices and total income
+    p = q*(1 + tauc)
+    wn = w*(1 - tauw)
+    rn = r*(1 - taur)
+    Ybarn = wn*Tbar + rn*Kbar
+
+    # Get market equations
+    ms1 = alpha[0]*Ybarn/p[0] + G - (beta[0]/w)**beta[0] * \
+        ((1-beta[0])/r)**(1-beta[0]) * q[0]*(alpha[0]*Ybarn/p[0]+G)
+    ms2 = 1/p[1] - (beta[1]/w)**beta[1] * \
+            ((1-beta[1])/r)**(1-beta[1])*q[1]/p[1]
+    ms3 = beta[0]/w * q[0]*(alpha[0]*Ybarn/p[0]+G) + \
+            beta[1]/w * q[1]*alpha[1]*Ybarn/p[1] + \
+            (1-alpha[0]-alpha[1])*Ybarn/wn - Tbar
+    ms4 = q[0]*G - tauc[0]/(1+tauc[0])*alpha[0]*Ybarn - \
+            tauc[1]/(1+tauc[1])*alpha[1]*Ybarn - \
+            tauw*w*(Tbar-(1-alpha[0]-alpha[1])/wn * Ybarn) - taur*r*Kbar
+    return [ms1, ms2, ms3, ms4]
+
+
+# Function to calculate the economic variables at a market equilibrium
+def ge_outcomes(x, par):
+
+    # Parameters
+    Kbar = par['Kbar']
+    Tbar = par['Tbar']
+    alpha = par['alpha']
+    beta = par['beta']
+    G = par['G']
+
+    # Producer prices and taxes
+    q = np.array([1, x[0]])
+    w = x[1]
+    r = x[2]
+    tauw, taur, tauc = ge_taxes(x, par)
+
+    # Calculate consumer prices and total income
+    p = q*(1+tauc)
+    wn = w*(1-tauw)
+    rn = r*(1-taur)
+
+    # Calculate other economic variables
+    Ybarn = wn*Tbar + rn*Kbar
+    Xd = alpha*Ybarn/p
+    Y = np.array([Xd[0]+G, Xd[1]])
+    ell = (1-alpha[0]-alpha[1])*Ybarn/wn
+    L = beta*q*Y/w
+    K = (1-beta)*q*Y/r
+    U = Xd[0]**alpha[0] * Xd[1]**alpha[1] * ell**(1-alpha[0]-alpha[1])
+
+    return {'q': q, 'p': p, 'w': w, 'r': r, 'wn': wn, 'rn': rn,
+            'tauw': tauw, 'taur': taur, 'tauc': tauc, 'Ybarn': Ybarn,
+            'Xd': Xd, 'Y': Y, 'ell': ell, 'L': L, 'K': K, 'U': U}
@@ -0,0 +1,197 @@
+#===============================================================================
+# PROGRAM:   Welfare-maximizing tax rates in the static general equilibrium
+#            model with government activity
+# AUTHOR:    Manuel V. Montesinos
+# REFERENCE: Fehr, H., and Kindermann F. (2018), "Introduction to Computational
+#            Economics using Fortran", Oxford University Press
+# DATE:      October 2026
+#
+# DESCRIPTION: The outer problem maximizes household utility U over a set of
+# tax instruments. The government budget is balanced in every evaluation by the
+# endogenous tax par['endog'], which is solved together with prices in the
+# inner equilibrium. Each inner solve starts from the equilibrium of the
+# previous outer iterate, and the outer gradient is obtained from the implicit
+# function theorem,
+#
+#   dx/dtau = -F_x^{-1} F_tau,   dU/dtau = U_tau + U_x dx/dtau,
+#
+# with the partial derivatives computed by finite differences at the solved
+# equilibrium (ge_sensitivities), so that no extra equilibria have to be
+# solved to differentiate U.
+#===============================================================================
+
+# Import libraries
+import numpy as np
+from scipy.optimize import minimize
+
+from ge_government_model import ge_markets, ge_outcomes
+from ge_equilibrium_cache import ge_solve
+from ge_sensitivities import ge_jacobian, ge_ift
+
+
+# Function to set the value of a tax instrument in a parameter dictionary
+def ge_set_tax(par, name, value):
+    par = dict(par)
+    if name in ('tauw', 'taur'):
+        par[name] = value
+    elif name in ('tauc1', 'tauc2'):
+        tauc = np.array(par['tauc'], dtype=float)
+        tauc[int(name[-1]) - 1] = value
+        par['tauc'] = tauc
+    else:
+        raise ValueError("Tax instruments must be 'tauw', 'taur', 'tauc1' or "
+                         "'tauc2'")
+    return par
+
+
+# Function to read the value of a tax instrument
+def ge_get_tax(par, name):
+    if name in ('tauw', 'taur'):
+        return par[name]
+    return np.asarray(par['tauc'], dtype=float)[int(name[-1]) - 1]
+
+
+# Function to compute the derivatives of the equilibrium and of utility with
+# respect to the tax instruments at a solved equilibrium x
+def ge_tax_sensitivities(x, par, instruments):
+
+    # Current value of the instruments
+    tau = np.array([ge_get_tax(par, name) for name in instruments])
+
+    # Helper to rebuild the parameters for a given instrument vector
+    def with_taxes(t):
+        p = par
+        for name, value in zip(instruments, t):
+            p = ge_set_tax(p, name, value)
+        return p
+
+    # Partial derivatives of the market equations and of utility
+    F_x = ge_jacobian(lambda z: ge_markets(z, par), x)
+    F_tau = ge_jacobian(lambda t: ge_markets(x, with_taxes(t)), tau)
+    U_x = ge_jacobian(lambda z: ge_outcomes(z, par)['U'], x).ravel()
+    U_tau = ge_jacobian(lambda t: ge_outcomes(x, with_taxes(t))['U'],
+                        tau).ravel()
+
+    # Implicit function theorem
+    return ge_ift(F_x, F_tau, U_x, U_tau)
+
+
+def ge_optimal_tax(par, instruments, tau0=None, bounds=None, cache=None,
+                   tol=1e-8, maxiter=200, verbose=False, log=None,
+                   scenario=None):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Find the tax rates that maximize household utility subject to the
+    government budget constraint.
+
+    INPUT:
+    - par         <- dictionary of parameters (see ge_government_model). The
+                     tax in par['endog'] balances the budget.
+    - instruments <- list of tax instruments chosen by the government, among
+                     'tauw', 'taur', 'tauc1' and 'tauc2' (not par['endog']).
+    - tau0        <- initial values of the instruments (default: values in
+                     par).
+    - bounds      <- list of (low, high) bounds for the instruments.
+    - cache       <- optional EquilibriumCache used by the inner solves.
+    - tol         <- tolerance of the outer L-BFGS-B optimization.
+    - maxiter     <- maximum number of outer iterations.
+    - verbose     <- if True, print every outer evaluation.
+    - log         <- optional SolverLog recording the inner solves.
+    - scenario    <- name of the problem, stored in the log records.
+
+    OUTPUT:
+    - results <- dictionary with the following entries:
+        -- tau       : (m,) optimal value of the instruments.
+        -- par       : parameter dictionary at the optimum.
+        -- x         : (4,) equilibrium prices and endogenous tax rate.
+        -- U         : (scalar) utility at the optimum.
+        -- grad      : (m,) gradient of U with respect to the instruments.
+        -- nsolves   : number of calls to fsolve in the inner solves
+                       (including the cold retries after failed warm
+                       starts).
+        -- nfev      : total number of evaluations of the market equations.
+        -- njev      : number of equilibrium Jacobians computed for the
+                       implicit function theorem.
+        -- niter     : number of outer iterations.
+        -- converged : boolean indicating if the outer problem converged.
+    ----------------------------------------------------------------------------
+    '''
+
+    if par['endog'] in instruments:
+        raise ValueError("The endogenous tax cannot be an instrument")
+
+    if tau0 is None:
+        tau0 = [ge_get_tax(par, name) for name in instruments]
+    tau0 = np.asarray(tau0, dtype=float)
+
+    # State shared across outer evaluations: the equilibrium at the previous
+    # outer iterate is the starting value of every inner solve, so that trial
+    # points of the line search do not move the inner solver to another branch
+    # of equilibria (e.g. the other side of a Laffer curve)
+    state = {'x': None, 'tau_last': None, 'x_last': None, 'nsolves': 0,
+             'nfev': 0, 'njev': 0}
+
+    def objective(tau):
+        p = par
+        for name, value in zip(instruments, tau):
+            p = ge_set_tax(p, name, value)
+
+        # Trial points of the inner solver can leave the domain of the market
+        # equations (negative prices): they are rejected by fsolve, and the
+        # warnings of the powers of negative numbers are silenced
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sol = ge_solve(p, cache=cache, x0=state['x'], log=log,
+                           scenario=scenario)
+        state['nsolves'] += sol['nsolves']
+        state['nfev'] += sol['nfev']
+        if not sol['converged']:
+            # Reject the point without losing the last good starting value
+            return np.inf, np.zeros_like(tau)
+        x = sol['x']
+        if state['x'] is None:
+            state['x'] = x
+        state['tau_last'] = np.array(tau, dtype=float)
+        state['x_last'] = x
+
+        U = ge_outcomes(x, p)['U']
+        _, dU = ge_tax_sensitivities(x, p, instruments)
+        state['njev'] += 1
+
+        if verbose:
+            print('tau =', tau, ' U =', U, ' source =', sol['source'])
+
+        # Minimize minus utility
+        return -U, -dU
+
+    # Move the warm start to each accepted outer iterate
+    def callback(tau):
+        if state['tau_last'] is not None and \
+                np.array_equal(tau, state['tau_last']):
+            state['x'] = state['x_last']
+
+    out = minimize(objective, tau0, jac=True, method='L-BFGS-B',
+                   bounds=bounds, callback=callback,
+                   options={'ftol': tol, 'gtol': tol, 'maxiter': maxiter})
+
+    # Equilibrium at the optimum (taken from the cache or the last solve)
+    p = par
+    for name, value in zip(instruments, out.x):
+        p = ge_set_tax(p, name, value)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sol = ge_solve(p, cache=cache, x0=state['x'], log=log,
+                       scenario=scenario)
+    x = sol['x']
+    _, dU = ge_tax_sensitivities(x, p, instruments)
+
+    return {
+        'tau': out.x,
+        'par': p,
+        'x': x,
+        'U': ge_outcomes(x, p)['U'],
+        'grad': dU,
+        'nsolves': state['nsolves'] + sol['nsolves'],
+        'nfev': state['nfev'] + sol['nfev'],
+        'njev': state['njev'] + 1,
+        'niter': out.nit,
+        'converged': bool(out.success),
+    }
@@ -0,0 +1,47 @@
+#===============================================================================
+# PROGRAM:   Sensitivities of the equilibrium of the static general equilibrium
+#            models to parameters
+# AUTHOR:    Manuel V. Montesinos
+# DATE:      October 2026
+#
+# DESCRIPTION: If F(x, theta) = 0 are the market equations and m(x, theta) an
+# outcome of the equilibrium (moments, utility), the implicit function theorem
+# (IFT) gives the derivatives of the equilibrium and of the outcome,
+#
+#   dx/dtheta = -F_x^{-1} F_theta,   dm/dtheta = m_theta + m_x dx/dtheta,
+#
+# from the partial derivatives at one solved equilibrium, without solving
+# further equilibria. The partial derivatives are computed by central finite
+# differences of F and m (ge_jacobian), which only evaluates the market
+# equations, so the sensitivities are IFT/finite-difference sensitivities with
+# an error of order h^2, not analytic derivatives.
+#===============================================================================
+
+# Import libraries
+import numpy as np
+
+
+# Function to compute the Jacobian of a vector function by central differences
+def ge_jacobian(fun, x, h=1e-6):
+    x = np.asarray(x, dtype=float)
+    f0 = np.atleast_1d(fun(x))
+    jac = np.zeros((f0.size, x.size))
+    for kk in range(x.size):
+        step = h * max(abs(x[kk]), 1.0)
+        xp = x.copy()
+        xm = x.copy()
+        xp[kk] += step
+        xm[kk] -= step
+        jac[:, kk] = (np.atleast_1d(fun(xp)) - np.atleast_1d(fun(xm))) / \
+            (2 * step)
+    return jac
+
+
+# Function to apply the implicit function theorem: derivatives of the
+# equilibrium x and of an outcome m with respect to the parameters, from the
+# partial derivatives F_x, F_theta, m_x and m_theta at an equilibrium
+def ge_ift(F_x, F_theta, m_x=None, m_theta=None):
+    dx_dtheta = -np.linalg.solve(F_x, F_theta)
+    if m_x is None:
+        return dx_dtheta, None
+    return dx_dtheta, m_theta + m_x @ dx_dtheta
@@ -0,0 +1,215 @@
+#===============================================================================
+# PROGRAM:   Instrumentation of the market equations and equilibrium solvers of
+#            the static general equilibrium models
+# AUTHOR:    Manuel V. Montesinos
+# DATE:      October 2026
+#
+# DESCRIPTION: ge_instrumented_solve calls fsolve with full_output=True around
+# any 'markets' function, reading the counts of residual and Jacobian
+# evaluations from fsolve, timing the solve and recording the convergence flag
+# and max|residual|. By default fsolve builds the Jacobian by forward
+# differences inside MINPACK, which reports no Jacobian count (njev is None);
+# with fprime='fd' the Jacobian is passed as central differences of the
+# markets function (ge_jacobian), which are counted at the cost of about 2n
+# extra residual evaluations each. Records are
+# collected in a SolverLog, which can be saved as JSON lines and aggregated
+# across batch runs to find slow or failing scenarios. Residuals that are not
+# finite (NaN or inf) are flagged as failures.
+#===============================================================================
+
+# Import libraries
+import json
+import time
+import numpy as np
+from scipy.optimize import fsolve
+
+from ge_sensitivities import ge_jacobian
+
+
+class CountingFunction:
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Wrapper that counts the calls to a function and the time spent in
+    them.
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, fun):
+        self.fun = fun
+        self.ncalls = 0
+        self.time = 0.0
+
+    def __call__(self, *args, **kwargs):
+        self.ncalls += 1
+        t0 = time.perf_counter()
+        out = self.fun(*args, **kwargs)
+        self.time += time.perf_counter() - t0
+        return out
+
+
+class SolverLog:
+    '''
+    ----------------------------------------------------------------------------
+    CLASS: Collection of solver records.
+
+    Each record is a dictionary with the entries label, scenario, converged,
+    ier, message, nfev, njev, time, fun_time, maxres and x (njev is None
+    when fsolve built the Jacobian itself, and nfev then includes its
+    forward differences).
+    ----------------------------------------------------------------------------
+    '''
+
+    def __init__(self, records=None):
+        self.records = [] if records is None else list(records)
+        # Number of records already written by save, for each file
+        self._saved = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        self.records.append(record)
+
+    def save(self, path):
+        # Append as JSON lines, so that several batch runs share one file;
+        # only the records added since the last save to the same file are
+        # written
+        start = self._saved.get(path, 0)
+        with open(path, 'a') as f:
+            for rec in self.records[start:]:
+                f.write(json.dumps(rec) + '\n')
+        self._saved[path] = len(self.records)
+
+    @classmethod
+    def load(cls, paths):
+        if isinstance(paths, str):
+            paths = [paths]
+        records = []
+        for path in paths:
+            with open(path) as f:
+                records += [json.loads(line) for line in f if line.strip()]
+        return cls(records)
+
+    def report(self, by='scenario', slowest=5):
+        '''
+        ------------------------------------------------------------------------
+        Aggregate the records by the entry 'by' ('scenario' or 'label').
+
+        OUTPUT:
+        - report <- dictionary with the following entries:
+            -- groups  : dictionary of group statistics (nsolves, nfailed,
+                         nnonfinite, nfev, njev, time, mean_time, max_time,
+                         maxres). nnonfinite counts the solves that ended
+                         with a NaN or infinite residual, and maxres is the
+                         largest finite max|residual| (NaN if there is none).
+            -- slowest : list of the 'slowest' records with the largest time.
+            -- failed  : list of the records that did not converge.
+        ------------------------------------------------------------------------
+        '''
+        groups = {}
+        for rec in self.records:
+            g = groups.setdefault(str(rec.get(by)), {
+                'nsolves': 0, 'nfailed': 0, 'nnonfinite': 0, 'nfev': 0,
+                'njev': 0, 'time': 0.0, 'max_time': 0.0, 'maxres': np.nan})
+            g['nsolves'] += 1
+            g['nfailed'] += not rec['converged']
+            g['nnonfinite'] += not np.isfinite(rec['maxres'])
+            g['nfev'] += rec['nfev']
+            g['njev'] += rec['njev'] or 0
+            g['time'] += rec['time']
+            g['max_time'] = max(g['max_time'], rec['time'])
+            # np.fmax ignores NaN, which are counted in nnonfinite instead
+            g['maxres'] = float(np.fmax(g['maxres'], rec['maxres']))
+        for g in groups.values():
+            g['mean_time'] = g['time'] / g['nsolves']
+
+        order = sorted(self.records, key=lambda rec: rec['time'], reverse=True)
+        return {
+            'groups': groups,
+            'slowest': order[:slowest],
+            'failed': [rec for rec in self.records if not rec['converged']],
+        }
+
+    def print_report(self, by='scenario', slowest=5):
+        rep = self.report(by=by, slowest=slowest)
+        print('{0:20s} {1:>7s} {2:>7s} {3:>7s} {4:>7s} {5:>6s} {6:>10s} '
+              '{7:>10s} {8:>10s}'.format(by, 'solves', 'failed', 'nonfin',
+                                         'nfev', 'njev', 'time', 'max time',
+                                         'max|res|'))
+        for name, g in rep['groups'].items():
+            print('{0:20s} {1:7d} {2:7d} {3:7d} {4:7d} {5:6d} {6:10.4f} '
+                  '{7:10.4f} {8:10.2e}'.format(
+                      name[:20], g['nsolves'], g['nfailed'], g['nnonfinite'],
+                      g['nfev'], g['njev'], g['time'], g['max_time'],
+                      g['maxres']))
+        print(' ')
+        print('Slowest solves:')
+        for rec in rep['slowest']:
+            print(f"  {rec['label']} ({rec['scenario']}): {rec['time']:.4f} s, "
+                  f"nfev = {rec['nfev']}, converged = {rec['converged']}")
+
+
+def ge_instrumented_solve(markets, x0, args=(), fprime=None,
+                          xtol=1.49012e-08, log=None, label='fsolve',
+                          scenario=None):
+    '''
+    ----------------------------------------------------------------------------
+    FUNCTION: Solve a system of market equations with fsolve and record
+    diagnostics of the solve.
+
+    INPUT:
+    - markets  <- function returning the market equations (residuals).
+    - x0       <- initial guess.
+    - args     <- additional arguments passed to markets (and fprime).
+    - fprime   <- function returning the Jacobian of markets, None (forward
+                  differences inside fsolve, the default; not counted in
+                  njev) or 'fd' (central differences of markets, counted in
+                  njev, with their residual calls counted in nfev).
+    - xtol     <- relative tolerance passed to fsolve.
+    - log      <- SolverLog where the record is stored (optional).
+    - label    <- name of the solve (e.g. the calling routine).
+    - scenario <- name of the scenario or parameterization being solved.
+
+    OUTPUT:
+    - x      <- solution returned by fsolve.
+    - record <- dictionary with the diagnostics of the solve.
+    ----------------------------------------------------------------------------
+    '''
+
+    fun = CountingFunction(markets)
+    # Residual calls of the central differences, added to those of fsolve
+    fd_fun = CountingFunction(markets)
+    if isinstance(fprime, str) and fprime == 'fd':
+        def fprime(x, *args):
+            return ge_jacobian(lambda z: fd_fun(z, *args), x)
+    jac = None if fprime is None else CountingFunction(fprime)
+
+    t0 = time.perf_counter()
+    x, info, ier, mesg = fsolve(fun, x0, args=args, fprime=jac, xtol=xtol,
+                                full_output=True)
+    elapsed = time.perf_counter() - t0
+
+    # Evaluations reported by fsolve (njev only with fprime)
+    nfev = int(info['nfev']) + fd_fun.ncalls
+    njev = int(info['njev']) if 'njev' in info else None
+
+    # A solve that ends with a NaN or infinite residual has not converged,
+    # whatever the flag of fsolve (np.max propagates NaN)
+    maxres = float(np.max(np.abs(info['fvec'])))
+    record = {
+        'label': label,
+        'scenario': scenario,
+        'converged': bool(ier == 1 and np.isfinite(maxres)),
+        'ier': int(ier),
+        'message': mesg,
+        'nfev': nfev,
+        'njev': njev,
+        'time': elapsed,
+        'fun_time': fun.time,
+        'maxres': maxres,
+        'x': np.asarray(x, dtype=float).tolist(),
+    }
+    if log is not None:
+        log.add(record)
+
+    return x, record
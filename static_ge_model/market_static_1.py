@@ -7,8 +7,10 @@
 #===============================================================================
 
 # Import libraries
+import sys
 import numpy as np
-from scipy.optimize import fsolve
+
+from ge_solver_log import SolverLog, ge_instrumented_solve
 
 print("-----------------------------------------------------------------------")
 print(" ")
@@ -42,8 +44,14 @@ def markets(x):
 # Initial guess for the price vector
 x0 = [0.5, 0.5, 0.5]
 
-# Find the root of the market equations
-equil = fsolve(markets, x0)
+# Find the root of the market equations. The diagnostics of the solve
+# (evaluations, time, convergence and max|residual|) are recorded only if the
+# path of a log file is given on the command line
+log_path = sys.argv[1] if len(sys.argv) > 1 else None
+log = None if log_path is None else SolverLog()
+equil = ge_instrumented_solve(markets, x0, log=log,
+                              label='market_static_1',
+                              scenario='baseline')[0]
 p = [1, equil[0]]
 w = equil[1]
 r = equil[2]
@@ -69,4 +77,11 @@ print("UTILITY: ")
 print("U =", U)
 print(" ")
 
+# Solver diagnostics, appended to the log of the batch runs of the models
+if log is not None:
+    print("SOLVER: ")
+    log.print_report(by='label')
+    log.save(log_path)
+    print(" ")
+
 print("-----------------------------------------------------------------------")
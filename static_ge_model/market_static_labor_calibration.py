@@ -0,0 +1,44 @@
+#===============================================================================
+# PROGRAM:   Calibration of the static general equilibrium model with variable
+#            labor supply
+# AUTHOR:    Manuel V. Montesinos
+# REFERENCE: Fehr, H., and Kindermann F. (2018), "Introduction to Computational
+#            Economics using Fortran", Oxford University Press
+# DATE:      October 2026
+#===============================================================================
+
+# Import libraries
+from ge_calibration import ge_calibrate, LABOR_PARAMS
+
+print("-----------------------------------------------------------------------")
+print(" ")
+print("CALIBRATION OF THE STATIC GENERAL EQUILIBRIUM MODEL WITH VARIABLE")
+print("LABOR SUPPLY")
+print(" ")
+
+# Target moments: expenditure, employment and capital shares of sector 1,
+# fraction of the time endowment spent working and the interest rate
+targets = {
+    'exp_share1': 0.35,
+    'emp_share1': 0.30,
+    'cap_share1': 0.45,
+    'hours': 0.40,
+    'r': 0.60,
+}
+
+# Calibrated parameters (Tbar stays at the value of market_static_labor.py)
+names = ['alpha1', 'alpha2', 'beta1', 'beta2', 'Kbar']
+
+for method in ['nfxp', 'mpec']:
+    results = ge_calibrate(targets, names, par0=LABOR_PARAMS, method=method)
+    print("METHOD:", method, " converged:", results['converged'],
+          " iterations:", results['niter'], " solves:", results['nsolves'])
+    for name, value in zip(names, results['theta']):
+        print(" ", name, "=", value)
+    print(" ")
+    print("  MOMENTS (model vs. target):")
+    for m, value in targets.items():
+        print(" ", m, "=", results['moments'][m], " target =", value)
+    print(" ")
+
+print("-----------------------------------------------------------------------")
@@ -0,0 +1,65 @@
+#===============================================================================
+# PROGRAM:   Optimal taxation in the static general equilibrium model with
+#            government activity
+# AUTHOR:    Manuel V. Montesinos
+# REFERENCE: Fehr, H., and Kindermann F. (2018), "Introduction to Computational
+#            Economics using Fortran", Oxford University Press
+# DATE:      October 2026
+#===============================================================================
+
+# Import libraries
+import os
+from ge_government_model import ge_params, ge_outcomes
+from ge_equilibrium_cache import EquilibriumCache
+from ge_optimal_tax import ge_optimal_tax
+from ge_solver_log import SolverLog
+
+print("-----------------------------------------------------------------------")
+print(" ")
+print("OPTIMAL TAXATION IN THE STATIC GENERAL EQUILIBRIUM MODEL")
+print(" ")
+
+# Parameters of static_ge_government.py. The wage tax balances the budget
+par = ge_params(endog='tauw')
+
+# Tax instruments chosen by the government and their bounds
+instruments = ['tauc1', 'tauc2']
+bounds = [(-0.5, 1.5), (-0.5, 1.5)]
+
+# Solve the optimal tax problem, recording every inner solve. Solved
+# equilibria are kept in a cache persisted to ge_cache.npz next to this
+# script (written every 100 new equilibria and at the end of the run), so
+# that a second run answers the inner solves from the cache
+cache = EquilibriumCache(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      'ge_cache.npz'))
+log = SolverLog()
+results = ge_optimal_tax(par, instruments, bounds=bounds, cache=cache, log=log,
+                         scenario='optimal tax')
+out = ge_outcomes(results['x'], results['par'])
+
+# Results
+print("OPTIMAL TAX RATES: ")
+print("tc1 =", out['tauc'][0], " tc2 =", out['tauc'][1], " tw =", out['tauw'],
+      " tr =", out['taur'])
+print(" ")
+print("PRICES: ")
+print("q2 =", out['q'][1], " w =", out['w'], " r =", out['r'])
+print(" ")
+print("UTILITY: ")
+print("U =", results['U'], " dU/dtau =", results['grad'])
+print(" ")
+print("SOLVER: ")
+print("Converged:", results['converged'], " outer iterations:",
+      results['niter'], " inner solves:", results['nsolves'],
+      " market evaluations:", results['nfev'])
+print(" ")
+log.print_report(by='label')
+print(" ")
+
+# Write the new equilibria to disk
+cache.save()
+print("CACHE: ")
+print("Entries:", len(cache), " hits:", cache.hits, " misses:", cache.misses)
+print(" ")
+
+print("-----------------------------------------------------------------------")